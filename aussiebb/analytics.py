@@ -0,0 +1,210 @@
+"""usage analytics across many services at once, with numpy - install it with `pip install pyaussiebb[numpy]`
+
+```
+from aussiebb.analytics import FleetUsage, UsageHistory
+fleet = FleetUsage.from_usage({service_id: client.get_usage(service_id) for service_id in service_ids})
+print(fleet.burn_rate())   # MB a day so far this billing period, for every service
+print(fleet.projected())   # MB by the end of the billing period at that rate
+history = UsageHistory.from_store(store, "usedMb", date(2025, 1, 1), date(2025, 12, 31))
+months, deltas = history.month_over_month()
+```
+
+`FleetUsage` is the latest `get_usage` (or `telephony_usage`) response for each service, with a column per metric.
+Metrics are named as in `aussiebb.usagestore` - `usedMb`, `daysRemaining`, `national.cost` and so on - and are NaN
+where a service doesn't have them, like `remainingMb` on unlimited plans. Rates and projections use `daysTotal` and
+`daysRemaining` from the same response, so they're NaN for services that don't report those.
+
+`UsageHistory` is one metric's daily values for many services, as a services x days array, usually loaded from a
+`UsageStore`. Broadband metrics like `usedMb` count up through each billing period and reset, `daily_usage()` turns
+them into what was used each day. Telephony `historical` entries are monthly, use `how="last"` for those.
+
+Nothing here loops over services in Python, apart from flattening the responses in `FleetUsage.from_usage`.
+"""
+
+from datetime import date, timedelta
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import warnings
+
+from .usagestore import UsagePoint, UsageStore, flatten_usage
+
+# a numpy array, numpy's imported lazily so it can't be named here
+Array = Any
+
+MONTHLY_AGGREGATES = ["usage", "last", "max"]
+
+
+def _numpy() -> Any:
+    """imports numpy, which is an optional dependency"""
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError("aussiebb.analytics needs numpy, install it with `pip install pyaussiebb[numpy]`") from error
+    return numpy
+
+
+class FleetUsage:
+    """Current usage for many services, one array per metric with a value for each service.
+
+    ```
+    @param service_ids: the services, in the order of the values
+    @param columns: metric name -> an array of float64 values, NaN where a service doesn't have the metric
+    ```
+    """
+
+    def __init__(self, service_ids: Array, columns: Dict[str, Array]) -> None:
+        self.service_ids = service_ids
+        self.columns = columns
+
+    @classmethod
+    def from_usage(cls, usage: Mapping[int, Mapping[str, Any]]) -> "FleetUsage":
+        """builds the arrays from service_id -> `get_usage` (or `telephony_usage`) response"""
+        np = _numpy()
+        service_ids = sorted(usage)
+        flattened = [flatten_usage(usage[service_id]) for service_id in service_ids]
+        names = sorted(set().union(*flattened)) if flattened else []
+        nan = float("nan")
+        columns = {name: np.fromiter((values.get(name, nan) for values in flattened), dtype=np.float64, count=len(flattened)) for name in names}
+        return cls(np.array(service_ids, dtype=np.int64), columns)
+
+    def column(self, metric: str) -> Array:
+        """a metric's values, all NaN if no service has it"""
+        values = self.columns.get(metric)
+        if values is None:
+            np = _numpy()
+            return np.full(len(self.service_ids), np.nan)
+        return values
+
+    def days_elapsed(self) -> Array:
+        """days into the billing period, `daysTotal - daysRemaining`, NaN on the first day"""
+        np = _numpy()
+        elapsed = self.column("daysTotal") - self.column("daysRemaining")
+        return np.where(elapsed > 0, elapsed, np.nan)
+
+    def burn_rate(self, metric: str = "usedMb") -> Array:
+        """how much of a metric each service has used per day so far this billing period"""
+        return self.column(metric) / self.days_elapsed()
+
+    def projected(self, metric: str = "usedMb") -> Array:
+        """where each service will be at the end of the billing period if it keeps using the metric at its `burn_rate`"""
+        return self.column(metric) + self.burn_rate(metric) * self.column("daysRemaining")
+
+    def days_until_exhausted(self, metric: str = "usedMb", remaining: str = "remainingMb") -> Array:
+        """days until each service's quota runs out at its `burn_rate`, inf if it's not using any and NaN without a quota"""
+        np = _numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.column(remaining) / self.burn_rate(metric)
+
+    def running_out(self, metric: str = "usedMb", remaining: str = "remainingMb") -> Array:
+        """the services which will run out of quota before their billing period ends"""
+        return self.service_ids[self.days_until_exhausted(metric, remaining) < self.column("daysRemaining")]
+
+
+class UsageHistory:
+    """One metric's daily values for many services.
+
+    ```
+    @param service_ids: the services, one per row of `values`
+    @param start: date - the day of the first column
+    @param values: a services x days array of float64, NaN for days without a value
+    ```
+    """
+
+    def __init__(self, service_ids: Array, start: date, values: Array) -> None:
+        self.service_ids = service_ids
+        self.start = start
+        self.values = values
+
+    @property
+    def end(self) -> date:
+        """the day of the last column"""
+        return self.start + timedelta(days=self.values.shape[1] - 1)
+
+    @classmethod
+    def from_ordinals(cls, rows: Sequence[Tuple[int, int, float]], start: date, end: date) -> "UsageHistory":
+        """builds the array from (service_id, `date.toordinal()`, value) rows in any order, ignoring days outside start..end"""
+        np = _numpy()
+        if end < start:
+            raise ValueError("end must be on or after start")
+        data = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=3 * len(rows)).reshape(-1, 3)
+        columns = data[:, 1].astype(np.int64) - start.toordinal()
+        days = end.toordinal() - start.toordinal() + 1
+        data = data[(columns >= 0) & (columns < days)]
+        service_ids, row_index = np.unique(data[:, 0].astype(np.int64), return_inverse=True)
+        values = np.full((len(service_ids), days), np.nan)
+        values[row_index, data[:, 1].astype(np.int64) - start.toordinal()] = data[:, 2]
+        return cls(service_ids, start, values)
+
+    @classmethod
+    def from_points(cls, points: Iterable[UsagePoint], start: date, end: date) -> "UsageHistory":
+        """builds the array from (service_id, day, value) points, as returned by `UsageStore.query`"""
+        return cls.from_ordinals([(service_id, day.toordinal(), value) for service_id, day, value in points], start, end)
+
+    @classmethod
+    def from_store(cls, store: UsageStore, metric: str, start: date, end: date, service_ids: Optional[Iterable[int]] = None) -> "UsageHistory":
+        """loads a metric's history from a `UsageStore`"""
+        return cls.from_ordinals(store.query_ordinals(metric, start, end, service_ids), start, end)
+
+    def daily_usage(self) -> Array:
+        """what was used each day, for metrics which count up through the billing period - where the value drops a new
+        period's started, and that day's value is all that's been used. NaN for the first day and the day after a gap."""
+        np = _numpy()
+        increments = np.diff(self.values, axis=1, prepend=np.nan)
+        return np.where(increments < 0, self.values, increments)
+
+    def burn_rate(self, days: Optional[int] = None) -> Array:
+        """each service's average `daily_usage` over the last `days` days, or all of them"""
+        np = _numpy()
+        usage = self.daily_usage()
+        if days is not None:
+            usage = usage[:, -days:]
+        with warnings.catch_warnings():
+            # services without any values get NaN, which is what we want
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            return np.nanmean(usage, axis=1)
+
+    def _months(self) -> Tuple[List[date], List[int]]:
+        """the calendar months the days cover, and the column each one starts at"""
+        months = [self.start.replace(day=1)]
+        starts = [0]
+        month = self.start.replace(day=1)
+        while True:
+            month = (month + timedelta(days=32)).replace(day=1)
+            if month > self.end:
+                return months, starts
+            months.append(month)
+            starts.append(month.toordinal() - self.start.toordinal())
+
+    def monthly(self, how: str = "usage") -> Tuple[List[date], Array]:
+        """Returns the months (as their first day) and a services x months array with one value per calendar month.
+
+        ```
+        @param how: str - `usage` sums `daily_usage()`, `last` is the latest value in the month, `max` is the largest
+        ```
+        """
+        np = _numpy()
+        months, starts = self._months()
+        if how == "usage":
+            usage = self.daily_usage()
+            totals = np.add.reduceat(np.nan_to_num(usage), starts, axis=1)
+            counts = np.add.reduceat(~np.isnan(usage), starts, axis=1)
+            return months, np.where(counts > 0, totals, np.nan)
+        if how == "max":
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category=RuntimeWarning)
+                return months, np.fmax.reduceat(self.values, starts, axis=1)
+        if how == "last":
+            days = self.values.shape[1]
+            # the column of the latest value on or before each day, -1 before the first one
+            latest = np.maximum.accumulate(np.where(np.isnan(self.values), -1, np.arange(days)), axis=1)
+            month_ends = np.array(starts[1:] + [days]) - 1
+            columns = latest[:, month_ends]
+            picked = self.values[np.arange(len(self.service_ids))[:, None], columns]
+            return months, np.where(columns >= np.array(starts), picked, np.nan)
+        raise ValueError(f"how must be one of {MONTHLY_AGGREGATES}")
+
+    def month_over_month(self, how: str = "usage") -> Tuple[List[date], Array]:
+        """the change in `monthly(how)` from each month to the next, labelled with the later month"""
+        np = _numpy()
+        months, values = self.monthly(how)
+        return months[1:], np.diff(values, axis=1)
@@ -0,0 +1,1222 @@
+"""aiohttp support for AussieBB"""
+
+import asyncio
+
+import json
+import os
+from pathlib import Path
+from time import monotonic, time
+import sys
+from typing import Any, AsyncGenerator, AsyncIterator, BinaryIO, Dict, Iterable, List, Mapping, Optional, Type, Union, cast
+
+from pydantic import SecretStr
+
+try:
+    import aiohttp
+    from aiohttp.client import ClientResponse
+except ImportError as error:
+    raise ImportError("The asyncio client needs aiohttp, install it with `pip install aiohttp`") from error
+
+from ..baseclass import BaseClass, ItemT, ModelT
+from ..cache import ResponseCache
+from ..coalesce import Coalescer
+from ..const import default_headers, DOWNLOAD_CHUNK_SIZE, PHONE_TYPES, SERVICE_METHODS, SERVICE_TEST_TIMEOUT
+from ..deadline import deadline, expired, no_deadline, request_deadline, socket_timeouts, time_left
+from ..instrument import RequestHook, RequestTrace, current_trace
+from ..exceptions import (
+    AuthenticationException,
+    DeadlineExceeded,
+    RateLimitException,
+    RecursiveDepth,
+)
+from ..ratelimit import RateLimiter
+from ..jsonbackend import JSONLoads
+from ..pagination import aiter_pages
+from ..retry import RetryPolicy
+from ..tokenrefresh import TOKEN_REFRESH_POLL
+from ..tokenstore import TokenStore
+from ..validation import ValidationPolicy
+from ..transport import TransportConfig, TransportStats
+from .transport import ConnectionTracer, aiohttp_error_reason, build_client_session, phase_trace_config
+
+from ..types import (
+    MFAMethod,
+    ServiceTest,
+    AccountContact,
+    AccountTransaction,
+    BulkServiceResult,
+    DownloadResult,
+    FetchService,
+    OrderData,
+    OrderDetailResponseModel,
+    OrderResponse,
+    VOIPDevice,
+    VOIPDetails,
+    GetServicesResponse,
+)
+
+
+class AussieBB(BaseClass):
+    """aiohttp class for interacting with Aussie Broadband APIs"""
+
+    def __init__(
+        self,
+        username: str,
+        password: "SecretStr | str",
+        session: Optional[aiohttp.client.ClientSession] = None,
+        debug: bool = False,
+        services_cache_time: int = 28800,
+        rate_limiter: Optional[RateLimiter] = None,
+        page_concurrency: int = 1,
+        cache: Optional[ResponseCache] = None,
+        token_store: Optional[TokenStore] = None,
+        transport: Optional[TransportConfig] = None,
+        json_backend: Union[str, JSONLoads] = "json",
+        validation: Union[str, ValidationPolicy] = "full",
+        retry: Optional[RetryPolicy] = None,
+        coalesce: Union[bool, Coalescer] = True,
+        services_stale_time: int = 0,
+        token_refresh_margin: Optional[float] = None,
+        hooks: Optional[Iterable[RequestHook]] = None,
+    ):
+        """Setup function
+
+        ```
+        @param username: str - username for Aussie Broadband account
+        @param password: str - password for Aussie Broadband account
+        @param debug: bool - debug mode
+        @param services_cache_time: int
+            - seconds between caching get_services()
+            - defaults to 8 hours
+        @param rate_limiter: aussiebb.ratelimit.RateLimiter - share one between clients to pool the budget
+        @param page_concurrency: int - how many pages of get_services() to pull at once
+        @param cache: aussiebb.cache.ResponseCache - caches GET responses for the endpoints it has a TTL for
+        @param token_store: aussiebb.tokenstore.TokenStore - keeps the login cookie between processes
+        @param transport: aussiebb.transport.TransportConfig - connection pool settings, ignored if you pass a session
+        @param json_backend: str - parser for untyped responses, see `aussiebb.jsonbackend`
+        @param validation: str - `full`, `sampled` or `trusted`, or an `aussiebb.validation.ValidationPolicy`
+        @param retry: aussiebb.retry.RetryPolicy - which failed requests are sent again, defaults to `RetryPolicy()`
+        @param coalesce: bool - share in-flight GETs between concurrent callers, or an `aussiebb.coalesce.Coalescer` to share between clients
+        @param services_stale_time: int
+            - seconds past services_cache_time that get_services(use_cached=True) keeps returning the cached services
+              while it refreshes them in a background task, after that it waits for the refresh
+            - defaults to 0, which always waits
+        @param token_refresh_margin: float
+            - seconds before the login cookie expires to log in again in a background task, see `aussiebb.tokenrefresh`
+            - defaults to None, which logs in when a request finds the cookie has expired
+        @param hooks: list - called with an `aussiebb.instrument.RequestEvent` timing each request
+        ```
+        """
+        super().__init__(
+            username,
+            password,
+            debug,
+            services_cache_time,
+            rate_limiter=rate_limiter,
+            page_concurrency=page_concurrency,
+            cache=cache,
+            token_store=token_store,
+            json_backend=json_backend,
+            validation=validation,
+            retry=retry,
+            coalesce=coalesce,
+            services_stale_time=services_stale_time,
+            token_refresh_margin=token_refresh_margin,
+            hooks=hooks,
+        )
+
+        self.transport = transport if transport is not None else TransportConfig()
+        # counts what the connection pool does, only hooked up if we build the session
+        self.connection_tracer = ConnectionTracer()
+        # if we weren't given a session, one's built on the first request since it needs a running event loop
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        # only one coroutine logs in at a time, the rest wait for it and use its cookie, see _login_lock
+        self._login_lock_instance: Optional[asyncio.Lock] = None
+        # the task refreshing stale services, see services_stale_time
+        self.services_refresh: Optional["asyncio.Future[None]"] = None
+        # the task logging in again before the cookie expires, see token_refresh_margin
+        self.token_refresher: Optional["asyncio.Future[None]"] = None
+
+    @property
+    def _login_lock(self) -> asyncio.Lock:
+        """the lock logins happen under, made on first use since on Python 3.9 a lock binds to the event loop that's current when it's made"""
+        if self._login_lock_instance is None:
+            self._login_lock_instance = asyncio.Lock()
+        return self._login_lock_instance
+
+    async def login(self, depth: int = 0, force: bool = False) -> bool:
+        """Logs into the account and caches the cookie.
+
+        Does nothing while the current cookie's still valid, unless `force` is set. The sync client's `login` always logs in."""
+        if depth > 2:
+            raise RecursiveDepth("Login recursion depth > 2")
+        self.logger.debug("Logging in...")
+
+        url = self.BASEURL["login"]
+
+        if not force and not self._has_token_expired():
+            return True
+
+        payload = {
+            "username": self.username,
+            "password": self.password.get_secret_value(),
+        }
+        headers = default_headers()
+
+        with self._trace("POST", url, "login", separate=True):
+            async with await self._send(
+                "POST",
+                url=url,
+                headers=dict(headers),
+                json=payload,
+            ) as response:
+                # _send has already retried any 429s as far as the retry policy allows
+                await self.handle_response_fail(response, wait_on_rate_limit=False)
+                jsondata = await response.json()
+                self.logger.debug("Login response status: %s", response.status)
+            self.logger.debug("Dumping login response: %s", json.dumps(jsondata))
+
+            return self._handle_login_response(response.status, jsondata, response.cookies)
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> ClientResponse:
+        """sends a request once the rate limiter allows it, and feeds the response headers back to the limiter
+
+        Connection errors, 429s and 5xx responses are sent again as `self.retry` allows, see `aussiebb.retry`.
+        Timeouts come from the transport config and any deadline the caller's inside, see `aussiebb.deadline`.
+        """
+        if self.session is None:
+            trace_configs = [self.connection_tracer.trace_config()]
+            if self.hooks:
+                trace_configs.append(phase_trace_config())
+            self.session = build_client_session(self.transport, trace_configs)
+            self._owns_session = True
+
+        trace = current_trace() if self.hooks else None
+        until = request_deadline(self.transport.total_timeout)
+        attempt = self.retry.start(method, until)
+        while True:
+            mark = monotonic() if trace is not None else 0.0
+            await self.rate_limiter.acquire_async(max_wait=time_left(until))
+            connect, read = socket_timeouts(self.transport, until)
+            # the total covers reading the body too, so a response that's still arriving at the deadline is cancelled
+            timeout = aiohttp.ClientTimeout(total=time_left(until), connect=connect, sock_read=read)
+            setup = 0.0
+            if trace is not None:
+                mark = trace.add_since("ratelimit", mark)
+                setup = trace.setup_time()
+            try:
+                response = await self.session.request(method, url, timeout=timeout, trace_request_ctx=trace, **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                if expired(until):
+                    raise DeadlineExceeded(f"{method} {url} didn't finish before its deadline") from error
+                delay = attempt.next_delay(aiohttp_error_reason(error))
+                if delay is None:
+                    raise
+                self.logger.debug("%s %s failed (%s), retrying in %.2f seconds", method, url, error, delay)
+                await self._retry_sleep(delay, trace)
+                continue
+            if trace is not None:
+                # the phase tracer has counted the DNS lookup and connecting, if there were any
+                trace.add("ttfb", monotonic() - mark - (trace.setup_time() - setup))
+                trace.status = response.status
+            self.rate_limiter.update(response.headers, response.status)
+            delay = attempt.next_delay(self.retry.status_reason(response.status), self.rate_limiter.blocked_for())
+            if delay is None:
+                return response
+            self.logger.debug("%s %s returned %s, retrying in %.2f seconds", method, url, response.status, delay)
+            response.release()
+            await self._retry_sleep(delay, trace)
+
+    @staticmethod
+    async def _retry_sleep(delay: float, trace: Optional[RequestTrace]) -> None:
+        """waits before sending a request again"""
+        if trace is not None:
+            trace.retries += 1
+            trace.add("retry", delay)
+        await asyncio.sleep(delay)
+
+    def transport_stats(self) -> TransportStats:
+        """connection pool counters, these stay at zero if you passed in your own session"""
+        return self.connection_tracer.stats()
+
+    async def close(self) -> None:
+        """closes the session, if the client built it, and stops any background refresh of the services or the login"""
+        for task in (self.services_refresh, self.token_refresher):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if self.session is not None and self._owns_session:
+            await self.session.close()
+            self.session = None
+
+    async def handle_response_fail(
+        self,
+        response: ClientResponse,
+        wait_on_rate_limit: bool = True,
+    ) -> None:
+        """Handles response status codes. Tries to gracefully handle the rate limiting.
+
+        ```
+        @param response - aiohttp.Response - the full response object
+        @param wait_on_rate_limit - bool - if hitting a rate limit, async wait on the time limit
+        ```
+        """
+        self.logger.debug("Rate limit header: %s", response.headers.get("X-RateLimit-Remaining", -1))
+
+        if response.status == 422:
+            raise AuthenticationException(await response.json())
+        if response.status == 429:
+            jsondata = await response.json()
+            self.logger.debug("Dumping headers: %s", response.headers)
+            self.logger.debug("Dumping response: %s", json.dumps(jsondata, default=str))
+            delay = self._ratelimit_delay(jsondata)
+            # pauses everything sharing the rate limiter, not just this request
+            self.rate_limiter.block_for(delay)
+            if wait_on_rate_limit:
+                self.logger.debug(
+                    "Rate limit on Aussie API calls raised, sleeping for %s seconds.",
+                    delay,
+                )
+                await self.rate_limiter.wait_async()
+            raise RateLimitException(jsondata)
+        if response.status == 500:
+            self.logger.error("AussieBB API returned 500, dumping headers.")
+            self.logger.error(response.headers)
+            self.logger.error("body: %s", await response.content.read())
+        response.raise_for_status()
+
+    async def do_login_check(self, skip_login_check: bool) -> None:
+        """checks if we're skipping the login check and logs in if necessary"""
+        if not skip_login_check:
+            self.logger.debug("skip_login_check false")
+            if self._has_token_expired():
+                async with self._login_lock:
+                    # someone else might have logged in while we were waiting for the lock
+                    if self._has_token_expired():
+                        self.logger.debug("token has expired, logging in...")
+                        self.token_refresh.inline_login()
+                        with self._timed("login"):
+                            await self.login()
+        if self.token_refresh_margin is not None and (self.token_refresher is None or self.token_refresher.done()):
+            self.token_refresher = asyncio.ensure_future(self._refresh_token_until_cancelled())
+
+    async def _relogin(self, rejected_cookie: Optional[str]) -> None:
+        """logs in again after the API rejected a cookie, unless another coroutine already has"""
+        async with self._login_lock:
+            if self._cookie_value() == rejected_cookie:
+                self._forget_token()
+                self.token_refresh.inline_login()
+                with self._timed("login"):
+                    await self.login()
+
+    async def stop_token_refresh(self) -> None:
+        """stops the background token refresher, the next request starts it again"""
+        if self.token_refresher is not None and not self.token_refresher.done():
+            self.token_refresher.cancel()
+            try:
+                await self.token_refresher
+            except asyncio.CancelledError:
+                pass
+
+    async def _refresh_token_until_cancelled(self) -> None:
+        """sleeps until the cookie's due to be replaced and logs in again, until the task's cancelled"""
+        # the task copied the caller's context, but the caller's deadline shouldn't cut the refreshes short
+        with no_deadline():
+            while True:
+                wait = self._token_refresh_wait()
+                if wait > 0:
+                    await asyncio.sleep(min(wait, TOKEN_REFRESH_POLL))
+                    continue
+                await self._refresh_token()
+
+    async def _refresh_token(self) -> None:
+        """logs in again while requests keep using the current cookie, which is kept if the login fails"""
+        start = monotonic()
+        async with self._login_lock:
+            # a request might have logged in while we were waiting for the lock
+            if self._token_refresh_wait() > 0:
+                return
+            previous = (self.myaussie_cookie, self.token_expires, self.token_issued)
+            try:
+                if not await self.login(force=True):
+                    raise AuthenticationException("Login response didn't include a cookie")
+            except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+                raise
+            except BaseException as error:  # pylint: disable=broad-except
+                if self.myaussie_cookie is None:
+                    self.myaussie_cookie, self.token_expires, self.token_issued = previous
+                self.token_refresh.failed(error)
+                self.logger.warning("Refreshing the login in the background failed, still using the current cookie: %s", error)
+                return
+        self.token_refresh.succeeded(monotonic() - start)
+
+    async def request_get(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        depth: int = 0,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> ClientResponse:
+        """Performs a GET request and logs in first if needed."""
+        if depth > 2:
+            raise RecursiveDepth(f"depth: {depth}")
+
+        with self._trace("GET", url) as trace:
+            response = await self._request_get(url, skip_login_check, depth, cookies, params)
+            if trace is not None:
+                trace.bytes = len(await response.read())
+            return response
+
+    async def _request_get(
+        self,
+        url: str,
+        skip_login_check: bool,
+        depth: int,
+        cookies: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> ClientResponse:
+        """sends the GET for `request_get`, logging in again and retrying if the cookie's rejected"""
+        await self.do_login_check(skip_login_check)
+
+        request_cookies = cookies
+        sent_cookie = self._cookie_value()
+        if request_cookies is None:
+            request_cookies = {"myaussie_cookie": self.myaussie_cookie}
+
+        # telling it where we're coming from
+        headers = {
+            "referer": "https://my.aussiebroadband.com.au/",
+            "x-two-factor-auth-capable-client": "false",  # this might need to be a thing...
+        }
+        response = await self._send("GET", url=url, cookies=request_cookies, params=params, headers=headers)
+        if response.status == 401 and not skip_login_check and cookies is None:
+            # the cookie we had (maybe from the token store) has been revoked, log in again and retry
+            self.logger.debug("Got a 401, logging in again")
+            response.release()
+            await self._relogin(sent_cookie)
+            trace = current_trace() if self.hooks else None
+            if trace is not None:
+                trace.retries += 1
+            return await self.request_get(url=url, depth=depth + 1, params=params)
+        try:
+            await self.handle_response_fail(response, wait_on_rate_limit=False)
+            with self._timed("body"):
+                await response.read()
+        except BaseException:
+            # including cancellation, so the connection goes back to the pool
+            response.release()
+            raise
+        return response
+
+    async def request_get_bytes(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        depth: int = 0,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> bytes:
+        """Performs a GET request and logs in first if needed.
+
+        Returns the body of the response, from the cache if the client has one and it's got a fresh copy.
+        Callers asking for the same thing at the same time share one request, see `aussiebb.coalesce`.
+        """
+        with self._trace("GET", url) as trace:
+            body = await self._get_bytes(url, skip_login_check, depth, cookies, params)
+            if trace is not None:
+                trace.bytes = len(body)
+            return body
+
+    async def _get_bytes(
+        self,
+        url: str,
+        skip_login_check: bool,
+        depth: int,
+        cookies: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> bytes:
+        """the body for `request_get_bytes`, from the cache, someone else's request or a request of our own"""
+        endpoint = self.endpoint_name(url)
+        cache_key = self.cache_key(url, params)
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, cache_key)
+            if cached is not None:
+                return cached
+
+        if self.coalescer is None or cookies is not None:
+            return await self._fetch_bytes(url, skip_login_check, depth, cookies, params)
+        # the cache key has everything that makes two GETs the same, so it'll do for coalescing too
+        return await self.coalescer.run_async(cache_key, lambda: self._fetch_bytes(url, skip_login_check, depth, cookies, params))
+
+    async def _fetch_bytes(
+        self,
+        url: str,
+        skip_login_check: bool,
+        depth: int,
+        cookies: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> bytes:
+        """sends the GET for `request_get_bytes` and caches the body"""
+        response = await self.request_get(url, skip_login_check, depth, cookies, params)
+        body = await response.read()
+        if self.cache is not None:
+            self.cache.set(self.endpoint_name(url), self.cache_key(url, params), body)
+        return body
+
+    async def request_get_model(
+        self,
+        url: str,
+        model: Type[ModelT],
+        skip_login_check: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> ModelT:
+        """Performs a GET request and logs in first if needed.
+
+        Returns the response validated into `model`, straight from the body without building a dict first.
+        """
+        with self._trace("GET", url):
+            return self.decode_model(await self.request_get_bytes(url, skip_login_check, params=params), model)
+
+    async def request_get_model_list(
+        self,
+        url: str,
+        item: Type[ItemT],
+        skip_login_check: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> List[ItemT]:
+        """Performs a GET request and logs in first if needed.
+
+        Returns the response as a list of `item`, validated in one go with a cached list `TypeAdapter`.
+        """
+        with self._trace("GET", url):
+            return self.decode_list(await self.request_get_bytes(url, skip_login_check, params=params), item)
+
+    async def request_get_list(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        depth: int = 0,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        """Performs a GET request and logs in first if needed.
+
+        Returns a list from the JSON response.
+        """
+        with self._trace("GET", url):
+            body = await self.request_get_bytes(url, skip_login_check, depth, cookies, params)
+            with self._timed("decode"):
+                result: List[Any] = self.json_loads(body)
+        return result
+
+    async def request_get_json(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        depth: int = 0,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Performs a GET request and logs in first if needed.
+
+        Returns a dict of the JSON response.
+        """
+        with self._trace("GET", url):
+            body = await self.request_get_bytes(url, skip_login_check, depth, cookies, params)
+            with self._timed("decode"):
+                result: Dict[str, Any] = self.json_loads(body)
+        return result
+
+    async def request_post_json(
+        self,
+        url: str,
+        depth: int = 0,
+        skip_login_check: bool = False,
+        **kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Performs a POST request and logs in first if needed.
+
+        Returns a dict of the response data.
+        """
+        if depth > 2:
+            raise RecursiveDepth(f"depth: {depth}")
+
+        with self._trace("POST", url) as trace:
+            await self.do_login_check(skip_login_check)
+
+            cookies = kwargs.get("cookies", {"myaussie_cookie": self.myaussie_cookie})
+            headers: Dict[str, str] = kwargs.get("headers", dict(default_headers()))
+            async with await self._send("POST", url=url, cookies=cookies, headers=headers, json=kwargs.get("data")) as response:
+                await self.handle_response_fail(response, wait_on_rate_limit=False)
+                with self._timed("body"):
+                    body = await response.read()
+            if trace is not None:
+                trace.bytes = len(body)
+            with self._timed("decode"):
+                jsondata: Dict[str, Any] = self.json_loads(body)
+        return jsondata
+
+    async def get_customer_details(self) -> Dict[str, Any]:
+        """Grabs the customer details.
+
+        Returns a dict"""
+
+        url = self.get_url("get_customer_details")
+        result: Dict[str, Any] = await self.request_get_json(
+            url=url,
+            params={"v": "2"},
+        )
+        return result
+
+    @property
+    async def referral_code(self) -> int:
+        """returns the referral code, which is just the customer number"""
+        response = await self.get_customer_details()
+        if "customer_number" not in response:
+            raise ValueError("Couldn't get customer_number from customer_details call.")
+        return int(response["customer_number"])
+
+    async def _check_reload_cached_services(self) -> bool:
+        """If the age of the service data caching is too old, clear it and re-poll.
+
+        For `services_stale_time` seconds after they expire, the cached services are kept and refreshed in a background task instead.
+
+        Returns bool - if it reloaded the cache.
+        """
+        freshness = self._services_freshness()
+        if freshness == "stale":
+            self._refresh_services_in_background()
+        if freshness != "expired":
+            return False
+        await self.get_services(use_cached=False)
+        return True
+
+    def _refresh_services_in_background(self) -> None:
+        """starts a task to refresh the services, unless one's already running"""
+        if self.services_refresh is None or self.services_refresh.done():
+            self.services_refresh = asyncio.ensure_future(self._refresh_services())
+
+    async def _refresh_services(self) -> None:
+        """pulls the services and swaps them in, leaving the cached ones alone if it fails"""
+        try:
+            # the task copied the caller's context, but the caller's deadline shouldn't cut the refresh short
+            with no_deadline():
+                services = await self._fetch_services(1, self.page_concurrency)
+        except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+            raise
+        # the module's exceptions (AuthenticationException, RateLimitException...) are BaseExceptions
+        except BaseException as error:  # pylint: disable=broad-except
+            self.logger.warning("Refreshing services in the background failed, still using the cached ones: %s", error)
+            return
+        self._swap_services(services)
+
+    async def get_services(
+        self,
+        page: int = 1,
+        use_cached: bool = False,
+        servicetypes: Optional[List[str]] = None,
+        drop_types: Optional[List[str]] = None,
+        drop_unknown_types: bool = False,
+        page_concurrency: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns a `list` of `dicts` of services associated with the account.
+
+        If you want a specific kind of service, or services,
+        provide a list of matching strings in servicetypes.
+
+        If you want to use cached data, call it with `use_cached=True`
+
+        If you want to drop service types, then pass a list of strings to drop_types, or if you want to drop things we don't recognize, pass `drop_unknown_types=True`
+
+        If `page_concurrency` (which defaults to the client's setting) is more than 1,
+        it pulls the first page and then requests the rest of them concurrently.
+        """
+        if page_concurrency is None:
+            page_concurrency = self.page_concurrency
+        if use_cached:
+            self.logger.debug("Using cached data for get_services.")
+            await self._check_reload_cached_services()
+            # only reads, a background refresh may have swapped in newer services since we checked
+            return self.filter_services(service_types=servicetypes, drop_types=drop_types, drop_unknown_types=drop_unknown_types)
+
+        self.services = await self._fetch_services(page, page_concurrency)
+        self.services_last_update = int(time())
+        self.services = self.filter_services(
+            service_types=servicetypes,
+            drop_types=drop_types,
+            drop_unknown_types=drop_unknown_types,
+        )
+
+        return self.services
+
+    async def iter_services(self, page: int = 1, prefetch: bool = False) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yields the account's services a page at a time as they arrive, so huge accounts don't need them all in memory.
+
+        Unlike `get_services` this doesn't filter them or update `services`.
+        With `prefetch` the next page is requested while you work through this one.
+        """
+        url = self.get_url("get_services")
+        pages = aiter_pages(lambda page_url, params: self.request_get_model(page_url, GetServicesResponse, params=params), url, {"page": page}, prefetch)
+        async for services_page in pages:
+            for service in services_page.data:
+                yield cast(Dict[str, Any], service)
+
+    async def _fetch_services(self, page: int, page_concurrency: int) -> List[Dict[str, Any]]:
+        """pulls every page of services, concurrently if `page_concurrency` is more than 1"""
+        if page_concurrency > 1:
+            return await self._get_services_concurrently(page, page_concurrency)
+        return [service async for service in self.iter_services(page)]
+
+    async def _get_services_concurrently(self, page: int, page_concurrency: int) -> List[Dict[str, Any]]:
+        """pulls the first page of services, then the rest of them concurrently, keeping them in order"""
+        url = self.get_url("get_services")
+        responsedata = await self.request_get_model(url, GetServicesResponse, params={"page": page})
+        next_url, _, services_list = self.handle_services_response(responsedata, [])
+        if next_url is None:
+            return services_list
+
+        semaphore = asyncio.Semaphore(page_concurrency)
+
+        async def get_page(page_number: int) -> GetServicesResponse:
+            async with semaphore:
+                return await self.request_get_model(url, GetServicesResponse, params={"page": page_number})
+
+        for page_data in await asyncio.gather(*[get_page(page_number) for page_number in self.remaining_pages(responsedata)]):
+            self.handle_services_response(page_data, services_list)
+        return services_list
+
+    async def account_transactions(self) -> Dict[str, AccountTransaction]:
+        """Pulls the data for transactions on your account.
+
+        Returns a dict where the key is the month and year of the transaction.
+
+        Keys: `['current', 'pending', 'available', 'filters', 'typicalEveningSpeeds']`
+
+        Example output:
+
+        ``` json
+        "August 2021": [
+          {
+                "id": 12345,
+                "type": "receipt",
+                "time": "2021-08-06",
+                "description": "Payment #12345",
+                "amountCents": -8400,
+                "runningBalanceCents": 0
+            }
+        ],
+        ```
+        """
+        url = self.get_url("account_transactions")
+        responsedata: Dict[str, AccountTransaction] = await self.request_get_json(url=url)
+        return responsedata
+
+    async def billing_receipt(self, receipt_id: int) -> ClientResponse:
+        """Downloads a receipt
+
+        This returns the bare response object, parsing the result is an exercise for the consumer. It's a PDF file.
+        """
+        return await self.billing_download("receipt", receipt_id)
+
+    async def billing_invoice(self, invoice_id: int) -> ClientResponse:
+        """Downloads an invoice
+
+        This returns the bare response object, parsing the result is an exercise for the consumer. It's a PDF file.
+        """
+        return await self.billing_download("invoice", invoice_id)
+
+    async def billing_download(self, download_type: str, item_id: int) -> ClientResponse:
+        """Downloads a billing file
+
+        This returns the bare response object, parsing the result is an exercise for the consumer. It's a PDF file.
+        """
+        url = self.billing_download_url(download_type, item_id)
+
+        responsedata = await self.request_get(url=url)
+        return responsedata
+
+    async def download_billing_document(
+        self,
+        download_type: str,
+        item_id: int,
+        destination: Union[str, Path, BinaryIO],
+        resume: bool = True,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> DownloadResult:
+        """Streams a billing document to a path or file object, a chunk at a time.
+
+        Downloads to a path go to a `.part` file which is moved into place when it's complete.
+        If there's already a `.part` file and `resume` is True, it asks for the rest of the file with a `Range` header.
+
+        ```
+        @param download_type: str - one of `BILLING_DOWNLOAD_TYPES`
+        @param item_id: int - the transaction ID
+        @param destination: a path, or a file object opened for binary writing
+        @param resume: bool - carry on from a previous partial download
+        @param chunk_size: int - bytes to read at a time
+        ```
+        """
+        url = self.billing_download_url(download_type, item_id)
+        part_path: Optional[Path] = None
+        offset = 0
+        if isinstance(destination, (str, Path)):
+            path = Path(destination)
+            part_path = self.download_part_path(path)
+            if resume and part_path.exists():
+                offset = part_path.stat().st_size
+        else:
+            path = Path(getattr(destination, "name", ""))
+
+        headers = {
+            "referer": "https://my.aussiebroadband.com.au/",
+            "x-two-factor-auth-capable-client": "false",
+        }
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        size = 0
+        with self._trace("GET", url) as trace:
+            await self.do_login_check(False)
+            async with await self._send("GET", url=url, cookies={"myaussie_cookie": self.myaussie_cookie}, headers=headers) as response:
+                if offset and response.status == 416:
+                    # there's nothing after the offset, so the partial file's actually complete
+                    self.logger.debug("Partial download of %s is already complete", path)
+                else:
+                    await self.handle_response_fail(response, wait_on_rate_limit=False)
+                    if response.status != 206:
+                        # the server sent the whole thing, so start again
+                        offset = 0
+                    # includes writing it out, the chunks are read as they're written
+                    with self._timed("body"):
+                        if part_path is None:
+                            async for chunk in response.content.iter_chunked(chunk_size):
+                                size += destination.write(chunk)  # type: ignore[union-attr]
+                        else:
+                            with part_path.open("ab" if offset else "wb") as file_handle:
+                                async for chunk in response.content.iter_chunked(chunk_size):
+                                    size += file_handle.write(chunk)
+            if trace is not None:
+                trace.bytes = size
+        if part_path is not None:
+            os.replace(part_path, path)
+        return DownloadResult(
+            item_id=item_id,
+            download_type=download_type,
+            path=path,
+            status="resumed" if offset else "downloaded",
+            size=size,
+        )
+
+    async def download_transactions(
+        self,
+        directory: Union[str, Path],
+        transactions: Optional[Mapping[str, Any]] = None,
+        concurrency: int = 4,
+        skip_existing: bool = True,
+        resume: bool = True,
+        earliest: Optional[str] = None,
+    ) -> AsyncIterator[DownloadResult]:
+        """Downloads the documents for many transactions concurrently, yielding results as they complete.
+
+        Files are named by `transaction_filename`. A failed download is yielded with its `error` set rather than stopping the rest.
+
+        ```
+        @param directory: where to put the files
+        @param transactions: the output of `account_transactions()`, which is called if it's not provided
+        @param concurrency: int - downloads to run at once
+        @param skip_existing: bool - don't download files which are already there
+        @param resume: bool - carry on from partial downloads
+        @param earliest: str - YYYY-MM-DD, skip transactions before this
+        ```
+
+        Example:
+
+        ```
+        async for item in client.download_transactions("~/invoices"):
+            print(item.path, item.status)
+        ```
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if transactions is None:
+            transactions = await self.account_transactions()
+        directory = Path(directory).expanduser()
+        directory.mkdir(parents=True, exist_ok=True)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def download(transaction: AccountTransaction, path: Path) -> DownloadResult:
+            async with semaphore:
+                try:
+                    return await self.download_billing_document(transaction["type"], transaction["id"], path, resume=resume)
+                except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+                    raise
+                except BaseException as error:  # pylint: disable=broad-except
+                    self.logger.debug("Download of %s failed: %s", path, error)
+                    return DownloadResult(item_id=transaction["id"], download_type=transaction["type"], path=path, status="failed", error=error)
+
+        tasks = []
+        for transaction in self.downloadable_transactions(transactions, earliest):
+            path = directory / self.transaction_filename(transaction)
+            if skip_existing and path.exists():
+                yield DownloadResult(item_id=transaction["id"], download_type=transaction["type"], path=path, status="skipped")
+                continue
+            tasks.append(asyncio.ensure_future(download(transaction, path)))
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # if the caller stops iterating early, don't leave downloads running in the background
+            for task in tasks:
+                task.cancel()
+
+    async def account_paymentplans(self) -> Dict[str, Any]:
+        """Returns a dict of payment plans for an account"""
+        url = self.get_url("account_paymentplans")
+        responsedata = await self.request_get_json(url=url)
+        return responsedata
+
+    async def get_usage(self, service_id: int, use_cached: bool = True) -> Dict[str, Any]:
+        """
+        Returns a dict of usage for a service.
+
+        If it's a telephony service (`type in aussiebb.const.PHONE_TYPES`) it'll pull from the telephony endpoint.
+
+        """
+        if use_cached:
+            # only pulls the services if they've expired, get_services would copy and filter all of them on every call
+            await self._check_reload_cached_services()
+        else:
+            await self.get_services()
+        service = self.service_index.get(service_id)
+        if service is not None:
+            # throw an error if we're trying to parse something we can't
+            self.validate_service_type(service)
+            if service["type"] in PHONE_TYPES:
+                return await self.telephony_usage(service_id)
+        url = self.get_url("get_usage", {"service_id": service_id})
+        responsedata = await self.request_get_json(url=url)
+        return responsedata
+
+    async def get_service_tests(self, service_id: int) -> List[ServiceTest]:
+        """Gets the available tests for a given service ID
+        Returns list of dicts
+
+        Example data:
+
+        ```
+        [{
+            'name' : str(),
+            'description' : str',
+            'link' : str(a url to the test)
+        },]
+        ```
+
+        This has a habit of throwing 400 errors if you query a VOIP service...
+        """
+        if self.debug:
+            print(f"Getting service tests for {service_id}", file=sys.stderr)
+
+        url = self.get_url("get_service_tests", {"service_id": service_id})
+        return await self.request_get_model_list(url, ServiceTest)
+
+    async def get_test_history(self, service_id: int) -> Dict[str, Any]:
+        """Gets the available tests for a given service ID
+
+        Returns a list of dicts with tests which have been run
+        """
+
+        url = self.get_url("get_test_history", {"service_id": service_id})
+        responsedata = await self.request_get_json(url=url)
+        return responsedata
+
+    async def test_line_state(self, service_id: int, timeout: float = SERVICE_TEST_TIMEOUT) -> Dict[str, Any]:
+        """Tests the line state for a given service ID, waiting up to `timeout` seconds for the result"""
+        tests = await self.get_service_tests(service_id)
+        url = self.get_url("test_line_state", {"service_id": service_id})
+
+        self.is_valid_test(url, tests)
+
+        # if self.debug:
+        # print("Testing line state, can take a few seconds...")
+        with deadline(read=timeout):
+            response = await self.request_post_json(url=url)
+        # if self.debug:
+        # print(f"Response: {response}", file=sys.stderr)
+        return response
+
+    async def run_test(self, service_id: int, test_name: str, test_method: str = "post", timeout: float = SERVICE_TEST_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """Run a test, but it checks it's valid first
+
+        There doesn't seem to be a valid way to identify what method you're supposed to use on each test.
+
+        See the README for more analysis
+
+        - 'status' of 'InProgress' use 'AussieBB.get_test_history()' and look for the 'id'
+        - 'status' of 'Completed' means you've got the full response
+
+        `timeout` is how many seconds to wait for the API to answer, since it runs the test first.
+        """
+
+        service_tests = await self.get_service_tests(service_id)
+        test_links = [test for test in service_tests if test.link.endswith(f"/{test_name}")]
+
+        if not test_links:
+            return None
+        if len(test_links) != 1:
+            if self.debug:
+                print(f"Too many tests? {test_links}", file=sys.stderr)
+
+        test_name = test_links[0].name
+        if self.debug:
+            print(f"Running {test_name}", file=sys.stderr)
+        with deadline(read=timeout):
+            if test_method == "get":
+                result = await self.request_get_json(url=test_links[0].link)
+            else:
+                result = await self.request_post_json(url=test_links[0].link)
+        return result
+
+    async def service_plans(self, service_id: int) -> Dict[str, Any]:
+        """
+        Pulls the plan data for a given service. You MUST MFA-verify first.
+
+        Keys: `['current', 'pending', 'available', 'filters', 'typicalEveningSpeeds']`
+
+        """
+
+        url = self.get_url("service_plans", {"service_id": service_id})
+        responsedata = await self.request_get_json(url=url)
+        if self.debug:
+            print(responsedata, file=sys.stderr)
+        return responsedata
+
+    async def service_outages(self, service_id: int) -> Dict[str, Any]:
+        """Pulls outages associated with a service.
+
+        Keys: `['networkEvents', 'aussieOutages', 'currentNbnOutages', 'scheduledNbnOutages', 'resolvedScheduledNbnOutages', 'resolvedNbnOutages']`
+
+        Example data:
+        ```
+        {
+            "networkEvents": [],
+            "aussieOutages": [],
+            "currentNbnOutages": [],
+            "scheduledNbnOutages": [],
+            "resolvedScheduledNbnOutages": [
+                {
+                    "start_date": "2021-08-17T14:00:00Z",
+                    "end_date": "2021-08-17T20:00:00Z",
+                    "duration": "6.0"
+                }
+            ],
+            "resolvedNbnOutages": []
+        }
+        ```
+        """
+        url = self.get_url("service_outages", {"service_id": service_id})
+        responsedata = await self.request_get_json(url=url)
+        if self.debug:
+            print(responsedata, file=sys.stderr)
+        return responsedata
+
+    async def service_boltons(self, service_id: int) -> Dict[str, Any]:
+        """Pulls addons associated with the service.
+
+        Keys: `['id', 'name', 'description', 'costCents', 'additionalNote', 'active']`
+
+        Example data:
+
+        ```
+        [{
+            "id": 4,
+            "name": "Small Change Big Change Donation",
+            "description": "Charitable donation to the Small Change Big Change program, part of the Telco Together Foundation, which helps build resilient young Australians",
+            "costCents": 100,
+            "additionalNote": null,
+            "active": false
+        }]
+        ```
+        """
+        url = self.get_url("service_boltons", {"service_id": service_id})
+        responsedata = await self.request_get_json(url=url)
+        if self.debug:
+            print(responsedata, file=sys.stderr)
+        return responsedata
+
+    async def service_datablocks(self, service_id: int) -> Dict[str, Any]:
+        """Pulls datablocks associated with the service.
+
+        Keys: `['current', 'available']`
+
+        Example data:
+
+        ```
+        {
+            "current": [],
+            "available": []
+        }
+        ```
+        """
+        url = self.get_url("service_datablocks", {"service_id": service_id})
+        responsedata = await self.request_get_json(url=url)
+        return responsedata
+
+    async def telephony_usage(self, service_id: int) -> Dict[str, Any]:
+        """Pulls the telephony usage associated with the service.
+
+        Keys: `['national', 'mobile', 'international', 'sms', 'internet', 'voicemail', 'other', 'daysTotal', 'daysRemaining', 'historical']`
+
+        Example data:
+
+        ```
+        {"national":{"calls":0,"cost":0},"mobile":{"calls":0,"cost":0},
+        "international":{"calls":0,"cost":0},"sms":{"calls":0,"cost":0},
+        "internet":{"kbytes":0,"cost":0},"voicemail":{"calls":0,"cost":0},
+        "other":{"calls":0,"cost":0},"daysTotal":31,"daysRemaining":2,"historical":[]}
+        ```
+        """
+        url = self.get_url("telephony_usage", {"service_id": service_id})
+        responsedata = await self.request_get_json(url=url)
+        return responsedata
+
+    async def support_tickets(self) -> Dict[str, Any]:
+        """Pulls the support tickets associated with the account, returns a list of dicts.
+
+        Dict keys: `['ref', 'create', 'updated', 'service_id', 'type', 'subject', 'status', 'closed', 'awaiting_customer_reply', 'expected_response_minutes']`
+
+        """
+        url = self.get_url("support_tickets")
+        responsedata = await self.request_get_json(url=url)
+        return responsedata
+
+    async def get_appointment(self, ticketid: int) -> Dict[str, Any]:
+        """Pulls the support tickets associated with the account, returns a list of dicts.
+
+        Dict keys: `['ref', 'create', 'updated', 'service_id', 'type', 'subject', 'status', 'closed', 'awaiting_customer_reply', 'expected_response_minutes']`
+        """
+        url = self.get_url("get_appointment", {"ticketid": ticketid})
+        return await self.request_get_json(url=url)
+
+    async def account_contacts(self) -> List[AccountContact]:
+        """Pulls the contacts with the account, returns a list of dicts
+
+        Dict keys: `['id', 'first_name', 'last_name', 'email', 'dob', 'home_phone', 'work_phone', 'mobile_phone', 'work_mobile', 'primary_contact']`
+        """
+        url = self.get_url("account_contacts")
+        return await self.request_get_model_list(url, AccountContact)
+
+    async def get_orders(self) -> Dict[str, Any]:
+        """pulls the orders for an account, from every page - `links` and `meta` are from the last page"""
+        result: Dict[str, Any] = {}
+        orders: List[OrderData] = []
+        async for orders_page in self._order_pages():
+            orders.extend(orders_page.data)
+            result = orders_page.model_dump(warnings=False)
+        result["data"] = orders
+        return result
+
+    def _order_pages(self, prefetch: bool = False) -> AsyncIterator[OrderResponse]:
+        url = self.get_url("get_orders")
+        return aiter_pages(lambda page_url, params: self.request_get_model(page_url, OrderResponse, params=params), url, prefetch=prefetch)
+
+    async def iter_orders(self, prefetch: bool = False) -> AsyncGenerator[OrderData, None]:
+        """Yields the account's orders a page at a time as they arrive, with `prefetch` requesting the next page in the background"""
+        async for orders_page in self._order_pages(prefetch):
+            for order in orders_page.data:
+                yield order
+
+    async def get_order(self, order_id: int) -> Dict[str, Any]:
+        """gets a specific order"""
+        url = self.get_url("get_order", {"order_id": order_id})
+        result = await self.request_get_model(url, OrderDetailResponseModel)
+        return result.model_dump(warnings=False)
+
+    async def get_voip_devices(self, service_id: int) -> List[VOIPDevice]:
+        """gets the devices associatd with a VOIP service"""
+        url = self.get_url("voip_devices", {"service_id": service_id})
+        return await self.request_get_model_list(url, VOIPDevice)
+
+    async def get_voip_service(self, service_id: int) -> VOIPDetails:
+        """gets the details of a VOIP service"""
+        url = self.get_url("voip_service", {"service_id": service_id})
+        return await self.request_get_model(url, VOIPDetails)
+
+    async def get_fetch_service(self, service_id: int) -> FetchService:
+        """gets the details of a Fetch service"""
+        url = self.get_url("fetch_service", {"service_id": service_id})
+        return await self.request_get_model(url, FetchService)
+
+    async def bulk_service_calls(
+        self,
+        service_ids: Iterable[int],
+        methods: Iterable[str] = ("get_usage",),
+        concurrency: int = 10,
+    ) -> AsyncIterator[BulkServiceResult]:
+        """Runs per-service calls for many services concurrently, yielding results as they complete.
+
+        Each call goes through the normal request path, so it's paced by the rate limiter and retried by the retry policy.
+        A failed call is yielded with its `error` set rather than cancelling the rest of the batch.
+
+        ```
+        @param service_ids: the service IDs to query
+        @param methods: names of client methods which take a service_id, see `aussiebb.const.SERVICE_METHODS`
+        @param concurrency: int - maximum number of calls in flight at once
+        ```
+
+        Example:
+
+        ```
+        async for item in client.bulk_service_calls(service_ids, ["get_usage", "service_outages"]):
+            if item.ok:
+                print(item.service_id, item.method, item.result)
+        ```
+        """
+        methods = list(methods)
+        for method in methods:
+            if method not in SERVICE_METHODS:
+                raise ValueError(f"Method {method} can't be used for bulk service calls, must be one of {SERVICE_METHODS}")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        # get_usage looks up the service type, so fill the cache once rather than in every task
+        if "get_usage" in methods:
+            await self.get_services(use_cached=True)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_call(service_id: int, method: str) -> BulkServiceResult:
+            async with semaphore:
+                try:
+                    result = await getattr(self, method)(service_id)
+                except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+                    raise
+                except BaseException as error:  # pylint: disable=broad-except
+                    self.logger.debug("Bulk call %s(%s) failed: %s", method, service_id, error)
+                    return BulkServiceResult(service_id=service_id, method=method, error=error)
+            return BulkServiceResult(service_id=service_id, method=method, result=result)
+
+        tasks = [asyncio.ensure_future(run_call(service_id, method)) for service_id in service_ids for method in methods]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            # if the caller stops iterating early, don't leave calls running in the background
+            for task in tasks:
+                task.cancel()
+
+    async def mfa_send(self, method: MFAMethod) -> None:
+        """sends an MFA code to the user"""
+        url = self.get_url("mfa_send")
+        print(method.model_dump_json())
+        await self.request_post_json(url=url, data=method.model_dump())
+
+    async def mfa_verify(self, token: str) -> None:
+        """got the token from send_mfa? send it back to validate it"""
+        url = self.get_url("mfa_verify")
+        await self.request_post_json(url=url, data={"token": token})
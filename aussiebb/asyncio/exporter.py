@@ -0,0 +1,220 @@
+"""serves usage and outage metrics for every service on an account in the OpenMetrics format
+
+```
+client = AussieBB(username, password)
+async with UsageExporter(client, usage_interval=900, outages_interval=3600) as exporter:
+    await exporter.serve(port=9877)
+    await asyncio.Event().wait()
+```
+
+Scrapes never call the API. A background task pulls `get_usage` (which is `telephony_usage` for phone services) every
+`usage_interval` seconds and `service_outages` every `outages_interval`, `concurrency` calls at a time through
+`bulk_service_calls`, then renders the metrics once, so every scrape gets the same pre-rendered body however many
+services there are. See `aussiebb.openmetrics` for the metrics.
+
+The refreshes share the client's rate limiter, so they're paced along with anything else the client's doing. They're
+also spaced out so a refresh uses at most `budget_share` of the account's rate limit, once the limiter's learnt it, and
+wait out any 429 back-off. If a call fails, the service keeps its last value, and `aussiebb_exporter_failed_calls` says so.
+"""
+
+import asyncio
+from time import monotonic, time
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiohttp import web
+
+from ..const import USAGE_ENABLED_SERVICE_TYPES
+from ..deadline import no_deadline
+from ..openmetrics import CONTENT_TYPE, MetricFamily, render, usage_families
+from .client import AussieBB
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict  # pylint: disable=ungrouped-imports
+
+
+class ExporterStats(TypedDict):
+    """how the exporter's refreshes have gone"""
+
+    refreshes: int
+    failed_refreshes: int
+    failed_calls: int
+    services: int
+    last_refresh: Optional[float]
+    last_duration: Optional[float]
+
+
+class UsageExporter:
+    """Keeps a snapshot of every service's usage and outages up to date, and serves it to scrapers.
+
+    ```
+    @param client: aussiebb.asyncio.AussieBB - the account to export
+    @param usage_interval: float - seconds between pulling usage
+    @param outages_interval: float - seconds between pulling outages, which change less often
+    @param concurrency: int - calls in flight at once during a refresh
+    @param budget_share: float - the most of the account's rate limit a refresh is allowed to use, between 0 and 1
+    @param service_types: the service types to export, defaults to the ones with usage
+    ```
+    """
+
+    def __init__(
+        self,
+        client: AussieBB,
+        usage_interval: float = 900.0,
+        outages_interval: float = 3600.0,
+        concurrency: int = 4,
+        budget_share: float = 0.5,
+        service_types: Iterable[str] = USAGE_ENABLED_SERVICE_TYPES,
+    ) -> None:
+        if not 0 < budget_share <= 1:
+            raise ValueError("budget_share must be more than 0 and at most 1")
+        self.client = client
+        self.usage_interval = usage_interval
+        self.outages_interval = outages_interval
+        self.concurrency = concurrency
+        self.budget_share = budget_share
+        self.service_types = list(service_types)
+
+        self.services: Dict[int, Dict[str, Any]] = {}
+        self.usage: Dict[int, Dict[str, Any]] = {}
+        self.outages: Dict[int, Dict[str, Any]] = {}
+        self._outages_due = 0.0
+
+        self.refreshes = 0
+        self.failed_refreshes = 0
+        self.failed_calls = 0
+        self.last_refresh: Optional[float] = None
+        self.last_duration: Optional[float] = None
+
+        # the task refreshing the snapshot, see start()
+        self.refresher: Optional["asyncio.Future[None]"] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.body = self.render()
+
+    async def __aenter__(self) -> "UsageExporter":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.stop()
+
+    async def refresh(self, outages: bool = True) -> None:
+        """pulls usage (and outages, if `outages` is set) for every service and re-renders the metrics"""
+        started = monotonic()
+        await self.client.get_services(use_cached=True)
+        services = {service["service_id"]: service for service in self.client.filter_services(service_types=self.service_types)}
+        methods = ["get_usage", "service_outages"] if outages else ["get_usage"]
+
+        usage = {service_id: data for service_id, data in self.usage.items() if service_id in services}
+        outage_data = {service_id: data for service_id, data in self.outages.items() if service_id in services}
+        failed = 0
+        async for result in self.client.bulk_service_calls(list(services), methods, self.concurrency):
+            if not result.ok:
+                # the service keeps its last value
+                self.client.logger.debug("Exporter call %s(%s) failed: %s", result.method, result.service_id, result.error)
+                failed += 1
+            elif result.method == "get_usage":
+                usage[result.service_id] = result.result
+            else:
+                outage_data[result.service_id] = result.result
+
+        self.services, self.usage, self.outages = services, usage, outage_data
+        if outages:
+            self._outages_due = monotonic() + self.outages_interval
+        self.refreshes += 1
+        self.failed_calls = failed
+        self.last_refresh = time()
+        self.last_duration = monotonic() - started
+        self.body = self.render()
+
+    def next_refresh_in(self) -> float:
+        """seconds until the next refresh, stretched to keep within `budget_share` of the rate limit and past any back-off"""
+        wait = self.usage_interval
+        limiter = self.client.rate_limiter
+        if limiter.limit is not None and self.services:
+            # outages are amortised over the usage refreshes
+            calls = len(self.services) * (1 + self.usage_interval / self.outages_interval)
+            wait = max(wait, calls * limiter.window / (limiter.capacity * self.budget_share))
+        return max(wait, limiter.blocked_for())
+
+    async def _refresh_forever(self) -> None:
+        """refreshes the snapshot until the task's cancelled, keeping the last one if a refresh fails"""
+        with no_deadline():
+            while True:
+                try:
+                    await self.refresh(outages=monotonic() >= self._outages_due)
+                except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+                    raise
+                # the module's exceptions (RateLimitException, AuthenticationException...) are BaseExceptions
+                except BaseException as error:  # pylint: disable=broad-except
+                    self.failed_refreshes += 1
+                    self.client.logger.warning("Refreshing the exporter's metrics failed, still serving the last ones: %s", error)
+                    self.body = self.render()
+                await asyncio.sleep(self.next_refresh_in())
+
+    async def start(self) -> None:
+        """starts refreshing in the background, the first refresh starts straight away"""
+        if self.refresher is None or self.refresher.done():
+            self.refresher = asyncio.ensure_future(self._refresh_forever())
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9877, path: str = "/metrics") -> web.AppRunner:
+        """serves the metrics over HTTP until `stop()`, `start()` (or `async with`) keeps them up to date"""
+        app = web.Application()
+        app.router.add_get(path, self.handle_scrape)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return self._runner
+
+    async def stop(self) -> None:
+        """stops serving and refreshing"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self.refresher is not None and not self.refresher.done():
+            self.refresher.cancel()
+            try:
+                await self.refresher
+            except asyncio.CancelledError:
+                pass
+
+    async def handle_scrape(self, request: web.Request) -> web.Response:
+        """answers a scrape with the last rendered metrics"""
+        return web.Response(body=self.body, headers={"Content-Type": CONTENT_TYPE})
+
+    def stats(self) -> ExporterStats:
+        """the refresh counters"""
+        return {
+            "refreshes": self.refreshes,
+            "failed_refreshes": self.failed_refreshes,
+            "failed_calls": self.failed_calls,
+            "services": len(self.services),
+            "last_refresh": self.last_refresh,
+            "last_duration": self.last_duration,
+        }
+
+    def render(self) -> bytes:
+        """the metrics for the current snapshot, plus the exporter's own"""
+        refreshes = MetricFamily("aussiebb_exporter_refreshes", "counter", "Refreshes of the usage snapshot.")
+        refreshes.add(self.refreshes)
+        failed_refreshes = MetricFamily("aussiebb_exporter_failed_refreshes", "counter", "Refreshes which failed outright.")
+        failed_refreshes.add(self.failed_refreshes)
+        failed_calls = MetricFamily("aussiebb_exporter_failed_calls", "gauge", "Calls which failed in the last refresh, their services show older values.")
+        failed_calls.add(self.failed_calls)
+        services = MetricFamily("aussiebb_exporter_services", "gauge", "Services being exported.")
+        services.add(len(self.services))
+        families: List[MetricFamily] = [refreshes, failed_refreshes, failed_calls, services]
+        if self.last_refresh is not None and self.last_duration is not None:
+            last_refresh = MetricFamily("aussiebb_exporter_last_refresh_timestamp_seconds", "gauge", "When the snapshot was last refreshed.", "seconds")
+            last_refresh.add(self.last_refresh)
+            duration = MetricFamily("aussiebb_exporter_refresh_duration_seconds", "gauge", "How long the last refresh took.", "seconds")
+            duration.add(self.last_duration)
+            families.extend([last_refresh, duration])
+        remaining = self.client.rate_limiter.stats()["remaining"]
+        if remaining is not None:
+            ratelimit = MetricFamily("aussiebb_exporter_ratelimit_remaining", "gauge", "Requests left in the account's rate limit window, at the last refresh.")
+            ratelimit.add(remaining)
+            families.append(ratelimit)
+        return render(usage_families(self.services, self.usage, self.outages) + families).encode("utf-8")
@@ -0,0 +1,189 @@
+"""runs many accounts from one process, sharing a connection pool between them"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import aiohttp
+
+from ..const import SERVICE_METHODS
+from ..transport import TransportConfig, TransportStats
+from ..types import AccountResult, AussieBBConfigFile, BulkServiceResult, ConfigUser
+from ..utils import round_robin
+from .client import AussieBB
+from .transport import ConnectionTracer, build_client_session, build_connector, phase_trace_config
+
+Operation = Union[str, Callable[[AussieBB], Awaitable[Any]]]
+
+
+class AussieBBPool:
+    """A set of asyncio clients, one per account, which share one connection pool.
+
+    Each account gets its own `ClientSession` (so cookies don't leak between accounts), login state and rate limiter,
+    but the sessions share a `TCPConnector`. Calls across accounts are scheduled round-robin, so one account with
+    lots of services doesn't hold everyone else up.
+
+    ```
+    @param accounts: the accounts to log in as, `AussieBBConfigFile.users` is the usual source
+    @param transport: aussiebb.transport.TransportConfig - sizes the shared connection pool
+    @param concurrency: int - calls in flight at once, across every account
+    @param per_account_concurrency: int - calls in flight at once for any one account
+    @param client_kwargs: passed to each `AussieBB`, eg. `cache` or `token_store`
+    ```
+
+    Example:
+
+    ```
+    async with AussieBBPool.from_config(config) as pool:
+        results = await pool.run("get_customer_details")
+    ```
+    """
+
+    def __init__(
+        self,
+        accounts: Iterable[ConfigUser],
+        transport: Optional[TransportConfig] = None,
+        concurrency: int = 20,
+        per_account_concurrency: int = 4,
+        **client_kwargs: Any,
+    ):
+        if concurrency < 1 or per_account_concurrency < 1:
+            raise ValueError("concurrency and per_account_concurrency must be at least 1")
+        self.transport = transport if transport is not None else TransportConfig()
+        self.concurrency = concurrency
+        self.per_account_concurrency = per_account_concurrency
+        self.connection_tracer = ConnectionTracer()
+        self.connector: Optional[aiohttp.TCPConnector] = None
+
+        self.clients: Dict[str, AussieBB] = {}
+        for account in accounts:
+            if account.username in self.clients:
+                raise ValueError(f"Account {account.username} is in the pool more than once")
+            client = AussieBB(account.username, account.password, transport=self.transport, **client_kwargs)
+            client.connection_tracer = self.connection_tracer
+            self.clients[account.username] = client
+
+        # made on first use, see _limits
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._account_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def from_config(cls, config: AussieBBConfigFile, **kwargs: Any) -> "AussieBBPool":
+        """builds a pool from the users in a config file"""
+        return cls(config.users, **kwargs)
+
+    async def __aenter__(self) -> "AussieBBPool":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    def _connect(self) -> None:
+        """builds the shared connector and the sessions using it, once there's an event loop running"""
+        if self.connector is None:
+            self.connector = build_connector(self.transport)
+        for client in self.clients.values():
+            if client.session is None:
+                trace_configs = [self.connection_tracer.trace_config()]
+                if client.hooks:
+                    trace_configs.append(phase_trace_config())
+                client.session = build_client_session(self.transport, trace_configs, self.connector)
+
+    async def close(self) -> None:
+        """closes every account's session, then the shared connector"""
+        for client in self.clients.values():
+            await client.close()
+        if self.connector is not None:
+            await self.connector.close()
+            self.connector = None
+
+    def transport_stats(self) -> TransportStats:
+        """connection pool counters, across every account"""
+        return self.connection_tracer.stats()
+
+    def _usernames(self, usernames: Optional[Iterable[str]]) -> List[str]:
+        if usernames is None:
+            return list(self.clients)
+        usernames = list(usernames)
+        for username in usernames:
+            if username not in self.clients:
+                raise ValueError(f"Account {username} isn't in the pool")
+        return usernames
+
+    def _limits(self, username: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        """the account's semaphore and the pool's, made on first use since on Python 3.9 they bind to the event loop that's current when they're made"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._account_semaphores = {name: asyncio.Semaphore(self.per_account_concurrency) for name in self.clients}
+        return self._account_semaphores[username], self._semaphore
+
+    async def _call(self, username: str, operation: Operation, *args: Any) -> Any:
+        """runs one call for an account, within the pool's limits"""
+        client = self.clients[username]
+        account_limit, pool_limit = self._limits(username)
+        # take the account's slot first, so calls waiting on a busy account don't hold up a pool slot
+        async with account_limit, pool_limit:
+            if isinstance(operation, str):
+                return await getattr(client, operation)(*args)
+            return await operation(client, *args)
+
+    async def run(self, operation: Operation, usernames: Optional[Iterable[str]] = None) -> Dict[str, AccountResult]:
+        """Runs a call for every account (or those in `usernames`) concurrently.
+
+        `operation` is the name of a client method which takes no arguments, or an async function which takes the client.
+        A failed call is returned with its `error` set rather than cancelling the rest.
+        """
+        selected = self._usernames(usernames)
+        self._connect()
+
+        async def run_account(username: str) -> AccountResult:
+            try:
+                result = await self._call(username, operation)
+            except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+                raise
+            except BaseException as error:  # pylint: disable=broad-except
+                self.clients[username].logger.debug("Pool call for %s failed: %s", username, error)
+                return AccountResult(username=username, error=error)
+            return AccountResult(username=username, result=result)
+
+        results = await asyncio.gather(*[run_account(username) for username in selected])
+        return {result.username: result for result in results}
+
+    async def run_service_calls(
+        self,
+        methods: Iterable[str] = ("get_usage",),
+        usernames: Optional[Iterable[str]] = None,
+    ) -> Dict[str, AccountResult]:
+        """Runs per-service calls for every service on every account, interleaving the accounts.
+
+        Each account's `result` is a list of `BulkServiceResult`, its `error` is set if its services couldn't be listed.
+        """
+        methods = list(methods)
+        for method in methods:
+            if method not in SERVICE_METHODS:
+                raise ValueError(f"Method {method} can't be used for bulk service calls, must be one of {SERVICE_METHODS}")
+
+        results = await self.run(lambda client: client.get_services(use_cached=True), usernames)
+
+        calls: Dict[str, List[Tuple[int, str]]] = {}
+        for username, result in results.items():
+            if result.ok:
+                calls[username] = [(service["service_id"], method) for service in result.result or [] for method in methods]
+
+        async def run_call(username: str, service_id: int, method: str) -> Tuple[str, BulkServiceResult]:
+            try:
+                value = await self._call(username, method, service_id)
+            except (asyncio.CancelledError, KeyboardInterrupt, SystemExit):
+                raise
+            except BaseException as error:  # pylint: disable=broad-except
+                return username, BulkServiceResult(service_id=service_id, method=method, error=error)
+            return username, BulkServiceResult(service_id=service_id, method=method, result=value)
+
+        # one call from each account in turn, the semaphores wake waiters in order so this is the order they run in
+        interleaved = round_robin(calls)
+        service_results: Dict[str, List[BulkServiceResult]] = {username: [] for username in calls}
+        for username, service_result in await asyncio.gather(*[run_call(username, *call) for username, call in interleaved]):
+            service_results[username].append(service_result)
+
+        for username, account_results in service_results.items():
+            results[username] = AccountResult(username=username, result=account_results)
+        return results
@@ -0,0 +1,123 @@
+"""builds the aiohttp session for the asyncio client, counts what its connection pool does and times connection setup"""
+
+import asyncio
+from time import monotonic
+from types import SimpleNamespace
+from typing import Any, List, Optional
+
+import aiohttp
+
+from ..instrument import RequestTrace
+from ..transport import TransportConfig, TransportStats
+
+
+class ConnectionTracer:
+    """Counts connections being opened, reused and waited for, through an `aiohttp.TraceConfig`."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.waiting = 0
+        self.waited = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """returns a trace config which feeds this tracer, add it to a `ClientSession`"""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_connection_queued_start.append(self._on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_connection_queued_end)
+        return trace_config
+
+    async def _on_request_start(self, session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.connections_opened += 1
+
+    async def _on_connection_reuseconn(self, session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.connections_reused += 1
+
+    async def _on_connection_queued_start(self, session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.waiting += 1
+        self.waited += 1
+
+    async def _on_connection_queued_end(self, session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.waiting -= 1
+
+    def stats(self) -> TransportStats:
+        """returns the counters"""
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused,
+            "waiting": self.waiting,
+            "waited": self.waited,
+        }
+
+
+def phase_trace_config() -> aiohttp.TraceConfig:
+    """a trace config which adds DNS lookups and new connections to the `RequestTrace` passed as `trace_request_ctx`"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(_on_dns_resolvehost_start)
+    trace_config.on_dns_resolvehost_end.append(_on_dns_resolvehost_end)
+    trace_config.on_connection_create_start.append(_on_connection_create_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    return trace_config
+
+
+async def _on_dns_resolvehost_start(session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+    context.dns_start = monotonic()
+
+
+async def _on_dns_resolvehost_end(session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+    if isinstance(context.trace_request_ctx, RequestTrace):
+        context.dns = monotonic() - context.dns_start
+        context.trace_request_ctx.add("dns", context.dns)
+
+
+async def _on_connection_create_start(session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+    context.connect_start = monotonic()
+    context.dns = 0.0
+
+
+async def _on_connection_create_end(session: aiohttp.ClientSession, context: SimpleNamespace, params: Any) -> None:
+    if isinstance(context.trace_request_ctx, RequestTrace):
+        # the DNS lookup happens while the connection's being created, it's counted on its own
+        context.trace_request_ctx.add("connect", monotonic() - context.connect_start - context.dns)
+
+
+def build_connector(config: TransportConfig) -> aiohttp.TCPConnector:
+    """builds a `TCPConnector` sized from the config, must be called with a running event loop"""
+    return aiohttp.TCPConnector(
+        limit=config.limit,
+        limit_per_host=config.limit_per_host,
+        keepalive_timeout=config.keepalive_timeout,
+        ttl_dns_cache=config.ttl_dns_cache,
+        use_dns_cache=config.use_dns_cache,
+    )
+
+
+def build_client_session(
+    config: TransportConfig,
+    trace_configs: Optional[List[aiohttp.TraceConfig]] = None,
+    connector: Optional[aiohttp.TCPConnector] = None,
+) -> aiohttp.ClientSession:
+    """Builds an `aiohttp.ClientSession`, must be called with a running event loop.
+
+    If you pass a connector the session shares it and leaves it open when it's closed, otherwise it gets its own sized from the config.
+    """
+    if connector is not None:
+        return aiohttp.ClientSession(connector=connector, connector_owner=False, trace_configs=trace_configs)
+    return aiohttp.ClientSession(connector=build_connector(config), trace_configs=trace_configs)
+
+
+def aiohttp_error_reason(error: BaseException) -> Optional[str]:
+    """what kind of failure an aiohttp exception is, for `aussiebb.retry`, None if it's not worth retrying"""
+    if isinstance(error, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)):
+        return "connect"
+    if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return "connection"
+    return None
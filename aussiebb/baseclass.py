@@ -1,23 +1,38 @@
 """base class def"""
 
+from contextlib import nullcontext
+from functools import lru_cache
 from http.cookies import SimpleCookie, Morsel
 import logging
+from pathlib import Path
+import re
 from time import time
-from typing import Any, Dict, List, Optional, Tuple, Union
-from pydantic import SecretStr
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING, Any, ContextManager, Dict, Iterable, List, Mapping, Optional, Pattern, Tuple, Type, TypeVar, Union, cast
+from pydantic import BaseModel, SecretStr
 
-from requests.cookies import RequestsCookieJar
+if TYPE_CHECKING:
+    from requests.cookies import RequestsCookieJar
 
 from .const import (
     API_ENDPOINTS,
     BASEURL,
-    HARDWARE_TYPES,
-    PHONE_TYPES,
-    NBN_TYPES,
-    FETCH_TYPES,
-    USAGE_ENABLED_SERVICE_TYPES,
+    BILLING_DOWNLOAD_TYPES,
+    DEFAULT_BACKOFF_DELAY,
+    KNOWN_SERVICE_TYPES,
+    SUPPORTED_SERVICE_TYPES,
 )
-from .types import GetServicesResponse, ServiceTest
+from .cache import ResponseCache
+from .coalesce import Coalescer
+from .instrument import RequestHook, RequestTrace, timed, trace_request
+from .jsonbackend import JSONLoads, get_json_loads
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .serviceindex import ServiceIndex
+from .tokenrefresh import TOKEN_REFRESH_POLL, TokenRefreshMetrics, refresh_due
+from .tokenstore import TokenStore
+from .types import AccountTransaction, GetServicesResponse, ServiceTest
+from .validation import ValidationPolicy
 from .exceptions import (
     AuthenticationException,
     InvalidTestForService,
@@ -26,6 +41,16 @@ from .exceptions import (
 )
 
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+ItemT = TypeVar("ItemT")
+
+
+@lru_cache(maxsize=None)
+def endpoint_patterns() -> List[Tuple[str, Pattern[str]]]:
+    """matches the path of a URL back to the name of the endpoint in API_ENDPOINTS, compiled the first time they're needed"""
+    return [(name, re.compile("^" + re.sub(r"\\\{[^}]+\\\}", "[^/]+", re.escape(endpoint.split("?")[0])) + "$")) for name, endpoint in API_ENDPOINTS.items()]
+
+
 class BaseClass:
     """Base class for aussiebb API clients"""
 
@@ -39,16 +64,32 @@ class BaseClass:
         debug: bool = False,
         services_cache_time: int = 28800,
         logger: logging.Logger = logging.getLogger(),
+        rate_limiter: Optional[RateLimiter] = None,
+        page_concurrency: int = 1,
+        cache: Optional[ResponseCache] = None,
+        token_store: Optional[TokenStore] = None,
+        json_backend: Union[str, JSONLoads] = "json",
+        validation: Union[str, ValidationPolicy] = "full",
+        retry: Optional[RetryPolicy] = None,
+        coalesce: Union[bool, Coalescer] = True,
+        services_stale_time: int = 0,
+        token_refresh_margin: Optional[float] = None,
+        hooks: Optional[Iterable[RequestHook]] = None,
     ):
         if not (username and password):
             raise AuthenticationException("You need to supply both username and password")
 
-        self.myaussie_cookie: Optional[Union[Morsel[Any], SimpleCookie]] = None
+        self.myaussie_cookie: Optional[Union[Morsel[Any], SimpleCookie, str]] = None
         self.token_expires = -1
+        # when the current cookie was issued, or loaded from the token store
+        self.token_issued = -1.0
 
         self.services_cache_time = services_cache_time  # defaults to 8 hours
         self.services_last_update = -1
-        self.services: List[Dict[str, Any]] = []
+        # how long past services_cache_time the cached services are still served while they're refreshed in the background
+        self.services_stale_time = services_stale_time
+        # the services and their index, always replaced together as one tuple so readers never see one without the other
+        self._services_snapshot: Tuple[List[Dict[str, Any]], ServiceIndex] = ([], ServiceIndex())
         self.username = username
         if isinstance(password, SecretStr):
             self.password = password
@@ -56,6 +97,63 @@ class BaseClass:
             self.password = SecretStr(password)
         self.logger = logger
         self.debug = debug
+        # can be shared between clients to pool the rate limit budget for an account
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        # how many pages of get_services to pull at once, 1 walks them one at a time
+        self.page_concurrency = page_concurrency
+        # caches GET responses, see aussiebb.cache
+        self.cache = cache
+        # keeps the login cookie between processes, see aussiebb.tokenstore
+        self.token_store = token_store
+        self._load_token()
+        # parses untyped responses, see aussiebb.jsonbackend
+        self.json_loads = get_json_loads(json_backend)
+        # how much of each typed response is validated, see aussiebb.validation
+        self.validation = ValidationPolicy.from_setting(validation)
+        # which failed requests are sent again, see aussiebb.retry
+        self.retry = retry if retry is not None else RetryPolicy()
+        # shares in-flight GETs between concurrent callers, see aussiebb.coalesce
+        self.coalescer: Optional[Coalescer] = None
+        if isinstance(coalesce, Coalescer):
+            self.coalescer = coalesce
+        elif coalesce:
+            self.coalescer = Coalescer()
+        # how long before the cookie expires to log in again in the background, None waits for it to expire, see aussiebb.tokenrefresh
+        self.token_refresh_margin = token_refresh_margin
+        self.token_refresh = TokenRefreshMetrics()
+        # called with a timing breakdown of each request, see aussiebb.instrument
+        self.hooks: List[RequestHook] = list(hooks) if hooks is not None else []
+
+    @property
+    def services(self) -> List[Dict[str, Any]]:
+        """the services from the last `get_services` call"""
+        return self._services_snapshot[0]
+
+    @services.setter
+    def services(self, services: List[Dict[str, Any]]) -> None:
+        """setting the services swaps in an updated copy of `service_index` along with them"""
+        self._services_snapshot = (services, self._services_snapshot[1].updated(services))
+
+    @property
+    def service_index(self) -> ServiceIndex:
+        """the index of `services`, see aussiebb.serviceindex"""
+        return self._services_snapshot[1]
+
+    def _swap_services(self, services: List[Dict[str, Any]]) -> None:
+        """replaces the services with a fresh list, swapping the list and its new index in with one assignment"""
+        self._services_snapshot = (services, ServiceIndex(services))
+        self.services_last_update = int(time())
+
+    def _services_freshness(self) -> str:
+        """`fresh`, `stale` (old, but can be served while it's refreshed) or `expired` (has to be refreshed before it's used)"""
+        if not self.services:
+            return "expired"
+        age = time() - self.services_last_update
+        if age < self.services_cache_time:
+            return "fresh"
+        if age < self.services_cache_time + self.services_stale_time:
+            return "stale"
+        return "expired"
 
     def __str__(self) -> str:
         """string repr of account - returns username"""
@@ -72,17 +170,98 @@ class BaseClass:
 
         return f"{self.BASEURL.get('api')}{api_endpoint}"
 
+    @staticmethod
+    def endpoint_name(url: str) -> Optional[str]:
+        """works out which `API_ENDPOINTS` entry a URL is for, or None if it doesn't match any"""
+        path = urlsplit(url).path
+        for name, pattern in endpoint_patterns():
+            if pattern.match(path):
+                return name
+        return None
+
+    def cache_key(self, url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """key for the response cache, responses are only shared within an account"""
+        if params:
+            return f"{self.username}|{url}|{sorted((str(key), str(value)) for key, value in params.items())}"
+        return f"{self.username}|{url}"
+
+    def invalidate_cache(self, endpoint: Optional[str] = None) -> None:
+        """drops cached responses for an endpoint (by its `API_ENDPOINTS` name), or all of them"""
+        if self.cache is not None:
+            self.cache.invalidate(endpoint)
+
+    def _trace(self, method: str, url: str, endpoint: Optional[str] = None, separate: bool = False) -> ContextManager[Optional[RequestTrace]]:
+        """times a call for the hooks, see `aussiebb.instrument`, and does nothing if there aren't any"""
+        if not self.hooks:
+            return nullcontext()
+        return trace_request(self.hooks, method, url, endpoint if endpoint is not None else self.endpoint_name(url), self.logger, separate)
+
+    def _timed(self, phase: str) -> ContextManager[None]:
+        """adds the time spent in the block to a phase of the call being traced, if there are hooks"""
+        if not self.hooks:
+            return nullcontext()
+        return timed(phase)
+
+    def decode_model(self, body: bytes, model: Type[ModelT]) -> ModelT:
+        """turns a response body into a model, validated straight from the bytes unless the validation policy says otherwise"""
+        with self._timed("validate"):
+            return self.validation.decode(body, model, self.json_loads)
+
+    def decode_list(self, body: bytes, item: Type[ItemT]) -> List[ItemT]:
+        """turns a list response body into a list of `item`, validated in one call unless the validation policy says otherwise"""
+        with self._timed("validate"):
+            return self.validation.decode_list(body, item, self.json_loads)
+
+    def _cookie_value(self) -> Optional[str]:
+        """the login cookie as a plain string, whichever client set it"""
+        if self.myaussie_cookie is None:
+            return None
+        if isinstance(self.myaussie_cookie, Morsel):
+            return str(self.myaussie_cookie.value)
+        if isinstance(self.myaussie_cookie, SimpleCookie):
+            morsel = self.myaussie_cookie.get("myaussie_cookie")
+            return None if morsel is None else str(morsel.value)
+        return self.myaussie_cookie
+
+    def _load_token(self) -> bool:
+        """picks up a still-valid login cookie from the token store, returns True if it found one"""
+        if self.token_store is None:
+            return False
+        token = self.token_store.load(self.username)
+        if token is None:
+            return False
+        self.myaussie_cookie = token["cookie"]
+        self.token_expires = int(token["expires"])
+        self.token_issued = time()
+        self.logger.debug("Loaded login cookie from token store, expires %s", self.token_expires)
+        return True
+
+    def _forget_token(self) -> None:
+        """drops the login cookie, here and in the token store, so the next request logs in again"""
+        self.token_expires = -1
+        self.myaussie_cookie = None
+        if self.token_store is not None:
+            self.token_store.clear(self.username)
+
     def _has_token_expired(self) -> bool:
         """Returns bool of if the token has expired"""
         if time() > self.token_expires:
             return True
         return False
 
+    def _token_refresh_wait(self) -> float:
+        """seconds the background refresher should sleep before logging in again, 0 if it's due now"""
+        if self.token_refresh_margin is None or self.myaussie_cookie is None or self._has_token_expired():
+            # nothing to refresh, the next request logs in and the refresher picks up its cookie
+            return TOKEN_REFRESH_POLL
+        wait = refresh_due(self.token_issued, self.token_expires, self.token_refresh_margin) - time()
+        return max(wait, self.token_refresh.backoff(), 0.0)
+
     def _handle_login_response(
         self,
         status_code: int,
         jsondata: Dict[str, Any],
-        cookies: Union[RequestsCookieJar, SimpleCookie],
+        cookies: Union["RequestsCookieJar", SimpleCookie],
     ) -> bool:
         """Handles the login response.
 
@@ -107,18 +286,81 @@ class BaseClass:
         if "myaussie_cookie" not in cookies or str(cookies["myaussie_cookie"]).strip() == "":
             return False
 
+        self.token_issued = time()
         self.token_expires = time() + jsondata.get("expiresIn", 0) - 50
-        self.myaussie_cookie = cookies["myaussie_cookie"]  # type: ignore
+        self.myaussie_cookie = cookies["myaussie_cookie"]
         self.logger.debug("Login Cookie: %s", self.myaussie_cookie)
+        cookie_value = self._cookie_value()
+        if self.token_store is not None and cookie_value is not None:
+            self.token_store.save(self.username, {"cookie": cookie_value, "expires": self.token_expires})
         return True
 
+    def _ratelimit_delay(self, jsondata: Dict[str, Any]) -> int:
+        """works out how long to back off for from the body of a 429 response"""
+        if "Please try again in " in str(jsondata.get("errors")):
+            fallback_value = [f"default {DEFAULT_BACKOFF_DELAY} seconds"]
+            delay = jsondata.get("errors", {}).get("username", fallback_value)[0].split()[-2]
+            try:
+                # give it some extra time to cool off
+                delay = int(delay) + 5
+            except ValueError:
+                delay = DEFAULT_BACKOFF_DELAY
+
+            if 0 < delay < 1000:
+                self.logger.debug("Found required rate limit delay: %s", delay)
+                return int(delay)
+            self.logger.debug("Couldn't parse rate limit delay, using default: %s", DEFAULT_BACKOFF_DELAY)
+            return DEFAULT_BACKOFF_DELAY
+        self.logger.debug("Couldn't parse delay, using default: %s", DEFAULT_BACKOFF_DELAY)
+        return DEFAULT_BACKOFF_DELAY
+
+    def billing_download_url(self, download_type: str, item_id: int) -> str:
+        """the URL for a billing document, `download_type` is one of `BILLING_DOWNLOAD_TYPES`"""
+        if download_type not in BILLING_DOWNLOAD_TYPES:
+            raise ValueError(f"Download type {download_type} not known, must be one of {BILLING_DOWNLOAD_TYPES}")
+        return f"{self.BASEURL.get('api')}/billing/{download_type}s/{item_id}"
+
+    @classmethod
+    def flatten_transactions(cls, transactions: Mapping[str, Any]) -> List[AccountTransaction]:
+        """`account_transactions` groups transactions by month, this gives you them in one list"""
+        result: List[AccountTransaction] = []
+        for month in transactions.values():
+            if isinstance(month, list):
+                result.extend(month)
+            else:
+                result.append(month)
+        return result
+
+    @classmethod
+    def transaction_filename(cls, transaction: AccountTransaction) -> str:
+        """the filename bulk downloads save a transaction's document as"""
+        return f"{transaction['time']}-{transaction['id']}-{transaction['type']}.pdf"
+
+    @classmethod
+    def download_part_path(cls, path: Path) -> Path:
+        """where a download goes until it's complete, so it can be resumed if it's interrupted"""
+        return path.with_name(f"{path.name}.part")
+
+    @classmethod
+    def downloadable_transactions(
+        cls,
+        transactions: Mapping[str, Any],
+        earliest: Optional[str] = None,
+    ) -> List[AccountTransaction]:
+        """the transactions which have a document to download, optionally only those from `earliest` (YYYY-MM-DD) on"""
+        return [
+            transaction
+            for transaction in cls.flatten_transactions(transactions)
+            if transaction["type"] in BILLING_DOWNLOAD_TYPES and (earliest is None or transaction["time"] >= earliest)
+        ]
+
     @classmethod
     def validate_service_type(cls, service: Dict[str, Any]) -> None:
         """Check the service types against known types"""
         if "type" not in service:
             raise ValueError("Field 'type' not found in service data")
-        if service["type"] not in USAGE_ENABLED_SERVICE_TYPES + HARDWARE_TYPES:
-            raise UnrecognisedServiceType(f"Service type {service['type']=} {service['name']=} -  not recognised - please raise an issue about this - https://github.com/yaleman/aussiebb/issues/new")
+        if service["type"] not in KNOWN_SERVICE_TYPES:
+            raise UnrecognisedServiceType(f"Service type {service['type']=} {service.get('name')=} -  not recognised - please raise an issue about this - https://github.com/yaleman/aussiebb/issues/new")
 
     def filter_services(
         self,
@@ -126,28 +368,27 @@ class BaseClass:
         drop_types: Optional[List[str]] = None,
         drop_unknown_types: bool = False,
     ) -> List[Dict[str, Any]]:
-        """filter services"""
+        """filter services, using `service_index` so it doesn't scan every service"""
 
         if drop_types is None:
             drop_types = []
 
-        self.logger.debug(f"Filtering services {self.services=} {service_types=} {drop_types=}")
-        filtered_responsedata: List[Dict[str, Any]] = []
-        if self.services is not None:
-            for service in self.services:
-                if "type" not in service:
-                    raise ValueError(f"No type field in service info: {service}")
-                if service["type"] in drop_types:
-                    continue
-                if service_types is None or service["type"] in service_types:
-                    filtered_responsedata.append(service)
-                else:
-                    self.logger.debug("Skipping as type==%s - %s", service["type"], service)
-            # skip things we don't know about
-            if drop_unknown_types:
-                filtered_responsedata = [service for service in filtered_responsedata if service["type"] in FETCH_TYPES + NBN_TYPES + PHONE_TYPES]
-            return filtered_responsedata
-        return []
+        # one read, so a background refresh can't swap the list out from under the index
+        services, index = self._services_snapshot
+        self.logger.debug("Filtering %s services service_types=%s drop_types=%s", len(services), service_types, drop_types)
+        if None in index.types():
+            missing = next(service for service in services if "type" not in service)
+            raise ValueError(f"No type field in service info: {missing}")
+
+        if service_types is None and not drop_types and not drop_unknown_types:
+            return list(services)
+
+        wanted = set(index.types() if service_types is None else service_types)
+        wanted.difference_update(drop_types)
+        # skip things we don't know about
+        if drop_unknown_types:
+            wanted.intersection_update(SUPPORTED_SERVICE_TYPES)
+        return index.by_type(*wanted)
 
     @classmethod
     def is_valid_test(cls, test_url: str, service_tests: List[ServiceTest]) -> bool:
@@ -165,17 +406,25 @@ class BaseClass:
     @classmethod
     def handle_services_response(
         cls,
-        responsedata: Dict[str, Any],
+        responsedata: Union[Dict[str, Any], GetServicesResponse],
         services_list: List[Dict[str, Any]],
     ) -> Tuple[Optional[str], int, List[Dict[str, Any]]]:
-        """handle the response, parse the JSON and update the services list"""
-        servicedata = GetServicesResponse.model_validate(responsedata)
+        """handle the response, validating it if it's still a dict, and update the services list"""
+        if isinstance(responsedata, GetServicesResponse):
+            servicedata = responsedata
+        else:
+            servicedata = GetServicesResponse.model_validate(responsedata)
 
-        for service in servicedata.data:
-            services_list.append(service)
+        services_list.extend(cast(List[Dict[str, Any]], servicedata.data))
 
         return (
             servicedata.links.next,  # url
             servicedata.meta["current_page"],  # page
             services_list,
         )
+
+    @classmethod
+    def remaining_pages(cls, responsedata: Union[Dict[str, Any], GetServicesResponse]) -> List[int]:
+        """the page numbers after this one, from the `meta` field of a paginated response"""
+        meta = responsedata.meta if isinstance(responsedata, GetServicesResponse) else responsedata["meta"]
+        return list(range(int(meta["current_page"]) + 1, int(meta["last_page"]) + 1))
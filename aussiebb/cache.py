@@ -0,0 +1,260 @@
+"""response caching for GET requests, with a TTL per endpoint
+
+Caches store the raw response body, keyed on the account, URL and query parameters. Pass one to a client:
+
+```
+from aussiebb.cache import MemoryCache
+client = AussieBB(username, password, cache=MemoryCache(ttls={"get_usage": 300}))
+```
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import threading
+from time import time, time_ns
+from typing import Dict, List, Optional, Tuple, Union
+
+from .const import DEFAULT_CACHE_TTLS
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict
+
+
+class CacheStats(TypedDict):
+    """hit/miss counters for a cache"""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+
+
+class ResponseCache(ABC):
+    """Base class for response caches, subclasses provide the storage.
+
+    ```
+    @param ttls: dict - seconds to keep responses for, keyed on `API_ENDPOINTS` names, merged over `DEFAULT_CACHE_TTLS`
+    @param max_entries: int - once it's holding this many responses, the least recently used are dropped
+    ```
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 1024):
+        self.ttls: Dict[str, float] = dict(DEFAULT_CACHE_TTLS)
+        if ttls is not None:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def ttl(self, endpoint: Optional[str]) -> float:
+        """how long responses from this endpoint are kept, zero if they're not cached"""
+        if endpoint is None:
+            return 0
+        return self.ttls.get(endpoint, 0)
+
+    def get(self, endpoint: Optional[str], key: str) -> Optional[bytes]:
+        """returns the cached body, or None if it's missing, expired or the endpoint isn't cached"""
+        if self.ttl(endpoint) <= 0 or endpoint is None:
+            return None
+        with self._lock:
+            entry = self._load(endpoint, key)
+            if entry is not None and entry[0] > time():
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._delete(endpoint, key)
+            self.misses += 1
+            return None
+
+    def set(self, endpoint: Optional[str], key: str, body: bytes) -> None:
+        """stores a body, if the endpoint is cached"""
+        ttl = self.ttl(endpoint)
+        if ttl <= 0 or endpoint is None:
+            return
+        with self._lock:
+            self._store(endpoint, key, time() + ttl, body)
+            self.evictions += self._evict()
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """drops everything cached for an endpoint, or the whole lot if it's not specified"""
+        with self._lock:
+            self._clear(endpoint)
+
+    def stats(self) -> CacheStats:
+        """returns the hit/miss counters"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": self._count(),
+            }
+
+    # storage methods, the lock's held when these are called
+    @abstractmethod
+    def _load(self, endpoint: str, key: str) -> Optional[Tuple[float, bytes]]:
+        """returns the expiry and body, or None if it's not stored"""
+
+    @abstractmethod
+    def _store(self, endpoint: str, key: str, expires: float, body: bytes) -> None:
+        """stores a body, replacing any there already"""
+
+    @abstractmethod
+    def _delete(self, endpoint: str, key: str) -> None:
+        """drops an entry, if it's there"""
+
+    @abstractmethod
+    def _clear(self, endpoint: Optional[str]) -> None:
+        """drops everything for an endpoint, or everything if it's None"""
+
+    @abstractmethod
+    def _count(self) -> int:
+        """how many entries are stored"""
+
+    @abstractmethod
+    def _evict(self) -> int:
+        """drops the least recently used entries over `max_entries`, returns how many went"""
+
+
+class MemoryCache(ResponseCache):
+    """keeps responses in an in-process LRU"""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 1024):
+        super().__init__(ttls, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, bytes]]" = OrderedDict()
+
+    def _load(self, endpoint: str, key: str) -> Optional[Tuple[float, bytes]]:
+        entry = self._entries.get((endpoint, key))
+        if entry is not None:
+            self._entries.move_to_end((endpoint, key))
+        return entry
+
+    def _store(self, endpoint: str, key: str, expires: float, body: bytes) -> None:
+        self._entries[(endpoint, key)] = (expires, body)
+        self._entries.move_to_end((endpoint, key))
+
+    def _delete(self, endpoint: str, key: str) -> None:
+        self._entries.pop((endpoint, key), None)
+
+    def _clear(self, endpoint: Optional[str]) -> None:
+        if endpoint is None:
+            self._entries.clear()
+            return
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == endpoint]:
+            del self._entries[entry_key]
+
+    def _count(self) -> int:
+        return len(self._entries)
+
+    def _evict(self) -> int:
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+
+class DiskCache(ResponseCache):
+    """Keeps responses on disk so they survive between processes.
+
+    Each endpoint gets a subdirectory, and each response is a file with a one-line JSON header holding the expiry.
+    File modification times track recent use for the LRU. The entry count's kept in memory, so the directory's only
+    listed when it's over `max_entries`, and eviction then goes a tenth under the limit so the next listing's a while off.
+    Other processes sharing the directory can throw the count out until then, when it's corrected from the listing.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1024,
+    ):
+        super().__init__(ttls, max_entries)
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._last_touched = 0
+        self._entries = len(self._files())
+
+    def _touch(self, path: Path) -> None:
+        """marks a file as just used, with a strictly increasing mtime so the LRU order holds on coarse filesystem clocks"""
+        self._last_touched = max(time_ns(), self._last_touched + 1)
+        os.utime(path, ns=(self._last_touched, self._last_touched))
+
+    def _path(self, endpoint: str, key: str) -> Path:
+        return self.directory / endpoint / hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _load(self, endpoint: str, key: str) -> Optional[Tuple[float, bytes]]:
+        path = self._path(endpoint, key)
+        try:
+            with path.open("rb") as file_handle:
+                header = json.loads(file_handle.readline())
+                body = file_handle.read()
+            self._touch(path)
+        except (OSError, ValueError):
+            return None
+        return float(header["expires"]), body
+
+    def _store(self, endpoint: str, key: str, expires: float, body: bytes) -> None:
+        path = self._path(endpoint, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write it somewhere else and move it into place, so readers never see half a file
+        file_descriptor, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        replacing = path.exists()
+        try:
+            with os.fdopen(file_descriptor, "wb") as file_handle:
+                file_handle.write(json.dumps({"expires": expires}).encode("utf-8") + b"\n")
+                file_handle.write(body)
+            os.replace(temp_name, path)
+            self._touch(path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        if not replacing:
+            self._entries += 1
+
+    def _unlink(self, path: Path) -> None:
+        """removes a file, keeping count if it was there"""
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            return
+        self._entries = max(self._entries - 1, 0)
+
+    def _delete(self, endpoint: str, key: str) -> None:
+        self._unlink(self._path(endpoint, key))
+
+    def _files(self, endpoint: Optional[str] = None) -> List[Path]:
+        base = self.directory if endpoint is None else self.directory / endpoint
+        if not base.exists():
+            return []
+        return [path for path in base.rglob("*") if path.is_file() and not path.name.startswith(".tmp-")]
+
+    def _clear(self, endpoint: Optional[str]) -> None:
+        for path in self._files(endpoint):
+            self._unlink(path)
+
+    def _count(self) -> int:
+        return self._entries
+
+    def _evict(self) -> int:
+        if self._entries <= self.max_entries:
+            return 0
+        files = self._files()
+        self._entries = len(files)
+        if len(files) <= self.max_entries:
+            return 0
+        files.sort(key=lambda path: path.stat().st_mtime_ns)
+        excess = files[: len(files) - (self.max_entries - self.max_entries // 10)]
+        for path in excess:
+            self._unlink(path)
+        return len(excess)
@@ -0,0 +1,1004 @@
+"""A class for interacting with Aussie Broadband APIs"""
+
+# import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+from pathlib import Path
+import sys
+import threading
+from time import monotonic, sleep, time
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Generator, Iterable, Iterator, List, Mapping, Optional, Type, Union, cast
+from pydantic import SecretStr
+
+from .baseclass import BaseClass, ItemT, ModelT
+from .cache import ResponseCache
+from .coalesce import Coalescer
+from .const import default_headers, DOWNLOAD_CHUNK_SIZE, PHONE_TYPES, SERVICE_TEST_TIMEOUT
+from .deadline import carry_context, deadline, expired, request_deadline, socket_timeouts, time_left
+from .instrument import RequestHook, RequestTrace, current_trace
+from .exceptions import AuthenticationException, DeadlineExceeded, RecursiveDepth
+from .ratelimit import RateLimiter
+from .jsonbackend import JSONLoads
+from .pagination import iter_pages
+from .retry import RetryPolicy
+from .tokenrefresh import TOKEN_REFRESH_POLL
+from .tokenstore import TokenStore
+from .validation import ValidationPolicy
+from .transport import TransportConfig, TransportStats, build_requests_session, requests_error_reason, requests_session_stats
+# requests is imported when the first client builds its session, see aussiebb.transport
+if TYPE_CHECKING:
+    import requests.sessions
+    from requests.models import Response
+
+from .types import (
+    FetchService,
+    MFAMethod,
+    ServiceTest,
+    AccountContact,
+    AccountTransaction,
+    AussieBBOutage,
+    DownloadResult,
+    OrderData,
+    OrderResponse,
+    OrderDetailResponse,
+    OrderDetailResponseModel,
+    VOIPDevice,
+    VOIPDetails,
+    GetServicesResponse,
+)
+
+
+class AussieBB(BaseClass):
+    """A class for interacting with Aussie Broadband APIs"""
+
+    def __init__(
+        self,
+        username: str,
+        password: "SecretStr | str",
+        debug: bool = False,
+        services_cache_time: int = 28800,
+        session: Optional["requests.sessions.Session"] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        page_concurrency: int = 1,
+        cache: Optional[ResponseCache] = None,
+        token_store: Optional[TokenStore] = None,
+        transport: Optional[TransportConfig] = None,
+        json_backend: Union[str, JSONLoads] = "json",
+        validation: Union[str, ValidationPolicy] = "full",
+        retry: Optional[RetryPolicy] = None,
+        coalesce: Union[bool, Coalescer] = True,
+        services_stale_time: int = 0,
+        token_refresh_margin: Optional[float] = None,
+        hooks: Optional[Iterable[RequestHook]] = None,
+    ):
+        """Setup function
+
+        ```
+        @param username: str - username for Aussie Broadband account
+        @param password: str - password for Aussie Broadband account
+        @param debug: bool - debug mode
+        @param services_cache_time: int
+            - seconds between caching get_services()
+            - defaults to 8 hours
+        @param session : requests.session - session object
+        @param rate_limiter: aussiebb.ratelimit.RateLimiter - share one between clients to pool the budget
+        @param page_concurrency: int - how many pages of get_services() to pull at once, through a thread pool
+        @param cache: aussiebb.cache.ResponseCache - caches GET responses for the endpoints it has a TTL for
+        @param token_store: aussiebb.tokenstore.TokenStore - keeps the login cookie between processes
+        @param transport: aussiebb.transport.TransportConfig - connection pool settings, ignored if you pass a session
+        @param json_backend: str - parser for untyped responses, see `aussiebb.jsonbackend`
+        @param validation: str - `full`, `sampled` or `trusted`, or an `aussiebb.validation.ValidationPolicy`
+        @param retry: aussiebb.retry.RetryPolicy - which failed requests are sent again, defaults to `RetryPolicy()`
+        @param coalesce: bool - share in-flight GETs between concurrent callers, or an `aussiebb.coalesce.Coalescer` to share between clients
+        @param services_stale_time: int
+            - seconds past services_cache_time that get_services(use_cached=True) keeps returning the cached services
+              while it refreshes them on a background thread, after that it waits for the refresh
+            - defaults to 0, which always waits
+        @param token_refresh_margin: float
+            - seconds before the login cookie expires to log in again on a background thread, see `aussiebb.tokenrefresh`
+            - defaults to None, which logs in when a request finds the cookie has expired
+        @param hooks: list - called with an `aussiebb.instrument.RequestEvent` timing each request
+        ```
+        """
+        super().__init__(
+            username,
+            password,
+            debug,
+            services_cache_time,
+            rate_limiter=rate_limiter,
+            page_concurrency=page_concurrency,
+            cache=cache,
+            token_store=token_store,
+            json_backend=json_backend,
+            validation=validation,
+            retry=retry,
+            coalesce=coalesce,
+            services_stale_time=services_stale_time,
+            token_refresh_margin=token_refresh_margin,
+            hooks=hooks,
+        )
+        self.transport = transport if transport is not None else TransportConfig()
+        if session is None:
+            self.session = build_requests_session(self.transport)
+        else:
+            self.session = session
+        # only one thread logs in at a time, the rest wait for it and use its cookie
+        self._login_lock = threading.Lock()
+        # the thread refreshing stale services, see services_stale_time
+        self.services_refresh: Optional[threading.Thread] = None
+        self._services_refresh_lock = threading.Lock()
+        # the thread logging in again before the cookie expires, see token_refresh_margin
+        self.token_refresher: Optional[threading.Thread] = None
+        self._token_refresher_lock = threading.Lock()
+        self._token_refresh_stop = threading.Event()
+
+    def login(self, depth: int = 0) -> bool:
+        """Logs into the account and caches the cookie.
+
+        Always logs in, even if the current cookie's still valid - the asyncio client's `login` only does that with `force=True`."""
+        if depth > 2:
+            raise RecursiveDepth("Login recursion depth > 2")
+        self.logger.debug("Logging in...")
+
+        url = self.BASEURL["login"]
+
+        payload = {
+            "username": self.username,
+            "password": self.password.get_secret_value(),
+        }
+        headers: Dict[str, Any] = dict(default_headers())
+
+        with self._trace("POST", url, "login", separate=True):
+            response = self._send(
+                "POST",
+                url,
+                headers=headers,
+                json=payload,
+            )
+
+            response.raise_for_status()
+            jsondata = response.json()
+
+            return self._handle_login_response(response.status_code, jsondata, response.cookies)
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> "Response":
+        """sends a request once the rate limiter allows it, and feeds the response headers back to the limiter
+
+        Connection errors, 429s and 5xx responses are sent again as `self.retry` allows, see `aussiebb.retry`.
+        Timeouts come from the transport config and any deadline the caller's inside, see `aussiebb.deadline`.
+        """
+        trace = current_trace() if self.hooks else None
+        until = request_deadline(self.transport.total_timeout)
+        attempt = self.retry.start(method, until)
+        while True:
+            mark = monotonic() if trace is not None else 0.0
+            self.rate_limiter.acquire(max_wait=time_left(until))
+            if trace is not None:
+                mark = trace.add_since("ratelimit", mark)
+            try:
+                response = self.session.request(method, url, timeout=socket_timeouts(self.transport, until), **kwargs)
+            except OSError as error:  # requests' exceptions are all OSErrors
+                if expired(until):
+                    raise DeadlineExceeded(f"{method} {url} didn't finish before its deadline") from error
+                delay = attempt.next_delay(requests_error_reason(error))
+                if delay is None:
+                    raise
+                self.logger.debug("%s %s failed (%s), retrying in %.2f seconds", method, url, error, delay)
+                self._retry_sleep(delay, trace)
+                continue
+            if trace is not None:
+                self._trace_response(trace, response, mark, kwargs.get("stream", False))
+            self.rate_limiter.update(response.headers, response.status_code)
+            delay = attempt.next_delay(self.retry.status_reason(response.status_code), self.rate_limiter.blocked_for())
+            if delay is None:
+                return response
+            self.logger.debug("%s %s returned %s, retrying in %.2f seconds", method, url, response.status_code, delay)
+            response.close()
+            self._retry_sleep(delay, trace)
+
+    @staticmethod
+    def _trace_response(trace: RequestTrace, response: "Response", sent: float, stream: bool) -> None:
+        """splits the time since the request was sent into waiting for the headers and reading the body"""
+        elapsed = monotonic() - sent
+        ttfb = min(response.elapsed.total_seconds(), elapsed)
+        trace.add("ttfb", ttfb)
+        if not stream:
+            # requests has already read the body
+            trace.add("body", elapsed - ttfb)
+        trace.status = response.status_code
+
+    @staticmethod
+    def _retry_sleep(delay: float, trace: Optional[RequestTrace]) -> None:
+        """waits before sending a request again"""
+        if trace is not None:
+            trace.retries += 1
+            trace.add("retry", delay)
+        sleep(delay)
+
+    def transport_stats(self) -> TransportStats:
+        """connection pool counters for the session"""
+        return requests_session_stats(self.session)
+
+    def do_login_check(self, skip_login_check: bool) -> None:
+        """checks if we're skipping the login check and logs in if necessary"""
+        if not skip_login_check:
+            self.logger.debug("skip_login_check false")
+            if self._has_token_expired():
+                with self._login_lock:
+                    # someone else might have logged in while we were waiting for the lock
+                    if self._has_token_expired():
+                        self.logger.debug("token has expired, logging in...")
+                        self.token_refresh.inline_login()
+                        with self._timed("login"):
+                            self.login()
+        if self.token_refresh_margin is not None:
+            self._start_token_refresher()
+
+    def _relogin(self, rejected_cookie: Optional[str]) -> None:
+        """logs in again after the API rejected a cookie, unless another thread already has"""
+        with self._login_lock:
+            if self._cookie_value() == rejected_cookie:
+                self._forget_token()
+                self.token_refresh.inline_login()
+                with self._timed("login"):
+                    self.login()
+
+    def _start_token_refresher(self) -> None:
+        """starts the thread which logs in again ahead of the cookie expiring, unless it's already running"""
+        if self.token_refresher is not None and self.token_refresher.is_alive():
+            return
+        with self._token_refresher_lock:
+            if self.token_refresher is not None and self.token_refresher.is_alive():
+                return
+            self._token_refresh_stop.clear()
+            self.token_refresher = threading.Thread(target=self._refresh_token_until_stopped, name="aussiebb-token-refresh", daemon=True)
+            self.token_refresher.start()
+
+    def stop_token_refresh(self) -> None:
+        """stops the background token refresher, the next request starts it again"""
+        self._token_refresh_stop.set()
+        if self.token_refresher is not None and self.token_refresher is not threading.current_thread():
+            self.token_refresher.join()
+
+    def _refresh_token_until_stopped(self) -> None:
+        """sleeps until the cookie's due to be replaced and logs in again, until stop_token_refresh is called"""
+        while not self._token_refresh_stop.wait(min(self._token_refresh_wait(), TOKEN_REFRESH_POLL)):
+            if self._token_refresh_wait() == 0:
+                self._refresh_token()
+
+    def _refresh_token(self) -> None:
+        """logs in again while requests keep using the current cookie, which is kept if the login fails"""
+        start = monotonic()
+        with self._login_lock:
+            # a request might have logged in while we were waiting for the lock
+            if self._token_refresh_wait() > 0:
+                return
+            previous = (self.myaussie_cookie, self.token_expires, self.token_issued)
+            try:
+                if not self.login():
+                    raise AuthenticationException("Login response didn't include a cookie")
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except BaseException as error:  # pylint: disable=broad-except
+                if self.myaussie_cookie is None:
+                    self.myaussie_cookie, self.token_expires, self.token_issued = previous
+                self.token_refresh.failed(error)
+                self.logger.warning("Refreshing the login in the background failed, still using the current cookie: %s", error)
+                return
+        self.token_refresh.succeeded(monotonic() - start)
+
+    def request_get(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> "Response":
+        """Performs a GET request and logs in first if needed.
+
+        Returns the `requests.Response` object."""
+        with self._trace("GET", url) as trace:
+            self.do_login_check(skip_login_check)
+            if cookies is None:
+                cookies = {"myaussie_cookie": self.myaussie_cookie}
+
+            response = self._send("GET", url=url, cookies=cookies, params=params)
+            response.raise_for_status()
+            if trace is not None:
+                trace.bytes = len(response.content)
+            return response
+
+    def request_get_bytes(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> bytes:
+        """Performs a GET request and logs in first if needed.
+
+        Returns the body of the response, from the cache if the client has one and it's got a fresh copy.
+        Callers asking for the same thing at the same time share one request, see `aussiebb.coalesce`.
+        """
+        with self._trace("GET", url) as trace:
+            body = self._get_bytes(url, skip_login_check, cookies, params)
+            if trace is not None:
+                trace.bytes = len(body)
+            return body
+
+    def _get_bytes(
+        self,
+        url: str,
+        skip_login_check: bool,
+        cookies: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> bytes:
+        """the body for `request_get_bytes`, from the cache, someone else's request or a request of our own"""
+        endpoint = self.endpoint_name(url)
+        cache_key = self.cache_key(url, params)
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, cache_key)
+            if cached is not None:
+                return cached
+
+        if self.coalescer is None or cookies is not None:
+            return self._fetch_bytes(url, skip_login_check, cookies, params)
+        # the cache key has everything that makes two GETs the same, so it'll do for coalescing too
+        return self.coalescer.run(cache_key, lambda: self._fetch_bytes(url, skip_login_check, cookies, params))
+
+    def _fetch_bytes(
+        self,
+        url: str,
+        skip_login_check: bool,
+        cookies: Optional[Dict[str, Any]],
+        params: Optional[Dict[str, Any]],
+    ) -> bytes:
+        """sends the GET for `request_get_bytes` and caches the body"""
+        self.do_login_check(skip_login_check)
+        request_cookies = cookies
+        sent_cookie = self._cookie_value()
+        if request_cookies is None and sent_cookie is not None:
+            request_cookies = {"myaussie_cookie": sent_cookie}
+        response = self._send("GET", url=url, cookies=request_cookies, params=params)
+        if response.status_code == 401 and not skip_login_check and cookies is None:
+            # the cookie we had (maybe from the token store) has been revoked, log in again and retry once
+            self.logger.debug("Got a 401, logging in again")
+            self._relogin(sent_cookie)
+            trace = current_trace() if self.hooks else None
+            if trace is not None:
+                trace.retries += 1
+            response = self._send("GET", url=url, cookies={"myaussie_cookie": self._cookie_value()}, params=params)
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.set(self.endpoint_name(url), self.cache_key(url, params), response.content)
+        return response.content
+
+    def request_get_model(
+        self,
+        url: str,
+        model: Type[ModelT],
+        skip_login_check: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> ModelT:
+        """Performs a GET request and logs in first if needed.
+
+        Returns the response validated into `model`, straight from the body without building a dict first.
+        """
+        with self._trace("GET", url):
+            return self.decode_model(self.request_get_bytes(url, skip_login_check, params=params), model)
+
+    def request_get_model_list(
+        self,
+        url: str,
+        item: Type[ItemT],
+        skip_login_check: bool = False,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> List[ItemT]:
+        """Performs a GET request and logs in first if needed.
+
+        Returns the response as a list of `item`, validated in one go with a cached list `TypeAdapter`.
+        """
+        with self._trace("GET", url):
+            return self.decode_list(self.request_get_bytes(url, skip_login_check, params=params), item)
+
+    def request_get_list(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        """Performs a GET request and logs in first if needed.
+
+        Returns a list from the response.
+        """
+        with self._trace("GET", url):
+            body = self.request_get_bytes(url, skip_login_check, cookies, params)
+            with self._timed("decode"):
+                result: List[Any] = self.json_loads(body)
+        return result
+
+    def request_get_json(
+        self,
+        url: str,
+        skip_login_check: bool = False,
+        cookies: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Performs a GET request and logs in first if needed.
+
+        Returns a dict of the JSON response.
+        """
+        with self._trace("GET", url):
+            body = self.request_get_bytes(url, skip_login_check, cookies, params)
+            with self._timed("decode"):
+                result: Dict[str, Any] = self.json_loads(body)
+        return result
+
+    def request_post(self, url: str, skip_login_check: bool = False, **kwargs: Dict[str, Any]) -> "requests.Response":
+        """Performs a POST request and logs in first if needed."""
+        with self._trace("POST", url) as trace:
+            self.do_login_check(skip_login_check)
+            if "cookies" not in kwargs:
+                kwargs["cookies"] = {"myaussie_cookie": self.myaussie_cookie}
+
+            if "headers" in kwargs:
+                headers: Dict[str, Any] = kwargs["headers"]
+            else:
+                headers = dict(default_headers())
+
+            response = self._send(
+                "POST",
+                url=url,
+                headers=headers,
+                **kwargs,
+            )
+            response.raise_for_status()
+            if trace is not None:
+                trace.bytes = len(response.content)
+            return response
+
+    def get_customer_details(self) -> Dict[str, Any]:
+        """Grabs the customer details.
+
+        Returns a dict"""
+        url = self.get_url("get_customer_details")
+        querystring = {"v": "2"}
+        responsedata = self.request_get_json(
+            url=url,
+            params=querystring,
+        )
+        return responsedata
+
+    @property
+    def referral_code(self) -> int:
+        """returns the referral code, which is just the customer number"""
+        response = self.get_customer_details()
+        if "customer_number" not in response:
+            raise ValueError("Couldn't get customer_number from customer_details call.")
+        return int(response["customer_number"])
+
+    def _check_reload_cached_services(self) -> bool:
+        """If the age of the service data caching is too old, clear it and re-poll.
+
+        For `services_stale_time` seconds after they expire, the cached services are kept and refreshed on a background thread instead.
+
+        Returns bool - if it reloaded the cache.
+        """
+        freshness = self._services_freshness()
+        if freshness == "stale":
+            self._refresh_services_in_background()
+        if freshness != "expired":
+            return False
+        self.get_services(use_cached=False)
+        return True
+
+    def _refresh_services_in_background(self) -> None:
+        """starts a thread to refresh the services, unless one's already running"""
+        with self._services_refresh_lock:
+            if self.services_refresh is not None and self.services_refresh.is_alive():
+                return
+            self.services_refresh = threading.Thread(target=self._refresh_services, name="aussiebb-services-refresh", daemon=True)
+            self.services_refresh.start()
+
+    def _refresh_services(self) -> None:
+        """pulls the services and swaps them in, leaving the cached ones alone if it fails"""
+        try:
+            # a new thread starts with an empty context, so the caller's deadline doesn't follow it here
+            services = self._fetch_services(1, self.page_concurrency)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        # the module's exceptions (AuthenticationException, RateLimitException...) are BaseExceptions
+        except BaseException as error:  # pylint: disable=broad-except
+            self.logger.warning("Refreshing services in the background failed, still using the cached ones: %s", error)
+            return
+        self._swap_services(services)
+
+    def get_services(
+        self,
+        page: int = 1,
+        use_cached: bool = False,
+        servicetypes: Optional[List[str]] = None,
+        drop_types: Optional[List[str]] = None,
+        page_concurrency: Optional[int] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Returns a `list` of `dicts` of services associated with the account.
+
+        If you want a specific kind of service, or services,
+        provide a list of matching strings in servicetypes.
+
+        If you want to use cached data, call it with `use_cached=True`
+
+        If `page_concurrency` (which defaults to the client's setting) is more than 1,
+        it pulls the first page and then the rest of them through a thread pool.
+        """
+        if page_concurrency is None:
+            page_concurrency = self.page_concurrency
+        if use_cached:
+            self.logger.debug("Using cached data for get_services.")
+            self._check_reload_cached_services()
+            # only reads, a background refresh may have swapped in newer services since we checked
+            return self.filter_services(service_types=servicetypes, drop_types=drop_types)
+
+        self.services = self._fetch_services(page, page_concurrency)
+        self.services_last_update = int(time())
+        self.services = self.filter_services(
+            service_types=servicetypes,
+            drop_types=drop_types,
+        )
+
+        return self.services
+
+    def _fetch_services(self, page: int, page_concurrency: int) -> List[Dict[str, Any]]:
+        """pulls every page of services, through a thread pool if `page_concurrency` is more than 1"""
+        if page_concurrency > 1:
+            return self._get_services_concurrently(page, page_concurrency)
+        return list(self.iter_services(page))
+
+    def _get_services_concurrently(self, page: int, page_concurrency: int) -> List[Dict[str, Any]]:
+        """pulls the first page of services, then the rest of them through a thread pool, keeping them in order"""
+        url = self.get_url("get_services")
+        responsedata = self.request_get_model(url, GetServicesResponse, params={"page": page})
+        next_url, _, services_list = self.handle_services_response(responsedata, [])
+        if next_url is None:
+            return services_list
+
+        pages = self.remaining_pages(responsedata)
+        with ThreadPoolExecutor(max_workers=min(page_concurrency, len(pages))) as executor:
+            get_page = carry_context(lambda page_number: self.request_get_model(url, GetServicesResponse, params={"page": page_number}))
+            for page_data in executor.map(get_page, pages):
+                self.handle_services_response(page_data, services_list)
+        return services_list
+
+    def iter_services(self, page: int = 1, prefetch: bool = False) -> Generator[Dict[str, Any], None, None]:
+        """Yields the account's services a page at a time as they arrive, so huge accounts don't need them all in memory.
+
+        Unlike `get_services` this doesn't filter them or update `services`.
+        With `prefetch` the next page is pulled on a background thread while you work through this one.
+        """
+        url = self.get_url("get_services")
+        pages = iter_pages(lambda page_url, params: self.request_get_model(page_url, GetServicesResponse, params=params), url, {"page": page}, prefetch)
+        for services_page in pages:
+            yield from cast(List[Dict[str, Any]], services_page.data)
+
+    def account_transactions(self) -> Dict[str, AccountTransaction]:
+        """Pulls the data for transactions on your account.
+
+        Returns a dict where the key is the month and year of the transaction.
+
+        Keys: `['id', 'type', 'time', 'description', 'amountCents', 'runningBalanceCents']`
+
+        Example output:
+
+        ``` json
+        "August 2021": [
+          {
+                "id": 12345,
+                "type": "receipt",
+                "time": "2021-08-06",
+                "description": "Payment #12345",
+                "amountCents": -8400,
+                "runningBalanceCents": 0
+            }
+        ],
+        ```
+        """
+        url = self.get_url("account_transactions")
+        responsedata = self.request_get_json(url=url)
+
+        result: Dict[str, AccountTransaction] = responsedata
+        return result
+
+    def billing_receipt(self, receipt_id: int) -> "Response":
+        """Downloads a receipt
+
+        This returns the bare response object, parsing the result is an exercise for the consumer. It's a PDF file.
+        """
+        return self.billing_download("receipt", receipt_id)
+
+    def billing_invoice(self, invoice_id: int) -> "Response":
+        """Downloads an invoice
+
+        This returns the bare response object, parsing the result is an exercise for the consumer. It's a PDF file.
+        """
+        return self.billing_download("invoice", invoice_id)
+
+    def billing_download(self, download_type: str, item_id: int) -> "Response":
+        """Downloads a billing file
+
+        This returns the bare response object, parsing the result is an exercise for the consumer. It's a PDF file.
+        Use `download_billing_document` to stream it to disk instead of holding it in memory.
+        """
+        return self.request_get(url=self.billing_download_url(download_type, item_id))
+
+    def download_billing_document(
+        self,
+        download_type: str,
+        item_id: int,
+        destination: Union[str, Path, BinaryIO],
+        resume: bool = True,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    ) -> DownloadResult:
+        """Streams a billing document to a path or file object, a chunk at a time.
+
+        Downloads to a path go to a `.part` file which is moved into place when it's complete.
+        If there's already a `.part` file and `resume` is True, it asks for the rest of the file with a `Range` header.
+
+        ```
+        @param download_type: str - one of `BILLING_DOWNLOAD_TYPES`
+        @param item_id: int - the transaction ID
+        @param destination: a path, or a file object opened for binary writing
+        @param resume: bool - carry on from a previous partial download
+        @param chunk_size: int - bytes to read at a time
+        ```
+        """
+        url = self.billing_download_url(download_type, item_id)
+        part_path: Optional[Path] = None
+        offset = 0
+        if isinstance(destination, (str, Path)):
+            path = Path(destination)
+            part_path = self.download_part_path(path)
+            if resume and part_path.exists():
+                offset = part_path.stat().st_size
+        else:
+            path = Path(getattr(destination, "name", ""))
+
+        with self._trace("GET", url) as trace:
+            self.do_login_check(False)
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            size = 0
+            with self._send("GET", url=url, cookies={"myaussie_cookie": self._cookie_value()}, headers=headers, stream=True) as response:
+                if offset and response.status_code == 416:
+                    # there's nothing after the offset, so the partial file's actually complete
+                    self.logger.debug("Partial download of %s is already complete", path)
+                else:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        # the server sent the whole thing, so start again
+                        offset = 0
+                    # includes writing it out, the chunks are read as they're written
+                    with self._timed("body"):
+                        if part_path is None:
+                            for chunk in response.iter_content(chunk_size):
+                                size += destination.write(chunk)  # type: ignore[union-attr]
+                        else:
+                            with part_path.open("ab" if offset else "wb") as file_handle:
+                                for chunk in response.iter_content(chunk_size):
+                                    size += file_handle.write(chunk)
+            if trace is not None:
+                trace.bytes = size
+        if part_path is not None:
+            os.replace(part_path, path)
+        return DownloadResult(
+            item_id=item_id,
+            download_type=download_type,
+            path=path,
+            status="resumed" if offset else "downloaded",
+            size=size,
+        )
+
+    def download_transactions(
+        self,
+        directory: Union[str, Path],
+        transactions: Optional[Mapping[str, Any]] = None,
+        concurrency: int = 4,
+        skip_existing: bool = True,
+        resume: bool = True,
+        earliest: Optional[str] = None,
+    ) -> Iterator[DownloadResult]:
+        """Downloads the documents for many transactions through a thread pool, yielding results as they complete.
+
+        Files are named by `transaction_filename`. A failed download is yielded with its `error` set rather than stopping the rest.
+
+        ```
+        @param directory: where to put the files
+        @param transactions: the output of `account_transactions()`, which is called if it's not provided
+        @param concurrency: int - downloads to run at once
+        @param skip_existing: bool - don't download files which are already there
+        @param resume: bool - carry on from partial downloads
+        @param earliest: str - YYYY-MM-DD, skip transactions before this
+        ```
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if transactions is None:
+            transactions = self.account_transactions()
+        directory = Path(directory).expanduser()
+        directory.mkdir(parents=True, exist_ok=True)
+
+        def download(transaction: AccountTransaction, path: Path) -> DownloadResult:
+            try:
+                return self.download_billing_document(transaction["type"], transaction["id"], path, resume=resume)
+            except (KeyboardInterrupt, SystemExit):
+                raise
+            except BaseException as error:  # pylint: disable=broad-except
+                self.logger.debug("Download of %s failed: %s", path, error)
+                return DownloadResult(item_id=transaction["id"], download_type=transaction["type"], path=path, status="failed", error=error)
+
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            futures = []
+            for transaction in self.downloadable_transactions(transactions, earliest):
+                path = directory / self.transaction_filename(transaction)
+                if skip_existing and path.exists():
+                    yield DownloadResult(item_id=transaction["id"], download_type=transaction["type"], path=path, status="skipped")
+                    continue
+                futures.append(executor.submit(carry_context(download), transaction, path))
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # if the caller stops iterating early, don't start the rest
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def account_paymentplans(self) -> Dict[str, Any]:
+        """Returns a dict of payment plans for an account"""
+        url = self.get_url("account_paymentplans")
+        return self.request_get_json(url=url)
+
+    def get_usage(self, service_id: int, use_cached: bool = True) -> Dict[str, Any]:
+        """
+        Returns a dict of usage for a service.
+
+        If it's a telephony service (`type=PhoneMobile`) it'll pull from the telephony endpoint.
+
+        """
+        if use_cached:
+            # only pulls the services if they've expired, get_services would copy and filter all of them on every call
+            self._check_reload_cached_services()
+        else:
+            self.get_services()
+        service = self.service_index.get(service_id)
+        if service is not None:
+            # throw an error if we're trying to parse something we can't
+            self.validate_service_type(service)
+            if service["type"] in PHONE_TYPES:
+                return self.telephony_usage(service_id)
+        url = self.get_url("get_usage", {"service_id": service_id})
+        result = self.request_get_json(url=url)
+        return result
+
+    def get_service_tests(self, service_id: int) -> List[ServiceTest]:
+        """Gets the available tests for a given service ID
+        Returns list of dicts
+
+        Example data:
+
+        ```
+        [{
+            'name' : str(),
+            'description' : str',
+            'link' : str(a url to the test)
+        },]
+        ```
+
+        This has a habit of throwing 400 errors if you query a VOIP service...
+        """
+        url = self.get_url("get_service_tests", {"service_id": service_id})
+        return self.request_get_model_list(url, ServiceTest)
+
+    def get_test_history(self, service_id: int) -> Dict[str, Any]:
+        """Gets the available tests for a given service ID
+
+        Returns a list of dicts with tests which have been run
+        """
+        url = self.get_url("get_test_history", {"service_id": service_id})
+        return self.request_get_json(url=url)
+
+    def test_line_state(self, service_id: int, timeout: float = SERVICE_TEST_TIMEOUT) -> Dict[str, Any]:
+        """Tests the line state for a given service ID, waiting up to `timeout` seconds for the result"""
+        tests = self.get_service_tests(service_id)
+        url = self.get_url("test_line_state", {"service_id": service_id})
+
+        self.is_valid_test(url, tests)
+
+        self.logger.debug("Testing line state, can take a few seconds...")
+        with deadline(read=timeout):
+            response = self.request_post(url=url)
+        result: Dict[str, Any] = response.json()
+        return result
+
+    def run_test(self, service_id: int, test_name: str, test_method: str = "post", timeout: float = SERVICE_TEST_TIMEOUT) -> Optional[Dict[str, Any]]:
+        """Run a test, but it checks it's valid first
+
+        There doesn't seem to be a valid way to identify what method you're supposed to use on each test.
+
+        See the README for more analysis
+
+        - 'status' of 'InProgress' use 'AussieBB.get_test_history()' and look for the 'id'
+        - 'status' of 'Completed' means you've got the full response
+
+        `timeout` is how many seconds to wait for the API to answer, since it runs the test first.
+        """
+
+        test_links = [test for test in self.get_service_tests(service_id) if test.link.endswith(f"/{test_name}")]
+
+        if not test_links:
+            return None
+        if len(test_links) != 1:
+            self.logger.debug("Too many tests? %s", test_links)
+
+        test_name = test_links[0].name
+        self.logger.debug("Running %s", test_name)
+        with deadline(read=timeout):
+            if test_method == "get":
+                return self.request_get_json(url=test_links[0].link)
+            result: Dict[str, Any] = self.request_post(url=test_links[0].link).json()
+        return result
+
+    def service_plans(self, service_id: int) -> Dict[str, Any]:
+        """
+        Pulls the plan data for a given service. You MUST MFA-verify first.
+
+        Keys: `['current', 'pending', 'available', 'filters', 'typicalEveningSpeeds']`
+
+        """
+        url = self.get_url("service_plans", {"service_id": service_id})
+        return self.request_get_json(url=url)
+
+    def service_outages(self, service_id: int) -> Dict[str, Any]:
+        """Pulls outages associated with a service.
+
+        Keys: `['networkEvents', 'aussieOutages', 'currentNbnOutages', 'scheduledNbnOutages', 'resolvedScheduledNbnOutages', 'resolvedNbnOutages']`
+
+        ```
+        """
+        url = self.get_url("service_outages", {"service_id": service_id})
+        result = self.request_get_model(url, AussieBBOutage)
+        # unvalidated models can hold strings where datetimes are expected, which pydantic warns about
+        return result.model_dump(warnings=False)
+
+    def service_boltons(self, service_id: int) -> Dict[str, Any]:
+        """Pulls addons associated with the service.
+
+        Keys: `['id', 'name', 'description', 'costCents', 'additionalNote', 'active']`
+
+        Example data:
+
+        ```
+        [{
+            "id": 4,
+            "name": "Small Change Big Change Donation",
+            "description": "Charitable donation to the Small Change Big Change program, part of the Telco Together Foundation, which helps build resilient young Australians",
+            "costCents": 100,
+            "additionalNote": null,
+            "active": false
+        }]
+        ```
+        """
+        url = self.get_url("service_boltons", {"service_id": service_id})
+        return self.request_get_json(url=url)
+
+    def service_datablocks(self, service_id: int) -> Dict[str, Any]:
+        """Pulls datablocks associated with the service.
+
+        Keys: `['current', 'available']`
+
+        Example data:
+
+        ```
+        {
+            "current": [],
+            "available": []
+        }
+        ```
+        """
+        url = self.get_url("service_datablocks", {"service_id": service_id})
+        return self.request_get_json(url=url)
+
+    def telephony_usage(self, service_id: int) -> Dict[str, Any]:
+        """Pulls the telephony usage associated with the service.
+
+        Keys: `['national', 'mobile', 'international', 'sms', 'internet', 'voicemail', 'other', 'daysTotal', 'daysRemaining', 'historical']`
+
+        Example data:
+
+        ```
+        {"national":{"calls":0,"cost":0},"mobile":{"calls":0,"cost":0},
+        "international":{"calls":0,"cost":0},"sms":{"calls":0,"cost":0},
+        "internet":{"kbytes":0,"cost":0},
+        "voicemail":{"calls":0,"cost":0},"other":{"calls":0,"cost":0},
+        "daysTotal":31,"daysRemaining":2,"historical":[]}
+        ```
+        """
+        url = self.get_url("telephony_usage", {"service_id": service_id})
+        return self.request_get_json(url=url)
+
+    def support_tickets(self) -> Dict[str, Any]:
+        """Pulls the support tickets associated with the account, returns a list of dicts.
+
+        Dict keys: `['ref', 'create', 'updated', 'service_id', 'type', 'subject', 'status', 'closed', 'awaiting_customer_reply', 'expected_response_minutes']`
+
+        """
+        url = self.get_url("support_tickets")
+        return self.request_get_json(url=url)
+
+    def get_appointment(self, ticketid: int) -> Dict[str, Any]:
+        """Pulls the support tickets associated with the account, returns a list of dicts.
+
+        Dict keys: `['ref', 'create', 'updated', 'service_id', 'type', 'subject', 'status', 'closed', 'awaiting_customer_reply', 'expected_response_minutes']`
+        """
+        url = self.get_url("get_appointment", {"ticketid": ticketid})
+        return self.request_get_json(url=url)
+
+    def account_contacts(self) -> List[AccountContact]:
+        """Pulls the contacts with the account, returns a list of dicts
+
+        Dict keys: `['id', 'first_name', 'last_name', 'email', 'dob', 'home_phone', 'work_phone', 'mobile_phone', 'work_mobile', 'primary_contact']`
+        """
+        url = self.get_url("account_contacts")
+        return self.request_get_model_list(url, AccountContact)
+
+    # TODO: type get_orders
+    def get_orders(self) -> Dict[str, Any]:
+        """pulls the orders for an account, from every page - `links` and `meta` are from the last page"""
+        result: Dict[str, Any] = {}
+        orders: List[OrderData] = []
+        for orders_page in self._order_pages():
+            orders.extend(orders_page.data)
+            result = orders_page.model_dump(warnings=False)
+        result["data"] = orders
+        return result
+
+    def _order_pages(self, prefetch: bool = False) -> Iterator[OrderResponse]:
+        url = self.get_url("get_orders")
+        return iter_pages(lambda page_url, params: self.request_get_model(page_url, OrderResponse, params=params), url, prefetch=prefetch)
+
+    def iter_orders(self, prefetch: bool = False) -> Generator[OrderData, None, None]:
+        """Yields the account's orders a page at a time as they arrive, with `prefetch` pulling the next page in the background"""
+        for orders_page in self._order_pages(prefetch):
+            yield from orders_page.data
+
+    def get_order(self, order_id: int) -> OrderDetailResponse:
+        """gets a specific order"""
+        url = self.get_url("get_order", {"order_id": order_id})
+        result = cast(
+            OrderDetailResponse,
+            self.request_get_model(url, OrderDetailResponseModel).model_dump(warnings=False),
+        )
+        return result
+
+    def get_voip_devices(self, service_id: int) -> List[VOIPDevice]:
+        """gets the devices associatd with a VOIP service"""
+        url = self.get_url("voip_devices", {"service_id": service_id})
+        return self.request_get_model_list(url, VOIPDevice)
+
+    def get_voip_service(self, service_id: int) -> VOIPDetails:
+        """gets the details of a VOIP service"""
+        url = self.get_url("voip_service", {"service_id": service_id})
+        return self.request_get_model(url, VOIPDetails)
+
+    def get_fetch_service(self, service_id: int) -> FetchService:
+        """gets the details of a Fetch service"""
+        url = self.get_url("fetch_service", {"service_id": service_id})
+        return self.request_get_model(url, FetchService)
+
+    async def mfa_send(self, method: MFAMethod) -> None:
+        """sends an MFA code to the user"""
+        url = self.get_url("mfa_send")
+        print(method.model_dump(), file=sys.stderr)
+        self.request_post(url=url, data=method.model_dump())
+
+    async def mfa_verify(self, token: str) -> None:
+        """got the token from send_mfa? send it back to validate it"""
+        url = self.get_url("mfa_verify")
+        self.request_post(url=url, data={"token": token})
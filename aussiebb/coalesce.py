@@ -0,0 +1,126 @@
+"""shares one in-flight GET between callers asking for the same thing at the same time
+
+When several threads or coroutines ask for the same URL (with the same params, on the same account) while a request
+for it is already on its way, they wait for that request's body instead of sending their own. Nothing is kept once
+the request's finished, that's what `aussiebb.cache` is for.
+
+Everyone waiting gets the same outcome, including any error. Callers which joined someone else's request still
+stop waiting at their own deadline (see `aussiebb.deadline`). In asyncio, the shared request runs as its own task,
+so cancelling the caller which started it doesn't cancel it for everyone else.
+
+```
+client = AussieBB(username, password, coalesce=True)  # the default
+print(client.coalescer.stats())
+```
+"""
+
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from .deadline import current_deadline, time_left
+from .exceptions import DeadlineExceeded
+
+if TYPE_CHECKING:
+    import asyncio
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict  # pylint: disable=ungrouped-imports
+
+ResultT = TypeVar("ResultT")
+
+
+class CoalescerStats(TypedDict):
+    """how many calls a `Coalescer` has seen, and how many it's saved"""
+
+    requests: int
+    coalesced: int
+    inflight: int
+
+
+class Coalescer:
+    """Joins concurrent identical calls onto one in-flight call, see the module docs.
+
+    One instance works for threads (`run`) and coroutines (`run_async`), and can be shared between clients -
+    keys include the account, so different accounts never share a response.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, "Future[Any]"] = {}
+        self._tasks: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def run(self, key: Hashable, fetch: Callable[[], ResultT]) -> ResultT:
+        """calls `fetch`, unless another thread's already fetching `key`, in which case it waits for that result"""
+        with self._lock:
+            self.requests += 1
+            future = self._futures.get(key)
+            leader = future is None
+            if future is None:
+                future = self._futures[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                result: ResultT = future.result(timeout=time_left(current_deadline()))
+            except FuturesTimeoutError as error:
+                raise DeadlineExceeded("Deadline passed while waiting for a shared request") from error
+            return result
+
+        try:
+            result = fetch()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._futures[key]
+        return result
+
+    async def run_async(self, key: Hashable, fetch: Callable[[], Awaitable[ResultT]]) -> ResultT:
+        """awaits `fetch()`, unless another coroutine's already fetching `key`, in which case it waits for that result"""
+        # imported here so the sync client doesn't load asyncio
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        with self._lock:
+            self.requests += 1
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(fetch())
+                task.add_done_callback(lambda done: self._forget(key, done))
+            else:
+                self.coalesced += 1
+
+        try:
+            result: ResultT = await asyncio.wait_for(asyncio.shield(task), time_left(current_deadline()))
+        except asyncio.TimeoutError as error:
+            if task.done() and not task.cancelled() and task.exception() is error:
+                # the request itself timed out, rather than our wait for it
+                raise
+            raise DeadlineExceeded("Deadline passed while waiting for a shared request") from error
+        return result
+
+    def _forget(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            # everyone waiting might have given up, this stops asyncio logging an unretrieved exception
+            task.exception()
+
+    def stats(self) -> CoalescerStats:
+        """how many calls went through, how many shared another call's request, and how many requests are in flight"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "inflight": len(self._futures) + len(self._tasks),
+            }
@@ -16,6 +16,15 @@ BASEURL = {
 
 DEFAULT_BACKOFF_DELAY = 90
 
+# seconds to wait for the result of a service test such as test_line_state, which the API answers once the test's run
+SERVICE_TEST_TIMEOUT = 120
+
+# bytes read at a time when streaming billing documents to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# the kinds of billing document which can be downloaded, from account_transactions
+BILLING_DOWNLOAD_TYPES = ["invoice", "receipt", "credit"]
+
 DefaultHeaders = TypedDict(
     "DefaultHeaders",
     {
@@ -154,3 +163,43 @@ PHONE_TYPES = [
 USAGE_ENABLED_SERVICE_TYPES = NBN_TYPES + PHONE_TYPES
 
 HARDWARE_TYPES = ["Hardware"]
+
+# set versions of the above for membership checks, built once rather than on every call
+KNOWN_SERVICE_TYPES = frozenset(USAGE_ENABLED_SERVICE_TYPES + HARDWARE_TYPES)
+SUPPORTED_SERVICE_TYPES = frozenset(FETCH_TYPES + NBN_TYPES + PHONE_TYPES)
+
+# which family each service type is in, for `ServiceIndex.by_family`
+SERVICE_TYPE_FAMILIES = {
+    **{service_type: "fetch" for service_type in FETCH_TYPES},
+    **{service_type: "nbn" for service_type in NBN_TYPES},
+    **{service_type: "phone" for service_type in PHONE_TYPES},
+    **{service_type: "hardware" for service_type in HARDWARE_TYPES},
+}
+
+# client methods which take a single service_id, these can be fanned out with `bulk_service_calls`
+SERVICE_METHODS = [
+    "get_fetch_service",
+    "get_service_tests",
+    "get_test_history",
+    "get_usage",
+    "get_voip_devices",
+    "get_voip_service",
+    "service_boltons",
+    "service_datablocks",
+    "service_outages",
+    "service_plans",
+    "telephony_usage",
+]
+
+# how long, in seconds, `aussiebb.cache` keeps responses for each endpoint - anything missing or zero isn't cached
+DEFAULT_CACHE_TTLS = {
+    "account_contacts": 3600,
+    "account_paymentplans": 3600,
+    "fetch_service": 3600,
+    "get_customer_details": 3600,
+    "get_order": 300,
+    "get_orders": 300,
+    "service_plans": 3600,
+    "voip_devices": 300,
+    "voip_service": 3600,
+}
@@ -0,0 +1,129 @@
+"""deadlines and timeouts for everything a client sends inside a block of code
+
+Timeouts are set at three levels:
+
+- the client - `connect_timeout`, `read_timeout` and `total_timeout` (per request, retries included) on `aussiebb.transport.TransportConfig`
+- an operation - `with deadline(30):` around `get_services`, `bulk_service_calls` or anything else, which every request
+  made inside it shares, including pages fetched on other threads or tasks
+- a call - the same `deadline()` around a single call, or `timeout=` on slow calls such as `test_line_state`
+
+Deadlines only ever get shorter when they're nested, `connect` and `read` replace the client's settings inside the block.
+Once a deadline passes, the request in flight is abandoned and `DeadlineExceeded` is raised - in asyncio it's cancelled,
+in the sync client each socket timeout is capped at the time that's left. Rate limiter and retry waits which would run past
+it aren't started.
+
+```
+from aussiebb.deadline import deadline
+with deadline(20):
+    client.get_services()
+```
+
+Deadlines are kept in a `contextvars.ContextVar`, so each thread and asyncio task has its own.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from time import monotonic
+from typing import Any, Callable, Iterator, Optional, Tuple, TypeVar
+
+from .exceptions import DeadlineExceeded
+from .transport import TransportConfig
+
+ResultT = TypeVar("ResultT")
+
+# when the innermost deadline runs out, in monotonic seconds
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("aussiebb_deadline", default=None)
+# connect and read timeouts which replace the client's, None leaves the client's alone
+_TIMEOUTS: ContextVar[Tuple[Optional[float], Optional[float]]] = ContextVar("aussiebb_timeouts", default=(None, None))
+
+
+@contextmanager
+def deadline(seconds: Optional[float] = None, connect: Optional[float] = None, read: Optional[float] = None) -> Iterator[None]:
+    """Requests made inside the block have to finish within `seconds` of entering it.
+
+    ```
+    @param seconds: float - the time allowed for everything in the block, None keeps any outer deadline
+    @param connect: float - seconds to wait for each connection to open, instead of the client's setting
+    @param read: float - seconds to wait for data on each response, instead of the client's setting
+    ```
+    """
+    until = _DEADLINE.get()
+    if seconds is not None:
+        until = monotonic() + seconds if until is None else min(until, monotonic() + seconds)
+    outer_connect, outer_read = _TIMEOUTS.get()
+    deadline_token = _DEADLINE.set(until)
+    timeouts_token = _TIMEOUTS.set((connect if connect is not None else outer_connect, read if read is not None else outer_read))
+    try:
+        yield
+    finally:
+        _TIMEOUTS.reset(timeouts_token)
+        _DEADLINE.reset(deadline_token)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """Requests made inside the block ignore any deadline and timeouts from outside it, for background work."""
+    deadline_token = _DEADLINE.set(None)
+    timeouts_token = _TIMEOUTS.set((None, None))
+    try:
+        yield
+    finally:
+        _TIMEOUTS.reset(timeouts_token)
+        _DEADLINE.reset(deadline_token)
+
+
+def current_deadline() -> Optional[float]:
+    """the monotonic time the innermost deadline runs out, None if there isn't one"""
+    return _DEADLINE.get()
+
+
+def request_deadline(total_timeout: Optional[float]) -> Optional[float]:
+    """when a request starting now has to finish, from the current deadline and the client's `total_timeout`"""
+    until = _DEADLINE.get()
+    if total_timeout is not None:
+        until = monotonic() + total_timeout if until is None else min(until, monotonic() + total_timeout)
+    return until
+
+
+def time_left(until: Optional[float]) -> Optional[float]:
+    """seconds until `until`, which is at least 0, or None if there's no deadline"""
+    if until is None:
+        return None
+    return max(until - monotonic(), 0.0)
+
+
+def expired(until: Optional[float]) -> bool:
+    """whether the deadline has passed"""
+    return until is not None and monotonic() >= until
+
+
+def check_deadline(until: Optional[float]) -> None:
+    """raises `DeadlineExceeded` if the deadline has passed"""
+    if expired(until):
+        raise DeadlineExceeded("Deadline passed before the request could be sent")
+
+
+def socket_timeouts(config: TransportConfig, until: Optional[float]) -> Tuple[Optional[float], Optional[float]]:
+    """the connect and read timeouts for the next request, capped at the time left before `until`"""
+    check_deadline(until)
+    connect, read = _TIMEOUTS.get()
+    if connect is None:
+        connect = config.connect_timeout
+    if read is None:
+        read = config.read_timeout
+    left = time_left(until)
+    if left is not None:
+        connect = left if connect is None else min(connect, left)
+        read = left if read is None else min(read, left)
+    return connect, read
+
+
+def carry_context(function: Callable[..., ResultT]) -> Callable[..., ResultT]:
+    """wraps `function` to run in a copy of the caller's context, so deadlines follow work handed to a thread pool"""
+    context = copy_context()
+
+    def run(*args: Any, **kwargs: Any) -> ResultT:
+        # each call gets its own copy, a context can't be entered by two threads at once
+        return context.copy().run(function, *args, **kwargs)
+
+    return run
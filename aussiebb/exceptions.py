@@ -27,3 +27,7 @@ class UnrecognisedServiceType(BaseException):
 
 class NoMoreData(BaseException):
     """There's no more data to pull"""
+
+
+class DeadlineExceeded(TimeoutError):
+    """a request couldn't finish before its deadline, see aussiebb.deadline"""
@@ -0,0 +1,169 @@
+"""hooks which get a timing breakdown of every request a client makes
+
+```
+def log_slow(event: RequestEvent) -> None:
+    if event["duration"] > 1:
+        print(event["endpoint"], event["status"], event["phases"])
+
+client = AussieBB(username, password, hooks=[log_slow])
+```
+
+Each call (`get_usage`, a page of `get_services`, a login...) sends one `RequestEvent` to every hook once it's finished,
+whether it worked or not. `phases` has the seconds spent in each part of it, and only has the phases which happened:
+
+- `ratelimit` - waiting for the rate limiter
+- `retry` - sleeping between retries, see `aussiebb.retry`
+- `login` - logging in first, because the cookie had expired or was rejected
+- `dns`, `connect` - resolving the host and opening a connection (including the TLS handshake, which aiohttp doesn't time
+  separately). Only the asyncio client reports these, and only if the hooks were passed when its session was built.
+- `ttfb` - from sending the request to getting the response headers, in the sync client this is `requests`' `elapsed`
+- `body` - reading the response body
+- `decode` - parsing JSON into dicts and lists
+- `validate` - parsing and validating typed responses with pydantic, which happen in one go
+
+Calls answered from the cache, or by another caller's request (see `aussiebb.coalesce`), don't have a `status`.
+A hook that raises is logged and otherwise ignored. Without any hooks, nothing's timed.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import sys
+from time import monotonic
+from typing import Callable, Dict, Iterator, List, Optional
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict
+
+PHASES = ["ratelimit", "retry", "login", "dns", "connect", "ttfb", "body", "decode", "validate"]
+
+
+class RequestEvent(TypedDict):
+    """what a hook gets once a call's finished"""
+
+    method: str
+    url: str
+    # the `API_ENDPOINTS` name, or `login`, None if the URL isn't one of them
+    endpoint: Optional[str]
+    status: Optional[int]
+    bytes: int
+    retries: int
+    duration: float
+    phases: Dict[str, float]
+    error: Optional[str]
+
+
+RequestHook = Callable[[RequestEvent], None]
+
+# the trace for the call the current thread or task is in the middle of
+_TRACE: ContextVar[Optional["RequestTrace"]] = ContextVar("aussiebb_trace", default=None)
+
+
+class RequestTrace:
+    """collects the timings for one call while it's running"""
+
+    __slots__ = ("method", "url", "endpoint", "started", "status", "bytes", "retries", "phases", "finished")
+
+    def __init__(self, method: str, url: str, endpoint: Optional[str]) -> None:
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.started = monotonic()
+        self.status: Optional[int] = None
+        self.bytes = 0
+        self.retries = 0
+        self.phases: Dict[str, float] = {}
+        self.finished = False
+
+    def add(self, phase: str, seconds: float) -> None:
+        """adds time to a phase"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_since(self, phase: str, mark: float) -> float:
+        """adds the time since `mark` (from `monotonic()`) to a phase, and returns now as the next mark"""
+        now = monotonic()
+        self.add(phase, now - mark)
+        return now
+
+    def setup_time(self) -> float:
+        """seconds spent resolving hosts and opening connections so far"""
+        return self.phases.get("dns", 0.0) + self.phases.get("connect", 0.0)
+
+    def event(self, error: Optional[BaseException] = None) -> RequestEvent:
+        """the event for the hooks"""
+        return {
+            "method": self.method,
+            "url": self.url,
+            "endpoint": self.endpoint,
+            "status": self.status,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "duration": monotonic() - self.started,
+            "phases": dict(self.phases),
+            "error": None if error is None else f"{type(error).__name__}: {error}",
+        }
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """the trace for the call in progress, None if there isn't one or it's already been sent to the hooks"""
+    trace = _TRACE.get()
+    if trace is None or trace.finished:
+        return None
+    return trace
+
+
+@contextmanager
+def trace_request(
+    hooks: List[RequestHook],
+    method: str,
+    url: str,
+    endpoint: Optional[str],
+    logger: logging.Logger,
+    separate: bool = False,
+) -> Iterator[Optional[RequestTrace]]:
+    """Times a call and sends its event to the hooks when the block's done.
+
+    Inside another call's block it times into that call's trace instead, unless `separate` is set (for logins, which
+    get an event of their own as well as the `login` phase of the call that needed them).
+    """
+    outer = current_trace()
+    if outer is not None and not separate:
+        yield outer
+        return
+    trace = RequestTrace(method, url, endpoint)
+    token = _TRACE.set(trace)
+    error: Optional[BaseException] = None
+    try:
+        yield trace
+    except BaseException as caught:
+        error = caught
+        raise
+    finally:
+        _TRACE.reset(token)
+        trace.finished = True
+        emit(hooks, trace.event(error), logger)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """adds the time spent in the block to a phase of the current call, if there is one"""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    started = monotonic()
+    try:
+        yield
+    finally:
+        trace.add(phase, monotonic() - started)
+
+
+def emit(hooks: List[RequestHook], event: RequestEvent, logger: logging.Logger) -> None:
+    """sends an event to each hook, logging any that raise"""
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Request hook %r failed: %s", hook, error)
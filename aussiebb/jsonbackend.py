@@ -0,0 +1,44 @@
+"""picks the JSON parser used for untyped responses
+
+Typed responses are validated straight from the response bytes by pydantic, so this only matters for
+`request_get_json` / `request_get_list` and the methods which return plain dicts.
+
+- `json` - the standard library, the default
+- `pydantic` - pydantic-core's parser, which is already installed and usually quicker
+- `orjson` - needs `pip install orjson`
+
+```
+client = AussieBB(username, password, json_backend="orjson")
+```
+"""
+
+import json
+from typing import Any, Callable, Union
+
+import pydantic_core
+
+JSONLoads = Callable[[bytes], Any]
+
+JSON_BACKENDS = ["json", "pydantic", "orjson"]
+
+
+def _pydantic_loads(data: bytes) -> Any:
+    return pydantic_core.from_json(data)
+
+
+def get_json_loads(backend: Union[str, JSONLoads]) -> JSONLoads:
+    """returns the parsing function for a backend name, or the function you passed in"""
+    if callable(backend):
+        return backend
+    if backend == "json":
+        return json.loads
+    if backend == "pydantic":
+        return _pydantic_loads
+    if backend == "orjson":
+        try:
+            import orjson  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError("The orjson JSON backend needs the orjson package, install it with `pip install orjson`") from error
+        loads: JSONLoads = orjson.loads
+        return loads
+    raise ValueError(f"JSON backend {backend} not known, must be one of {JSON_BACKENDS} or a function")
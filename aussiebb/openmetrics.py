@@ -0,0 +1,150 @@
+"""renders service usage and outages in the OpenMetrics text format, for `aussiebb.asyncio.exporter`
+
+Every service gets `service_id` and `service_type` labels. Broadband services (`get_usage`) report megabytes used,
+downloaded, uploaded and remaining, phone services (`telephony_usage`) report calls and cost per category, and both
+report the days left in the billing period. Outages are counted per kind (`networkEvents`, `currentNbnOutages`...).
+"""
+
+import math
+from typing import Any, Iterable, List, Mapping, Optional, Tuple, Union
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# get_usage field -> metric name, help
+BROADBAND_FIELDS = [
+    ("usedMb", "aussiebb_usage_used_megabytes", "Data used this billing period."),
+    ("downloadedMb", "aussiebb_usage_downloaded_megabytes", "Data downloaded this billing period."),
+    ("uploadedMb", "aussiebb_usage_uploaded_megabytes", "Data uploaded this billing period."),
+    ("remainingMb", "aussiebb_usage_remaining_megabytes", "Data left this billing period, for plans with a quota."),
+]
+# the telephony_usage categories which count calls (or messages)
+TELEPHONY_CATEGORIES = ["national", "mobile", "international", "sms", "voicemail", "other"]
+
+Labels = Tuple[Tuple[str, str], ...]
+Number = Union[int, float]
+
+
+def escape_label(value: str) -> str:
+    """escapes a label value, backslashes, double quotes and newlines are the only things that need it"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: Number) -> str:
+    """formats a sample value, keeping whole numbers whole"""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer() and abs(value) < 2**53:
+            return str(int(value))
+    return repr(value)
+
+
+class MetricFamily:
+    """a metric's metadata and samples"""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, unit: Optional[str] = None) -> None:
+        self.name = name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.unit = unit
+        self.samples: List[Tuple[Labels, Number]] = []
+
+    def add(self, value: Number, **labels: Any) -> None:
+        """adds a sample, label values are turned into strings"""
+        self.samples.append((tuple((key, str(label)) for key, label in labels.items()), value))
+
+    def render(self) -> List[str]:
+        """the lines for this family"""
+        lines = [f"# TYPE {self.name} {self.metric_type}"]
+        if self.unit is not None:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        lines.append(f"# HELP {self.name} {self.help_text}")
+        sample_name = f"{self.name}_total" if self.metric_type == "counter" else self.name
+        for labels, value in self.samples:
+            if labels:
+                label_text = ",".join(f'{key}="{escape_label(label)}"' for key, label in labels)
+                lines.append(f"{sample_name}{{{label_text}}} {format_value(value)}")
+            else:
+                lines.append(f"{sample_name} {format_value(value)}")
+        return lines
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    """the exposition text for some metric families, including the `# EOF` it has to end with"""
+    lines: List[str] = []
+    for family in families:
+        lines.extend(family.render())
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def _number(value: Any) -> Optional[Number]:
+    """a usage field as a number, None if it's missing or null"""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def usage_families(
+    services: Mapping[int, Mapping[str, Any]],
+    usage: Mapping[int, Mapping[str, Any]],
+    outages: Mapping[int, Mapping[str, Any]],
+) -> List[MetricFamily]:
+    """Builds the metric families for a set of services.
+
+    ```
+    @param services: service_id -> the service from `get_services`, for its labels
+    @param usage: service_id -> the `get_usage` (or `telephony_usage`) response
+    @param outages: service_id -> the `service_outages` response
+    ```
+    """
+    broadband = {name: MetricFamily(name, "gauge", help_text, "megabytes") for _, name, help_text in BROADBAND_FIELDS}
+    days_total = MetricFamily("aussiebb_billing_period_days", "gauge", "Days in the current billing period.")
+    days_remaining = MetricFamily("aussiebb_billing_period_days_remaining", "gauge", "Days left in the current billing period.")
+    calls = MetricFamily("aussiebb_telephony_calls", "gauge", "Calls (or messages) this billing period, by category.")
+    cost = MetricFamily("aussiebb_telephony_cost_dollars", "gauge", "Call and data charges this billing period, by category.", "dollars")
+    kilobytes = MetricFamily("aussiebb_telephony_internet_kilobytes", "gauge", "Mobile data used this billing period.", "kilobytes")
+    outage_counts = MetricFamily("aussiebb_outages", "gauge", "Outages and network events affecting the service, by kind.")
+
+    for service_id in sorted(usage):
+        data = usage[service_id]
+        labels = {"service_id": service_id, "service_type": services.get(service_id, {}).get("type", "")}
+        for field, name, _ in BROADBAND_FIELDS:
+            value = _number(data.get(field))
+            if value is not None:
+                broadband[name].add(value, **labels)
+        for category in TELEPHONY_CATEGORIES + ["internet"]:
+            details = data.get(category)
+            if not isinstance(details, Mapping):
+                continue
+            if category == "internet":
+                value = _number(details.get("kbytes"))
+                if value is not None:
+                    kilobytes.add(value, **labels)
+            else:
+                value = _number(details.get("calls"))
+                if value is not None:
+                    calls.add(value, category=category, **labels)
+            value = _number(details.get("cost"))
+            if value is not None:
+                cost.add(value, category=category, **labels)
+        for field, family in (("daysTotal", days_total), ("daysRemaining", days_remaining)):
+            value = _number(data.get(field))
+            if value is not None:
+                family.add(value, **labels)
+
+    for service_id in sorted(outages):
+        labels = {"service_id": service_id, "service_type": services.get(service_id, {}).get("type", "")}
+        for kind, events in sorted(outages[service_id].items()):
+            if isinstance(events, list):
+                outage_counts.add(len(events), kind=kind, **labels)
+
+    return [*broadband.values(), days_total, days_remaining, calls, cost, kilobytes, outage_counts]
+
@@ -0,0 +1,84 @@
+"""walks the pages of a paginated endpoint, following `links.next`
+
+Both clients build their `iter_*` methods on these. Pages are fetched as they're needed, so only the page being
+read (and with `prefetch`, the one after it) is held in memory, however many pages there are.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+from .deadline import carry_context
+from .types import PaginatedResponse
+
+if TYPE_CHECKING:
+    import asyncio
+
+PageT = TypeVar("PageT", bound=PaginatedResponse[Any])
+
+Params = Optional[Dict[str, Any]]
+
+
+def next_page_url(page: PaginatedResponse[Any]) -> Optional[str]:
+    """the URL of the page after this one, None if it's the last"""
+    if page.links.next is None or page.meta["current_page"] >= page.meta["last_page"]:
+        return None
+    return page.links.next
+
+
+def iter_pages(fetch: Callable[[str, Params], PageT], url: str, params: Params = None, prefetch: bool = False) -> Iterator[PageT]:
+    """Yields each page from `fetch(url, params)`, then the pages after it.
+
+    With `prefetch`, the next page is requested on a background thread while the caller works through this one.
+    """
+    if not prefetch:
+        next_url: Optional[str] = url
+        while next_url is not None:
+            page = fetch(next_url, params)
+            params = None  # the next link carries its own query
+            yield page
+            next_url = next_page_url(page)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aussiebb-prefetch")
+    # so the prefetching thread's requests share the caller's deadline
+    fetch = carry_context(fetch)
+    pending: Optional[Future[PageT]] = executor.submit(fetch, url, params)
+    try:
+        while pending is not None:
+            page = pending.result()
+            next_url = next_page_url(page)
+            pending = executor.submit(fetch, next_url, None) if next_url is not None else None
+            yield page
+    finally:
+        # the caller stopped early, don't wait for a page nobody wants
+        if pending is not None:
+            pending.cancel()
+        executor.shutdown(wait=False)
+
+
+async def aiter_pages(fetch: Callable[[str, Params], Awaitable[PageT]], url: str, params: Params = None, prefetch: bool = False) -> AsyncIterator[PageT]:
+    """Yields each page from `await fetch(url, params)`, then the pages after it.
+
+    With `prefetch`, the next page is requested in a task while the caller works through this one.
+    """
+    if not prefetch:
+        next_url: Optional[str] = url
+        while next_url is not None:
+            page = await fetch(next_url, params)
+            params = None
+            yield page
+            next_url = next_page_url(page)
+        return
+
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    pending: Optional["asyncio.Future[PageT]"] = asyncio.ensure_future(fetch(url, params))
+    try:
+        while pending is not None:
+            page = await pending
+            next_url = next_page_url(page)
+            pending = asyncio.ensure_future(fetch(next_url, None)) if next_url is not None else None
+            yield page
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
@@ -0,0 +1,159 @@
+"""runs many accounts from one process, sharing a connection pool between them"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from .client import AussieBB
+from .const import SERVICE_METHODS
+from .deadline import carry_context
+from .transport import TransportConfig, TransportStats, build_http_adapter, build_requests_session, http_adapter_stats
+from .types import AccountResult, AussieBBConfigFile, BulkServiceResult, ConfigUser
+from .utils import round_robin
+
+Operation = Union[str, Callable[[AussieBB], Any]]
+
+
+class AussieBBPool:
+    """A set of clients, one per account, which share one connection pool.
+
+    Each account gets its own `requests.Session` (so cookies don't leak between accounts), login state and rate limiter,
+    but the sessions share an `HTTPAdapter` and so its urllib3 pools. Calls across accounts are queued round-robin
+    on a thread pool, so one account with lots of services doesn't hold everyone else up.
+
+    ```
+    @param accounts: the accounts to log in as, `AussieBBConfigFile.users` is the usual source
+    @param transport: aussiebb.transport.TransportConfig - sizes the shared connection pool
+    @param concurrency: int - threads running calls, across every account
+    @param client_kwargs: passed to each `AussieBB`, eg. `cache` or `token_store`
+    ```
+
+    Example:
+
+    ```
+    with AussieBBPool.from_config(config) as pool:
+        results = pool.run("get_customer_details")
+    ```
+    """
+
+    def __init__(
+        self,
+        accounts: Iterable[ConfigUser],
+        transport: Optional[TransportConfig] = None,
+        concurrency: int = 8,
+        **client_kwargs: Any,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.transport = transport if transport is not None else TransportConfig()
+        self.concurrency = concurrency
+        self.adapter = build_http_adapter(self.transport)
+
+        self.clients: Dict[str, AussieBB] = {}
+        for account in accounts:
+            if account.username in self.clients:
+                raise ValueError(f"Account {account.username} is in the pool more than once")
+            session = build_requests_session(self.transport, self.adapter)
+            self.clients[account.username] = AussieBB(account.username, account.password, session=session, **client_kwargs)
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="aussiebb-pool")
+
+    @classmethod
+    def from_config(cls, config: AussieBBConfigFile, **kwargs: Any) -> "AussieBBPool":
+        """builds a pool from the users in a config file"""
+        return cls(config.users, **kwargs)
+
+    def __enter__(self) -> "AussieBBPool":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """stops the threads, including any background token refreshers, and closes the shared connection pool"""
+        self._executor.shutdown(wait=True)
+        for client in self.clients.values():
+            client.stop_token_refresh()
+        self.adapter.close()
+
+    def transport_stats(self) -> TransportStats:
+        """connection pool counters, across every account"""
+        return http_adapter_stats([self.adapter])
+
+    def _usernames(self, usernames: Optional[Iterable[str]]) -> List[str]:
+        if usernames is None:
+            return list(self.clients)
+        usernames = list(usernames)
+        for username in usernames:
+            if username not in self.clients:
+                raise ValueError(f"Account {username} isn't in the pool")
+        return usernames
+
+    def _call(self, username: str, operation: Operation, *args: Any) -> Any:
+        """runs one call for an account"""
+        client = self.clients[username]
+        if isinstance(operation, str):
+            return getattr(client, operation)(*args)
+        return operation(client, *args)
+
+    def _call_safely(self, username: str, operation: Operation, *args: Any) -> Tuple[Any, Optional[BaseException]]:
+        """runs one call, returning the error instead of raising it"""
+        try:
+            return self._call(username, operation, *args), None
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        # the module's exceptions are BaseExceptions, and they're exactly what should be recorded against the account
+        except BaseException as error:  # pylint: disable=broad-except
+            self.clients[username].logger.debug("Pool call for %s failed: %s", username, error)
+            return None, error
+
+    def run(self, operation: Operation, usernames: Optional[Iterable[str]] = None) -> Dict[str, AccountResult]:
+        """Runs a call for every account (or those in `usernames`) concurrently.
+
+        `operation` is the name of a client method which takes no arguments, or a function which takes the client.
+        A failed call is returned with its `error` set rather than cancelling the rest.
+        """
+        selected = self._usernames(usernames)
+        # each call runs in a copy of the caller's context, so a deadline around `run` covers them all
+        call_safely = carry_context(self._call_safely)
+        futures = {username: self._executor.submit(call_safely, username, operation) for username in selected}
+        results: Dict[str, AccountResult] = {}
+        for username, future in futures.items():
+            result, error = future.result()
+            results[username] = AccountResult(username=username, result=result, error=error)
+        return results
+
+    def run_service_calls(
+        self,
+        methods: Iterable[str] = ("get_usage",),
+        usernames: Optional[Iterable[str]] = None,
+    ) -> Dict[str, AccountResult]:
+        """Runs per-service calls for every service on every account, interleaving the accounts.
+
+        Each account's `result` is a list of `BulkServiceResult`, its `error` is set if its services couldn't be listed.
+        """
+        methods = list(methods)
+        for method in methods:
+            if method not in SERVICE_METHODS:
+                raise ValueError(f"Method {method} can't be used for bulk service calls, must be one of {SERVICE_METHODS}")
+
+        results = self.run(lambda client: client.get_services(use_cached=True), usernames)
+
+        calls: Dict[str, List[Tuple[int, str]]] = {}
+        for username, result in results.items():
+            if result.ok:
+                calls[username] = [(service["service_id"], method) for service in result.result or [] for method in methods]
+
+        # one call from each account in turn, the executor runs them in the order they're queued
+        call_safely = carry_context(self._call_safely)
+        futures = [
+            (username, service_id, method, self._executor.submit(call_safely, username, method, service_id))
+            for username, (service_id, method) in round_robin(calls)
+        ]
+        service_results: Dict[str, List[BulkServiceResult]] = {username: [] for username in calls}
+        for username, service_id, method, future in futures:
+            value, error = future.result()
+            service_results[username].append(BulkServiceResult(service_id=service_id, method=method, result=value, error=error))
+
+        for username, account_results in service_results.items():
+            results[username] = AccountResult(username=username, result=account_results)
+        return results
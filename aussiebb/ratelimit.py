@@ -0,0 +1,239 @@
+"""adaptive rate limiting, driven by the X-RateLimit-* headers the API sends back"""
+
+import math
+import sys
+import threading
+from time import monotonic, sleep, time
+from typing import Mapping, Optional
+
+from .const import DEFAULT_BACKOFF_DELAY
+from .exceptions import DeadlineExceeded
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict
+
+
+class RateLimiterStats(TypedDict):
+    """snapshot of what a `RateLimiter` has seen and done"""
+
+    requests: int
+    throttled_requests: int
+    throttled_seconds: float
+    rate_limited_responses: int
+    limit: Optional[int]
+    remaining: Optional[int]
+    window: float
+
+
+class RateLimiter:
+    """Token bucket which learns the request budget from response headers and paces requests before they're sent.
+
+    One instance can be shared between clients, threads and coroutines - everyone sharing it shares the budget.
+
+    - `X-RateLimit-Limit` sets the bucket size, `X-RateLimit-Remaining` keeps our view in line with the server's.
+    - `X-RateLimit-Reset` tells us when the window ends, so the bucket refills all at once when the server's does.
+      Without it, the bucket refills steadily over `window` seconds.
+    - A 429 (with `Retry-After`, or an explicit `block_for`) pauses everyone sharing the limiter.
+
+    ```
+    @param limit: int - requests per window, if known up front, otherwise learnt from the headers
+    @param window: float - seconds per rate limit window, refined from the headers
+    @param reserve: int - requests to leave unused in each window, for other clients on the account
+    ```
+    """
+
+    def __init__(self, limit: Optional[int] = None, window: float = 60.0, reserve: int = 0):
+        self._lock = threading.Lock()
+        self.limit = limit
+        self.window = window
+        self.reserve = reserve
+
+        self._tokens = math.inf if limit is None else float(self.capacity)
+        self._updated = monotonic()
+        self._reset_at: Optional[float] = None
+        self._blocked_until = 0.0
+        self._remaining: Optional[int] = None
+
+        self.requests = 0
+        self.throttled_requests = 0
+        self.throttled_seconds = 0.0
+        self.rate_limited_responses = 0
+
+    @property
+    def capacity(self) -> int:
+        """how many requests we'll send per window"""
+        if self.limit is None:
+            return sys.maxsize
+        return max(self.limit - self.reserve, 1)
+
+    def _refill(self, now: float) -> None:
+        """tops up the bucket for the time since we last looked, must hold the lock"""
+        if self.limit is not None:
+            if self._reset_at is not None:
+                if now >= self._reset_at:
+                    windows = math.floor((now - self._reset_at) / self.window) + 1
+                    self._tokens = min(float(self.capacity), self._tokens + windows * self.capacity)
+                    self._reset_at += windows * self.window
+            else:
+                rate = self.capacity / self.window
+                self._tokens = min(float(self.capacity), self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+    def _try_acquire(self) -> float:
+        """takes a slot if there's one free and returns 0, otherwise returns how long until it's worth trying again"""
+        with self._lock:
+            now = monotonic()
+            self._refill(now)
+            if self._blocked_until > now:
+                return self._blocked_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.requests += 1
+                return 0.0
+            if self._reset_at is not None:
+                return max(self._reset_at - now, 0.001)
+            return (1 - self._tokens) * self.window / self.capacity
+
+    def acquire(self, max_wait: Optional[float] = None) -> float:
+        """blocks the current thread until a request can be sent, returns the time spent waiting
+
+        Raises `DeadlineExceeded` rather than waiting more than `max_wait` seconds.
+        """
+        waited = 0.0
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                break
+            self._check_wait(waited + wait, max_wait)
+            sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+        return waited
+
+    async def acquire_async(self, max_wait: Optional[float] = None) -> float:
+        """waits without blocking the event loop until a request can be sent, returns the time spent waiting
+
+        Raises `DeadlineExceeded` rather than waiting more than `max_wait` seconds.
+        """
+        # imported here so the sync client doesn't load asyncio, it's already loaded by the time this runs
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        waited = 0.0
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                break
+            self._check_wait(waited + wait, max_wait)
+            await asyncio.sleep(wait)
+            waited += wait
+        self._record_wait(waited)
+        return waited
+
+    def _check_wait(self, wait: float, max_wait: Optional[float]) -> None:
+        if max_wait is not None and wait > max_wait:
+            raise DeadlineExceeded(f"The rate limiter would hold the request for {wait:.1f} seconds, past its deadline")
+
+    def _record_wait(self, waited: float) -> None:
+        if waited > 0:
+            with self._lock:
+                self.throttled_requests += 1
+                self.throttled_seconds += waited
+
+    def _blocked_wait(self) -> float:
+        """how long until we're unblocked, counted as throttled time"""
+        with self._lock:
+            wait = max(self._blocked_until - monotonic(), 0.0)
+            if wait > 0:
+                self.throttled_seconds += wait
+            return wait
+
+    def wait(self) -> None:
+        """blocks the current thread until any 429 backoff has passed, without taking a slot"""
+        wait = self._blocked_wait()
+        if wait > 0:
+            sleep(wait)
+
+    async def wait_async(self) -> None:
+        """waits until any 429 backoff has passed, without taking a slot"""
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        wait = self._blocked_wait()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def blocked_for(self) -> float:
+        """seconds until any 429 backoff has passed"""
+        with self._lock:
+            return max(self._blocked_until - monotonic(), 0.0)
+
+    def block_for(self, seconds: float) -> None:
+        """stops everyone sharing this limiter from sending anything for `seconds`"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, monotonic() + seconds)
+
+    def update(self, headers: Mapping[str, str], status: int = 200) -> None:
+        """learns from the headers of a response"""
+        limit_header = headers.get("X-RateLimit-Limit")
+        remaining_header = headers.get("X-RateLimit-Remaining")
+        reset_header = headers.get("X-RateLimit-Reset")
+        retry_after = headers.get("Retry-After")
+
+        with self._lock:
+            now = monotonic()
+            self._refill(now)
+
+            # seconds until the window resets, the header's an epoch time but handle a relative value too
+            reset_in: Optional[float] = None
+            if reset_header is not None and reset_header.strip().isdigit():
+                reset_in = float(reset_header)
+                if reset_in > 1_000_000_000:
+                    reset_in -= time()
+                reset_in = max(reset_in, 0.0)
+
+            if limit_header is not None and limit_header.strip().isdigit():
+                self.limit = int(limit_header)
+            if remaining_header is not None and remaining_header.strip().lstrip("-").isdigit():
+                remaining = int(remaining_header)
+                self._remaining = remaining
+                if self.limit is None or remaining + 1 > self.limit:
+                    self.limit = remaining + 1
+                self._sync_window(now, remaining, reset_in)
+
+            if status == 429:
+                self.rate_limited_responses += 1
+                delay: float = DEFAULT_BACKOFF_DELAY
+                if retry_after is not None and retry_after.strip().isdigit():
+                    delay = float(retry_after)
+                elif reset_in is not None:
+                    delay = reset_in
+                self._blocked_until = max(self._blocked_until, now + delay)
+
+    def _sync_window(self, now: float, remaining: int, reset_in: Optional[float]) -> None:
+        """brings our bucket into line with what the server says is left, must hold the lock"""
+        if reset_in is not None:
+            reset_at = now + reset_in
+            if self._reset_at is not None and reset_at < self._reset_at - 0.5:
+                # a late response from a window we've already moved past
+                return
+            if remaining == (self.limit or 0) - 1 and reset_in >= 1:
+                # first request of a fresh window, so the reset time tells us how long a window is
+                self.window = reset_in
+            self._reset_at = reset_at
+        self._refill(now)
+        # the server's count wins if it's lower than ours, someone else might be using the account
+        self._tokens = min(self._tokens, float(remaining - self.reserve))
+
+    def stats(self) -> RateLimiterStats:
+        """returns the current metrics"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled_requests": self.throttled_requests,
+                "throttled_seconds": self.throttled_seconds,
+                "rate_limited_responses": self.rate_limited_responses,
+                "limit": self.limit,
+                "remaining": self._remaining,
+                "window": self.window,
+            }
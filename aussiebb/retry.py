@@ -0,0 +1,169 @@
+"""decides which failed requests are sent again, and how long to wait first
+
+Both clients retry inside `_send`, so every request goes through the same policy. A failure is one of
+
+- `connect` - the connection couldn't be opened, so the server never saw the request
+- `connection` - the connection dropped or timed out after the request might have been sent
+- `rate_limit` - a 429, the server turned the request away without acting on it
+- `server` - a 5xx in `retry_statuses`
+
+`connect` and `rate_limit` failures are retried for any method. `connection` and `server` failures are only retried
+for idempotent methods, since a POST which timed out might have gone through. Waits use decorrelated jitter
+(each one is picked between `base_delay` and three times the last, capped at `max_delay`), and a 429 waits at least
+as long as the rate limiter is blocked for. Once `max_attempts` requests have been sent, or the next wait would run past
+`budget` seconds since the first attempt (or the request's deadline, see `aussiebb.deadline`), the last response is
+returned (or the last error raised) as it is.
+
+```
+client = AussieBB(username, password, retry=RetryPolicy(max_attempts=6, budget=300))
+```
+"""
+
+import random
+import sys
+import threading
+from time import monotonic
+from typing import Iterable, Optional
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict  # pylint: disable=ungrouped-imports
+
+RETRY_REASONS = ["connect", "connection", "rate_limit", "server"]
+
+# methods which can safely be sent twice
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+
+class RetryStats(TypedDict):
+    """what a `RetryPolicy` has retried, and when it's given up"""
+
+    retries: int
+    retry_seconds: float
+    gave_up: int
+    connect: int
+    connection: int
+    rate_limit: int
+    server: int
+
+
+class RetryPolicy:
+    """How a client retries failed requests, see the module docs. One policy can be shared between clients.
+
+    ```
+    @param max_attempts: int - most times a request is sent, including the first, 1 turns retries off
+    @param base_delay: float - shortest wait between attempts, in seconds
+    @param max_delay: float - longest wait between attempts, in seconds
+    @param budget: float - seconds from the first attempt after which nothing more is retried
+    @param retry_statuses: 5xx status codes worth retrying, 429s are always retried
+    @param rng: random.Random - the source of jitter, pass a seeded one for repeatable waits
+    ```
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        budget: float = 120.0,
+        retry_statuses: Iterable[int] = (500, 502, 503, 504),
+        rng: Optional[random.Random] = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError("base_delay must be at least 0 and no more than max_delay")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retry_statuses = frozenset(retry_statuses)
+        self.rng = rng if rng is not None else random.Random()
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.retry_seconds = 0.0
+        self.gave_up = 0
+        self.reasons = dict.fromkeys(RETRY_REASONS, 0)
+
+    def status_reason(self, status: int) -> Optional[str]:
+        """why a response with this status is worth retrying, None if it isn't"""
+        if status == 429:
+            return "rate_limit"
+        if status in self.retry_statuses:
+            return "server"
+        return None
+
+    @staticmethod
+    def retryable(method: str, reason: str) -> bool:
+        """whether a request with this method can be sent again after this kind of failure"""
+        if reason in ("connect", "rate_limit"):
+            return True
+        return method.upper() in IDEMPOTENT_METHODS
+
+    def jitter(self, previous: float) -> float:
+        """the next wait after waiting `previous` seconds, by decorrelated jitter"""
+        with self._lock:
+            delay = self.rng.uniform(self.base_delay, max(previous, self.base_delay) * 3)
+        return min(delay, self.max_delay)
+
+    def start(self, method: str, until: Optional[float] = None) -> "RetryState":
+        """starts tracking the attempts of one request, which has to be done by the monotonic time `until`"""
+        return RetryState(self, method, until)
+
+    def _record(self, reason: str, delay: Optional[float]) -> None:
+        with self._lock:
+            if delay is None:
+                self.gave_up += 1
+            else:
+                self.retries += 1
+                self.retry_seconds += delay
+                self.reasons[reason] += 1
+
+    def stats(self) -> RetryStats:
+        """how many requests were retried and why, and how many ran out of attempts or time"""
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "retry_seconds": self.retry_seconds,
+                "gave_up": self.gave_up,
+                "connect": self.reasons["connect"],
+                "connection": self.reasons["connection"],
+                "rate_limit": self.reasons["rate_limit"],
+                "server": self.reasons["server"],
+            }
+
+
+class RetryState:
+    """the attempts made so far at one request, from `RetryPolicy.start`"""
+
+    def __init__(self, policy: RetryPolicy, method: str, until: Optional[float] = None):
+        self.policy = policy
+        self.method = method
+        self.until = until
+        self.attempts = 1
+        self.started = monotonic()
+        self._previous = policy.base_delay
+
+    def next_delay(self, reason: Optional[str], minimum: float = 0.0) -> Optional[float]:
+        """how long to wait before sending the request again, None if it shouldn't be
+
+        ```
+        @param reason: str - what went wrong, from `RetryPolicy.status_reason` or the transport, None if nothing did
+        @param minimum: float - wait at least this long, eg. until the rate limiter's unblocked
+        ```
+        """
+        if reason is None:
+            return None
+        if not self.policy.retryable(self.method, reason):
+            return None
+        delay = max(self.policy.jitter(self._previous), minimum)
+        now = monotonic()
+        out_of_time = now - self.started + delay > self.policy.budget or (self.until is not None and now + delay >= self.until)
+        if self.attempts >= self.policy.max_attempts or out_of_time:
+            self.policy._record(reason, None)  # pylint: disable=protected-access
+            return None
+        self._previous = delay
+        self.attempts += 1
+        self.policy._record(reason, delay)  # pylint: disable=protected-access
+        return delay
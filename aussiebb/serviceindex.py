@@ -0,0 +1,90 @@
+"""indexes an account's services, so lookups don't scan the whole list"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from .const import SERVICE_TYPE_FAMILIES
+
+
+class ServiceIndex:
+    """Services from `get_services`, indexed by service_id, type and type family.
+
+    `update` applies a new list of services by working out what changed, so a refresh which only touches
+    a few services only moves those between the type buckets, and `updated` does the same to a copy.
+    Results keep the order of the original list.
+    """
+
+    def __init__(self, services: Iterable[Dict[str, Any]] = ()):
+        self._by_id: Dict[Any, Dict[str, Any]] = {}
+        self._position: Dict[Any, int] = {}
+        # type -> {service_id: service}, dicts keep insertion order and give O(1) removal
+        self._by_type: Dict[Optional[str], Dict[Any, Dict[str, Any]]] = {}
+        self.update(services)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, service_id: object) -> bool:
+        return service_id in self._by_id
+
+    def _add(self, service_id: Any, service: Dict[str, Any]) -> None:
+        self._by_id[service_id] = service
+        self._by_type.setdefault(service.get("type"), {})[service_id] = service
+
+    def _remove(self, service_id: Any) -> None:
+        service = self._by_id.pop(service_id)
+        bucket = self._by_type[service.get("type")]
+        del bucket[service_id]
+        if not bucket:
+            del self._by_type[service.get("type")]
+
+    def update(self, services: Iterable[Dict[str, Any]]) -> None:
+        """replaces the indexed services with these, only touching the ones which changed"""
+        position: Dict[Any, int] = {}
+        for index, service in enumerate(services):
+            service_id = service.get("service_id")
+            position[service_id] = index
+            existing = self._by_id.get(service_id)
+            if existing is service:
+                continue
+            if existing is not None and existing.get("type") == service.get("type"):
+                # same bucket, just swap in the new data
+                self._by_id[service_id] = service
+                self._by_type[service.get("type")][service_id] = service
+                continue
+            if existing is not None:
+                self._remove(service_id)
+            self._add(service_id, service)
+
+        for service_id in [service_id for service_id in self._by_id if service_id not in position]:
+            self._remove(service_id)
+        self._position = position
+
+    def updated(self, services: Iterable[Dict[str, Any]]) -> "ServiceIndex":
+        """a copy of the index with `update` applied, leaving this one as it was for anyone still reading it"""
+        index = ServiceIndex()
+        index._by_id = dict(self._by_id)
+        index._by_type = {service_type: dict(bucket) for service_type, bucket in self._by_type.items()}
+        index.update(services)
+        return index
+
+    def get(self, service_id: Any) -> Optional[Dict[str, Any]]:
+        """the service with this ID, or None"""
+        return self._by_id.get(service_id)
+
+    def types(self) -> List[Optional[str]]:
+        """the service types on the account, None if some services don't have one"""
+        return list(self._by_type)
+
+    def _ordered(self, buckets: Iterable[Dict[Any, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """merges type buckets back into the order of the original list, the sort's linear if they're already in order"""
+        merged = [(self._position[service_id], service) for bucket in buckets for service_id, service in bucket.items()]
+        merged.sort(key=lambda item: item[0])
+        return [service for _, service in merged]
+
+    def by_type(self, *service_types: Optional[str]) -> List[Dict[str, Any]]:
+        """services of any of these types"""
+        return self._ordered(self._by_type[service_type] for service_type in set(service_types) if service_type in self._by_type)
+
+    def by_family(self, *families: str) -> List[Dict[str, Any]]:
+        """services in any of these families - `nbn`, `phone`, `fetch` or `hardware`, see `SERVICE_TYPE_FAMILIES`"""
+        return self.by_type(*[service_type for service_type in self._by_type if SERVICE_TYPE_FAMILIES.get(service_type or "") in families])
@@ -0,0 +1,108 @@
+"""logs in again in the background before the login cookie expires, so requests never wait for a login
+
+```
+client = AussieBB(username, password, token_refresh_margin=300)
+print(client.token_refresh.stats())
+```
+
+With `token_refresh_margin` set, the client starts a refresher (a daemon thread in the sync client, a task in the
+asyncio one) the first time it checks its login. The refresher logs in again `token_refresh_margin` seconds before the
+cookie expires, or halfway through its life if that's later, and swaps the new cookie in while requests keep using the
+old one. If a refresh fails, it tries again with a growing backoff until the cookie runs out, after which the next
+request logs in as usual.
+
+`inline_logins` counts the logins that requests had to wait for - once the refresher's running, it should stop going up.
+"""
+
+import sys
+import threading
+from time import monotonic, time
+from typing import Optional
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict
+
+# how long the refresher sleeps at most, so it notices a login made some other way
+TOKEN_REFRESH_POLL = 30.0
+# the longest it waits between attempts after a refresh fails
+TOKEN_REFRESH_MAX_BACKOFF = 60.0
+
+
+class TokenRefreshStats(TypedDict):
+    """how the background token refresher's been doing"""
+
+    refreshes: int
+    failures: int
+    consecutive_failures: int
+    inline_logins: int
+    last_duration: Optional[float]
+    total_duration: float
+    last_refresh: Optional[float]
+    last_error: Optional[str]
+
+
+def refresh_due(issued: float, expires: float, margin: float) -> float:
+    """the epoch time a cookie issued at `issued` should be replaced, `margin` seconds before it expires but not before halfway"""
+    return max(issued + (expires - issued) / 2, expires - margin)
+
+
+class TokenRefreshMetrics:
+    """counts refreshes and their failures, shared between the refresher and the requests checking the login"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.inline_logins = 0
+        self.last_duration: Optional[float] = None
+        self.total_duration = 0.0
+        self.last_refresh: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._last_failure = 0.0
+
+    def succeeded(self, duration: float) -> None:
+        """records a refresh which took `duration` seconds"""
+        with self._lock:
+            self.refreshes += 1
+            self.consecutive_failures = 0
+            self.last_duration = duration
+            self.total_duration += duration
+            self.last_refresh = time()
+
+    def failed(self, error: BaseException) -> None:
+        """records a refresh which didn't get a new cookie"""
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            self._last_failure = monotonic()
+
+    def inline_login(self) -> None:
+        """records a login that a request had to wait for"""
+        with self._lock:
+            self.inline_logins += 1
+
+    def backoff(self) -> float:
+        """seconds until the refresher should try again after failing, 0 if the last attempt worked"""
+        with self._lock:
+            if not self.consecutive_failures:
+                return 0.0
+            delay = min(2.0 ** (self.consecutive_failures - 1), TOKEN_REFRESH_MAX_BACKOFF)
+            return max(self._last_failure + delay - monotonic(), 0.0)
+
+    def stats(self) -> TokenRefreshStats:
+        """a snapshot of the counters"""
+        with self._lock:
+            return {
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "inline_logins": self.inline_logins,
+                "last_duration": self.last_duration,
+                "total_duration": self.total_duration,
+                "last_refresh": self.last_refresh,
+                "last_error": self.last_error,
+            }
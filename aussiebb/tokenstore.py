@@ -0,0 +1,143 @@
+"""keeps login cookies between processes, so a new client can skip the login round trip
+
+```
+from aussiebb.tokenstore import FileTokenStore
+client = AussieBB(username, password, token_store=FileTokenStore("~/.config/aussiebb/tokens.json"))
+```
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import sys
+import tempfile
+import threading
+from time import time
+from typing import Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows doesn't have it, so we only lock between threads there
+    fcntl = None  # type: ignore[assignment]
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict
+
+
+class StoredToken(TypedDict):
+    """a login cookie and when it stops being useful"""
+
+    cookie: str
+    expires: float
+
+
+class TokenStore(ABC):
+    """Base class for token stores, subclass it to keep them somewhere else."""
+
+    @abstractmethod
+    def load(self, username: str) -> Optional[StoredToken]:
+        """returns the stored token for the user, or None if there isn't one that's still valid"""
+
+    @abstractmethod
+    def save(self, username: str, token: StoredToken) -> None:
+        """stores the token for the user"""
+
+    @abstractmethod
+    def clear(self, username: str) -> None:
+        """forgets the token for the user"""
+
+
+class MemoryTokenStore(TokenStore):
+    """keeps tokens in-process, for sharing between clients"""
+
+    def __init__(self) -> None:
+        self._tokens: Dict[str, StoredToken] = {}
+        self._lock = threading.Lock()
+
+    def load(self, username: str) -> Optional[StoredToken]:
+        with self._lock:
+            token = self._tokens.get(username)
+        if token is None or token["expires"] <= time():
+            return None
+        return token
+
+    def save(self, username: str, token: StoredToken) -> None:
+        with self._lock:
+            self._tokens[username] = token
+
+    def clear(self, username: str) -> None:
+        with self._lock:
+            self._tokens.pop(username, None)
+
+
+class FileTokenStore(TokenStore):
+    """Keeps tokens in a JSON file, keyed on username.
+
+    The file's only readable by the owner, and writes take an exclusive lock on a `.lock` file next to it
+    so several processes can share it.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path).expanduser()
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """holds the lock between threads, and between processes where we can"""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with self.lock_path.open("a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, StoredToken]:
+        """reads the file, a missing or broken one is treated as empty"""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def _write(self, data: Dict[str, StoredToken]) -> None:
+        """writes the file somewhere else and moves it into place, so readers never see half of it"""
+        file_descriptor, temp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}-")
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as file_handle:
+                json.dump(data, file_handle)
+            os.chmod(temp_name, 0o600)
+            os.replace(temp_name, self.path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+    def load(self, username: str) -> Optional[StoredToken]:
+        with self._locked(exclusive=False):
+            token = self._read().get(username)
+        if token is None or float(token.get("expires", 0)) <= time() or not token.get("cookie"):
+            return None
+        return token
+
+    def save(self, username: str, token: StoredToken) -> None:
+        with self._locked(exclusive=True):
+            data = self._read()
+            data[username] = token
+            self._write(data)
+
+    def clear(self, username: str) -> None:
+        with self._locked(exclusive=True):
+            data = self._read()
+            if data.pop(username, None) is not None:
+                self._write(data)
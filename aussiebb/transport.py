@@ -0,0 +1,146 @@
+"""connection pool settings for the HTTP sessions the clients build
+
+```
+from aussiebb.transport import TransportConfig
+client = AussieBB(username, password, transport=TransportConfig(pool_maxsize=64))
+print(client.transport_stats())
+```
+"""
+
+import sys
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+# requests is only imported when the sync client builds a session, so the asyncio client doesn't pay for it
+if TYPE_CHECKING:
+    import requests
+    from requests.adapters import BaseAdapter, HTTPAdapter
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict
+
+
+class TransportConfig(BaseModel):
+    """Connection pool settings, the defaults are sized for fanning out over lots of services.
+
+    ```
+    @param limit: int - most connections open at once, across all hosts (asyncio client)
+    @param limit_per_host: int - most connections open at once to one host (asyncio client)
+    @param keepalive_timeout: float - seconds an idle connection is kept for reuse (asyncio client)
+    @param ttl_dns_cache: int - seconds to cache DNS lookups for, None caches them forever (asyncio client)
+    @param use_dns_cache: bool - set to False to look up the host for every new connection (asyncio client)
+    @param pool_connections: int - how many hosts to keep a pool for (sync client)
+    @param pool_maxsize: int - connections kept per host, threads beyond this open throwaway connections (sync client)
+    @param pool_block: bool - make threads wait for a pooled connection instead of opening throwaway ones (sync client)
+    @param connect_timeout: float - seconds to wait for a connection to open, None waits forever
+    @param read_timeout: float - seconds to wait for data on a response, None waits forever
+    @param total_timeout: float - seconds a request can take, including its retries, None has no limit
+    ```
+
+    See `aussiebb.deadline` for setting timeouts on a block of code.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+    limit: int = 100
+    limit_per_host: int = 32
+    keepalive_timeout: float = 30.0
+    ttl_dns_cache: Optional[int] = 300
+    use_dns_cache: bool = True
+    pool_connections: int = 4
+    pool_maxsize: int = 32
+    pool_block: bool = False
+    connect_timeout: Optional[float] = 10.0
+    read_timeout: Optional[float] = 60.0
+    total_timeout: Optional[float] = None
+
+
+class TransportStats(TypedDict):
+    """what the connection pool has been up to"""
+
+    requests: int
+    connections_opened: int
+    connections_reused: int
+    # callers waiting for a free connection right now, and how many have had to wait in total
+    waiting: int
+    waited: int
+
+
+def build_http_adapter(config: TransportConfig) -> "HTTPAdapter":
+    """builds an `HTTPAdapter` sized from the config, it can be mounted on several sessions to share its pool"""
+    from requests.adapters import HTTPAdapter  # pylint: disable=import-outside-toplevel
+
+    return HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+    )
+
+
+def build_requests_session(config: TransportConfig, adapter: Optional["HTTPAdapter"] = None) -> "requests.Session":
+    """builds a `requests.Session` with its HTTP adapters sized from the config, or using the adapter you pass
+
+    urllib3 keeps idle connections until the server closes them, so `keepalive_timeout` and the DNS settings don't apply here.
+    """
+    import requests  # pylint: disable=import-outside-toplevel
+
+    session = requests.Session()
+    if adapter is None:
+        adapter = build_http_adapter(config)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def requests_session_stats(session: "requests.Session") -> TransportStats:
+    """totals up the urllib3 pools behind a session's adapters"""
+    return http_adapter_stats(session.adapters.values())
+
+
+def http_adapter_stats(adapters: Iterable["BaseAdapter"]) -> TransportStats:
+    """totals up the urllib3 pools behind some adapters, each adapter is only counted once
+
+    urllib3 doesn't count the time spent waiting for a blocked pool, so `waiting` and `waited` are always 0.
+    """
+    from requests.adapters import HTTPAdapter  # pylint: disable=import-outside-toplevel
+
+    stats: TransportStats = {
+        "requests": 0,
+        "connections_opened": 0,
+        "connections_reused": 0,
+        "waiting": 0,
+        "waited": 0,
+    }
+    unique = {id(adapter): adapter for adapter in adapters}
+    for adapter in unique.values():
+        if not isinstance(adapter, HTTPAdapter):
+            continue
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats["requests"] += pool.num_requests
+            stats["connections_opened"] += pool.num_connections
+    stats["connections_reused"] = max(stats["requests"] - stats["connections_opened"], 0)
+    return stats
+
+
+def requests_error_reason(error: BaseException) -> Optional[str]:
+    """what kind of failure a requests exception is, for `aussiebb.retry`, None if it's not worth retrying"""
+    import requests  # pylint: disable=import-outside-toplevel
+    from urllib3.exceptions import NewConnectionError  # pylint: disable=import-outside-toplevel
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return "connect"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        # urllib3 wraps a refused or unresolvable connection in a MaxRetryError
+        if isinstance(getattr(error.args[0] if error.args else None, "reason", None), NewConnectionError):
+            return "connect"
+        return "connection"
+    if isinstance(error, requests.exceptions.Timeout):
+        return "connection"
+    return None
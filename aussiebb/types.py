@@ -1,16 +1,25 @@
 """ types """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
 
 import sys
 
-from pydantic import field_validator, BaseModel, ConfigDict, SecretStr, Field
+from pydantic import field_validator, BaseModel, ConfigDict, SecretStr, Field, TypeAdapter, with_config
 
 if sys.version_info.major == 3 and sys.version_info.minor < 12:
-    from typing_extensions import TypedDict
+    from typing_extensions import NotRequired, TypedDict
 else:
-    from typing import TypedDict  # pylint: disable=ungrouped-imports
+    from typing import NotRequired, TypedDict  # pylint: disable=ungrouped-imports
+
+ItemT = TypeVar("ItemT")
+
+
+class _LazyModel(BaseModel):
+    """builds its validator the first time it's used rather than when aussiebb.types is imported"""
+
+    model_config = ConfigDict(defer_build=True)
 
 
 class AccountTransaction(TypedDict):
@@ -24,7 +33,7 @@ class AccountTransaction(TypedDict):
     runningBalanceCents: int
 
 
-class ServiceTest(BaseModel):
+class ServiceTest(_LazyModel):
     """A service test object"""
 
     name: str
@@ -32,7 +41,7 @@ class ServiceTest(BaseModel):
     link: str
 
 
-class APIResponseLinks(BaseModel):
+class APIResponseLinks(_LazyModel):
     """the links field from an API response"""
 
     first: str
@@ -55,24 +64,40 @@ APIResponseMeta = TypedDict(
 )
 
 
-class GetServicesResponse(BaseModel):
-    """the format for a response from the get_services call"""
+@with_config(ConfigDict(extra="allow"))
+class ServiceRecord(TypedDict):
+    """a service from get_services - every service has an ID and type, the rest depend on the type and are kept as they are"""
+
+    service_id: int
+    type: str
+    # hardware and some VOIP services come back without these
+    name: NotRequired[str]
+    plan: NotRequired[str]
+    description: NotRequired[str]
+
 
-    data: List[Dict[str, Any]]
+class PaginatedResponse(_LazyModel, Generic[ItemT]):
+    """a page from a paginated endpoint, `links.next` is the URL of the next page - see aussiebb.pagination"""
+
+    data: List[ItemT]
     links: APIResponseLinks
     meta: APIResponseMeta
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
-class ConfigUser(BaseModel):
+class GetServicesResponse(PaginatedResponse[ServiceRecord]):
+    """the format for a response from the get_services call"""
+
+
+class ConfigUser(_LazyModel):
     """just a username and password field"""
 
     username: str
     password: SecretStr
 
 
-class AussieBBConfigFile(BaseModel):
+class AussieBBConfigFile(_LazyModel):
     """config file definition"""
 
     users: List[ConfigUser]
@@ -153,7 +178,7 @@ class AussieBBConfigFile(BaseModel):
 #     ],
 #     "resolvedNbnOutages": []
 # }
-class OutageRecord(BaseModel):
+class OutageRecord(_LazyModel):
     """outage def"""
 
     reference: int
@@ -165,7 +190,7 @@ class OutageRecord(BaseModel):
     last_updated: Optional[datetime] = None
 
 
-class ScheduledOutageRecord:
+class ScheduledOutageRecord(_LazyModel):
     """scheduled outage record"""
 
     start_date: datetime
@@ -173,7 +198,7 @@ class ScheduledOutageRecord:
     duration: float
 
 
-class AussieBBOutage(BaseModel):
+class AussieBBOutage(_LazyModel):
     """outage class"""
 
     networkEvents: List[OutageRecord]
@@ -195,7 +220,7 @@ class OrderData(TypedDict):
     description: str
 
 
-class OrderDetailResponseModel(BaseModel):
+class OrderDetailResponseModel(_LazyModel):
     """order Response for get_order(int)"""
 
     id: int
@@ -221,17 +246,11 @@ OrderDetailResponse = TypedDict(
 )
 
 
-class OrderResponse(BaseModel):
+class OrderResponse(PaginatedResponse[OrderData]):
     """response from get_orders"""
 
-    data: List[OrderData]
-    links: APIResponseLinks
-    meta: APIResponseMeta
-
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-
 
-class VOIPDevice(BaseModel):
+class VOIPDevice(_LazyModel):
     """an individual service device"""
 
     username: str
@@ -239,7 +258,7 @@ class VOIPDevice(BaseModel):
     registered: bool  # is it online?
 
 
-class AccountContact(BaseModel):
+class AccountContact(_LazyModel):
     """account contact data"""
 
     contact_id: int = Field(..., alias="id")
@@ -257,7 +276,7 @@ class AccountContact(BaseModel):
     middle_name: Optional[str] = None
 
 
-class Address(BaseModel):
+class Address(_LazyModel):
     """Address for services"""
 
     subaddresstype: Optional[str] = None
@@ -269,7 +288,7 @@ class Address(BaseModel):
     state: str
 
 
-class BaseService(BaseModel):
+class BaseService(_LazyModel):
     """base service definition"""
 
     service_id: int
@@ -288,7 +307,7 @@ class BaseService(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
-class FetchSubscription(BaseModel):
+class FetchSubscription(_LazyModel):
     """Fetch Subscription item"""
 
     name: str
@@ -298,7 +317,7 @@ class FetchSubscription(BaseModel):
     end_date: Optional[datetime] = Field(..., alias="endDate")
 
 
-class FetchSubscriptionDict(BaseModel):
+class FetchSubscriptionDict(_LazyModel):
     """this is just getting silly"""
 
     # subscriptions: List[FetchSubscription] = Field(..., alias="")
@@ -309,7 +328,7 @@ class FetchService(BaseService):
     """Fetch TV Service, comes from get_services()"""
 
 
-class FetchDetails(BaseModel):
+class FetchDetails(_LazyModel):
     """data from  /fetchtv/{serviceid}"""
 
     service_id: int = Field(..., alias="id")
@@ -319,7 +338,7 @@ class FetchDetails(BaseModel):
     subscriptions: FetchSubscriptionDict
 
 
-class VOIPDetails(BaseModel):
+class VOIPDetails(_LazyModel):
     """individual VOIP service"""
 
     phone_number: str = Field(..., alias="phoneNumber")
@@ -334,7 +353,7 @@ class VOIPService(BaseService):
     voip_details: VOIPDetails = Field(..., alias="voipDetails")
 
 
-class NBNDetails(BaseModel):
+class NBNDetails(_LazyModel):
     """sub-details of an NBN service"""
 
     product: str
@@ -350,7 +369,7 @@ class NBNService(BaseService):
     ip_addresses: List[str] = Field(..., alias="ipAddresses")
 
 
-class MFAMethod(BaseModel):
+class MFAMethod(_LazyModel):
     """simple model for sending MFA Method"""
 
     method: str
@@ -362,3 +381,72 @@ class MFAMethod(BaseModel):
         if value not in ["sms", "email"]:
             raise ValueError("must be sms or email")
         return value
+
+
+class BulkServiceResult(_LazyModel):
+    """one result from a bulk fan-out call, `error` is set if the call raised"""
+
+    service_id: int
+    method: str
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @property
+    def ok(self) -> bool:
+        """did the call succeed?"""
+        return self.error is None
+
+
+class DownloadResult(_LazyModel):
+    """one file from a bulk billing download, `error` is set if it failed
+
+    `status` is one of `downloaded`, `resumed`, `skipped` or `failed`, and `size` is how many bytes were written this time.
+    """
+
+    item_id: int
+    download_type: str
+    path: Path
+    status: str
+    size: int = 0
+    error: Optional[BaseException] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @property
+    def ok(self) -> bool:
+        """did the download succeed?"""
+        return self.error is None
+
+
+class AccountResult(_LazyModel):
+    """one account's result from a call across an account pool, `error` is set if the call raised"""
+
+    username: str
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @property
+    def ok(self) -> bool:
+        """did the call succeed?"""
+        return self.error is None
+
+
+_LIST_ADAPTERS: Dict[Any, TypeAdapter[Any]] = {}
+
+
+def list_adapter(item: Type[ItemT]) -> TypeAdapter[List[ItemT]]:
+    """a TypeAdapter for a list of `item`, built once, so list responses are validated in one go rather than a model at a time"""
+    adapter = _LIST_ADAPTERS.get(item)
+    if adapter is None:
+        adapter = _LIST_ADAPTERS[item] = TypeAdapter(List[item], config=ConfigDict(defer_build=True))  # type: ignore[valid-type]
+    return adapter
+
+
+SERVICE_TEST_LIST = list_adapter(ServiceTest)
+VOIP_DEVICE_LIST = list_adapter(VOIPDevice)
+ACCOUNT_CONTACT_LIST = list_adapter(AccountContact)
+SERVICE_LIST: TypeAdapter[List[ServiceRecord]] = TypeAdapter(List[ServiceRecord], config=ConfigDict(defer_build=True))
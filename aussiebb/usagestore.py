@@ -0,0 +1,240 @@
+"""keeps usage history for many services in a local SQLite database, one value per service, metric and day
+
+```
+from aussiebb.usagestore import UsageStore
+with UsageStore("~/.local/share/aussiebb/usage.db") as store:
+    for service_id in service_ids:
+        store.append(service_id, client.get_usage(service_id))
+    weekly = store.downsample("usedMb", date(2025, 1, 1), date(2025, 12, 31), bucket_days=7)
+```
+
+`get_usage` and `telephony_usage` responses are flattened into metrics: numeric fields keep their names (`usedMb`,
+`daysRemaining`), and numbers one level down are joined with a dot (`national.calls`, `internet.kbytes`). A response
+is stored against the day in its `lastUpdated`, or `day` if you pass one, or today. Appending the same service and day
+again replaces that day's values, so polling more often than daily doesn't grow the store.
+
+Entries in a telephony `historical` array are stored too, against the `date` (or `month`, taken as its first day) each
+one has - entries without one are skipped.
+
+Values are kept in a `WITHOUT ROWID` table keyed on metric, day and service, in that order, so a day's snapshots for the
+whole fleet land next to each other and appending one only touches the end of the table. Queries across the fleet are
+a range scan, and queries for a few services look each day up directly rather than scanning everyone else's.
+"""
+
+from datetime import date, datetime
+import json
+from pathlib import Path
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+# (service_id, day, value)
+UsagePoint = Tuple[int, date, float]
+
+DOWNSAMPLE_AGGREGATES = ["avg", "min", "max", "sum", "last"]
+# the longest range (in days) that queries for particular services look up day by day, longer ones scan the range
+MULTI_SEEK_DAYS = 3660
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    metric_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS samples (
+    service_id INTEGER NOT NULL,
+    metric_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (metric_id, day, service_id)
+) WITHOUT ROWID;
+"""
+
+UPSERT = "INSERT INTO samples (service_id, metric_id, day, value) VALUES (?, ?, ?, ?) ON CONFLICT (metric_id, day, service_id) DO UPDATE SET value = excluded.value"
+
+
+def flatten_usage(usage: Mapping[str, Any]) -> Dict[str, float]:
+    """the numeric fields of a usage response, with nested ones as `parent.child`, leaving out `historical`"""
+    values: Dict[str, float] = {}
+    for key, value in usage.items():
+        if key == "historical":
+            continue
+        if isinstance(value, Mapping):
+            for child, child_value in value.items():
+                if isinstance(child_value, (int, float)) and not isinstance(child_value, bool):
+                    values[f"{key}.{child}"] = float(child_value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[key] = float(value)
+    return values
+
+
+def usage_day(usage: Mapping[str, Any]) -> Optional[date]:
+    """the day a usage response (or a `historical` entry) is for, from `lastUpdated`, `date` or `month`"""
+    for key in ("lastUpdated", "date"):
+        value = usage.get(key)
+        if isinstance(value, str) and len(value) >= 10:
+            try:
+                return date.fromisoformat(value[:10])
+            except ValueError:
+                pass
+    month = usage.get("month")
+    if isinstance(month, str):
+        try:
+            return datetime.strptime(month[:7], "%Y-%m").date()
+        except ValueError:
+            pass
+    return None
+
+
+class UsageStore:
+    """Appends usage snapshots to a SQLite database and answers range queries over them.
+
+    Safe to share between threads, writes are serialised.
+
+    ```
+    @param path: str or Path - the database file, created if it doesn't exist, or `:memory:`
+    ```
+    """
+
+    def __init__(self, path: Union[str, Path] = ":memory:") -> None:
+        self.path = path if str(path) == ":memory:" else Path(path).expanduser()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        if self.path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._metric_ids: Dict[str, int] = dict((name, metric_id) for metric_id, name in self._connection.execute("SELECT metric_id, name FROM metrics"))
+
+    def __enter__(self) -> "UsageStore":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """closes the database"""
+        with self._lock:
+            self._connection.close()
+
+    def _metric_id(self, name: str, added: Dict[str, int]) -> int:
+        """the id for a metric name, adding it to the database and `added` if it's new, must be called holding the lock"""
+        metric_id = self._metric_ids.get(name)
+        if metric_id is None:
+            metric_id = added.get(name)
+        if metric_id is None:
+            cursor = self._connection.execute("INSERT INTO metrics (name) VALUES (?)", (name,))
+            metric_id = added[name] = int(cursor.lastrowid or 0)
+        return metric_id
+
+    def _rows(self, service_id: int, usage: Mapping[str, Any], day: Optional[date], added: Dict[str, int]) -> List[Tuple[int, int, int, float]]:
+        """the rows for one response and its `historical` entries, must be called holding the lock"""
+        rows: List[Tuple[int, int, int, float]] = []
+        snapshot_day = day or usage_day(usage) or date.today()
+        for name, value in flatten_usage(usage).items():
+            rows.append((service_id, self._metric_id(name, added), snapshot_day.toordinal(), value))
+        historical = usage.get("historical")
+        if isinstance(historical, list):
+            for entry in historical:
+                if not isinstance(entry, Mapping):
+                    continue
+                entry_day = usage_day(entry)
+                if entry_day is None:
+                    continue
+                for name, value in flatten_usage(entry).items():
+                    rows.append((service_id, self._metric_id(name, added), entry_day.toordinal(), value))
+        return rows
+
+    def append(self, service_id: int, usage: Mapping[str, Any], day: Optional[date] = None) -> int:
+        """stores a `get_usage` or `telephony_usage` response, returns how many values were written"""
+        return self.append_many([(service_id, usage)], day)
+
+    def append_many(self, snapshots: Iterable[Tuple[int, Mapping[str, Any]]], day: Optional[date] = None) -> int:
+        """stores (service_id, response) pairs in one transaction, returns how many values were written"""
+        with self._lock:
+            # new metrics are only cached once they're committed, a rollback takes them out of the database too
+            added: Dict[str, int] = {}
+            with self._connection:
+                rows: List[Tuple[int, int, int, float]] = []
+                for service_id, usage in snapshots:
+                    rows.extend(self._rows(service_id, usage, day, added))
+                self._connection.executemany(UPSERT, rows)
+            self._metric_ids.update(added)
+        return len(rows)
+
+    def metrics(self) -> List[str]:
+        """the metric names stored so far"""
+        with self._lock:
+            return sorted(self._metric_ids)
+
+    def services(self) -> List[int]:
+        """the services with anything stored"""
+        with self._lock:
+            return [row[0] for row in self._connection.execute("SELECT DISTINCT service_id FROM samples ORDER BY service_id")]
+
+    def _where(self, metric: str, start: date, end: date, service_ids: Optional[Sequence[int]]) -> Tuple[str, List[Any]]:
+        """the WHERE clause and its parameters for a query, a metric that's never been stored matches nothing"""
+        params: List[Any] = [self._metric_ids.get(metric, -1)]
+        if service_ids is not None and 0 <= end.toordinal() - start.toordinal() <= MULTI_SEEK_DAYS:
+            # the days are whole numbers, so they're safe to inline, and don't count towards SQLite's parameter limit
+            days = ",".join(str(day) for day in range(start.toordinal(), end.toordinal() + 1))
+            clause = f"metric_id = ? AND day IN ({days})"
+        else:
+            clause = "metric_id = ? AND day BETWEEN ? AND ?"
+            params.extend([start.toordinal(), end.toordinal()])
+        if service_ids is not None:
+            # one parameter however many services there are, SQLite limits a statement to 999 on older builds
+            clause += " AND service_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(service_id) for service_id in service_ids]))
+        return clause, params
+
+    def query(self, metric: str, start: date, end: date, service_ids: Optional[Iterable[int]] = None) -> List[UsagePoint]:
+        """Returns (service_id, day, value) for a metric between two days (inclusive), ordered by service then day.
+
+        ```
+        @param metric: str - a metric name, eg. `usedMb` or `national.calls`
+        @param service_ids: only these services, defaults to all of them
+        ```
+        """
+        selected = None if service_ids is None else list(service_ids)
+        with self._lock:
+            clause, params = self._where(metric, start, end, selected)
+            rows = self._connection.execute(f"SELECT service_id, day, value FROM samples WHERE {clause} ORDER BY service_id, day", params).fetchall()
+        return [(service_id, date.fromordinal(day), value) for service_id, day, value in rows]
+
+    def query_ordinals(self, metric: str, start: date, end: date, service_ids: Optional[Iterable[int]] = None) -> List[Tuple[int, int, float]]:
+        """like `query`, but with days as `date.toordinal()` numbers and in no particular order, for loading into arrays"""
+        selected = None if service_ids is None else list(service_ids)
+        with self._lock:
+            clause, params = self._where(metric, start, end, selected)
+            return self._connection.execute(f"SELECT service_id, day, value FROM samples WHERE {clause}", params).fetchall()
+
+    def downsample(
+        self,
+        metric: str,
+        start: date,
+        end: date,
+        bucket_days: int = 7,
+        aggregate: str = "max",
+        service_ids: Optional[Iterable[int]] = None,
+    ) -> List[UsagePoint]:
+        """Returns one value per service for every `bucket_days` days from `start`, each bucket labelled with its first day.
+
+        ```
+        @param aggregate: str - one of `DOWNSAMPLE_AGGREGATES`, `last` is the value from the latest day in the bucket
+        ```
+        """
+        if aggregate not in DOWNSAMPLE_AGGREGATES:
+            raise ValueError(f"aggregate must be one of {DOWNSAMPLE_AGGREGATES}")
+        if bucket_days < 1:
+            raise ValueError("bucket_days must be at least 1")
+        selected = None if service_ids is None else list(service_ids)
+        # SQLite takes the other columns from the row with the max() when there's only one max() in the query
+        value = "value, MAX(day)" if aggregate == "last" else f"{aggregate.upper()}(value)"
+        with self._lock:
+            clause, params = self._where(metric, start, end, selected)
+            rows = self._connection.execute(
+                f"SELECT service_id, (day - ?) / ? AS bucket, {value} FROM samples WHERE {clause} GROUP BY service_id, bucket ORDER BY service_id, bucket",
+                [start.toordinal(), bucket_days, *params],
+            ).fetchall()
+        first = start.toordinal()
+        return [(row[0], date.fromordinal(first + row[1] * bucket_days), row[2]) for row in rows]
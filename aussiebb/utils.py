@@ -1 +1,19 @@
 """ shared utility functions """
+
+from typing import Dict, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def round_robin(queues: Dict[str, List[T]]) -> List[Tuple[str, T]]:
+    """interleaves per-key lists, taking one item from each key in turn until they're all empty
+
+    `{"a": [1, 2, 3], "b": [4]}` becomes `[("a", 1), ("b", 4), ("a", 2), ("a", 3)]`
+    """
+    result: List[Tuple[str, T]] = []
+    longest = max((len(items) for items in queues.values()), default=0)
+    for index in range(longest):
+        for key, items in queues.items():
+            if index < len(items):
+                result.append((key, items[index]))
+    return result
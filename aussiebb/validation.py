@@ -0,0 +1,177 @@
+"""decides how much of each typed response gets validated by pydantic
+
+- `full` - validate every response, the default
+- `sampled` - validate one in `sample_rate` responses for each model (starting with the first), and build the rest without
+  validating. If a sampled response doesn't match the model it's logged as schema drift and used unvalidated, rather than raising.
+- `trusted` - never validate, build the models straight from the parsed JSON
+
+Unvalidated models are built with `model_construct`, so values aren't converted - datetimes stay as strings, for example -
+but nested models are still built as models.
+
+Typed responses are validated by pydantic-core straight from the bytes, which costs about the same as parsing the JSON,
+so skipping validation doesn't save CPU time (building models in Python is slower, see `tests/test_benchmark_decoding.py`).
+What `sampled` and `trusted` give a long-running poller is that a change to the API's responses is logged, or ignored,
+rather than raising on every call.
+
+```
+client = AussieBB(username, password, validation=ValidationPolicy("sampled", sample_rate=50))
+```
+"""
+
+from collections import Counter
+import inspect
+import logging
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+from .types import list_adapter
+
+if sys.version_info.major == 3 and sys.version_info.minor < 12:
+    from typing_extensions import TypedDict
+else:
+    from typing import TypedDict  # pylint: disable=ungrouped-imports
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+ItemT = TypeVar("ItemT")
+
+VALIDATION_MODES = ["full", "sampled", "trusted"]
+
+
+class ValidationStats(TypedDict):
+    """how typed responses have been handled"""
+
+    validated: int
+    trusted: int
+    drift: int
+
+
+# model -> [(field name, key in the JSON, how to build its value)], worked out once per model
+_PLANS: Dict[Any, List[Tuple[str, str, Optional[Callable[[Any], Any]]]]] = {}
+
+
+def _builder(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """how to build a field's value without validating it, following lists and Optionals, None if it's used as it is"""
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        model = annotation
+        return lambda value: construct_model(model, value) if isinstance(value, dict) else value
+    args = get_args(annotation)
+    if get_origin(annotation) is list and args:
+        inner = _builder(args[0])
+        if inner is None:
+            return None
+        return lambda value: [inner(item) for item in value] if isinstance(value, list) else value
+    if get_origin(annotation) is Union:
+        for arg in args:
+            if inspect.isclass(arg) and issubclass(arg, BaseModel):
+                return _builder(arg)
+    return None
+
+
+def construct_model(model: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """builds a model (and any models nested in it) from parsed JSON, without validating it"""
+    plan = _PLANS.get(model)
+    if plan is None:
+        plan = _PLANS[model] = [(name, field.alias or name, _builder(field.annotation)) for name, field in model.model_fields.items()]
+    values = {}
+    for name, key, build in plan:
+        if key in data:
+            value = data[key]
+        elif name in data:
+            value = data[name]
+        else:
+            continue
+        values[name] = value if build is None else build(value)
+    return model.model_construct(**values)
+
+
+def _construct_list(item: Any, data: List[Any]) -> List[Any]:
+    """builds a list of `item` without validating it, TypedDicts and other plain types are left as they are"""
+    if inspect.isclass(item) and issubclass(item, BaseModel):
+        return [construct_model(item, value) for value in data]
+    return data
+
+
+class ValidationPolicy:
+    """How a client validates typed responses, see the module docs for the modes.
+
+    ```
+    @param mode: str - `full`, `sampled` or `trusted`
+    @param sample_rate: int - in `sampled` mode, validate one in this many responses for each model
+    @param logger: where schema drift is logged, defaults to this module's logger
+    ```
+    """
+
+    def __init__(self, mode: str = "full", sample_rate: int = 100, logger: Optional[logging.Logger] = None):
+        if mode not in VALIDATION_MODES:
+            raise ValueError(f"Validation mode {mode} not known, must be one of {VALIDATION_MODES}")
+        if sample_rate < 1:
+            raise ValueError("sample_rate must be at least 1")
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self._seen: Counter[Any] = Counter()
+        self._lock = threading.Lock()
+        self.validated = 0
+        self.trusted = 0
+        self.drift = 0
+
+    @classmethod
+    def from_setting(cls, setting: Union[str, "ValidationPolicy"]) -> "ValidationPolicy":
+        """takes a mode name or a policy, so clients can take either"""
+        if isinstance(setting, ValidationPolicy):
+            return setting
+        return cls(setting)
+
+    def should_validate(self, model: Any) -> bool:
+        """whether the next response for this model gets validated, counting it either way"""
+        with self._lock:
+            if self.mode == "full":
+                validate = True
+            elif self.mode == "trusted":
+                validate = False
+            else:
+                validate = self._seen[model] % self.sample_rate == 0
+                self._seen[model] += 1
+            if validate:
+                self.validated += 1
+            else:
+                self.trusted += 1
+            return validate
+
+    def _drifted(self, model: Any, error: ValidationError) -> None:
+        with self._lock:
+            self.drift += 1
+        self.logger.warning("Schema drift in a sampled %s response, using it unvalidated: %s", getattr(model, "__name__", model), error)
+
+    def decode(self, body: bytes, model: Type[ModelT], loads: Callable[[bytes], Any]) -> ModelT:
+        """turns a response body into a model, validating it or not depending on the policy"""
+        if not self.should_validate(model):
+            return construct_model(model, loads(body))
+        try:
+            return model.model_validate_json(body)
+        except ValidationError as error:
+            if self.mode == "full":
+                raise
+            self._drifted(model, error)
+            return construct_model(model, loads(body))
+
+    def decode_list(self, body: bytes, item: Type[ItemT], loads: Callable[[bytes], Any]) -> List[ItemT]:
+        """turns a list response body into a list of `item`, validating it in one go or not depending on the policy"""
+        adapter = list_adapter(item)
+        if not self.should_validate(item):
+            return _construct_list(item, loads(body))
+        try:
+            return adapter.validate_json(body)
+        except ValidationError as error:
+            if self.mode == "full":
+                raise
+            self._drifted(item, error)
+            return _construct_list(item, loads(body))
+
+    def stats(self) -> ValidationStats:
+        """how many responses were validated, trusted, or failed a sampled validation"""
+        with self._lock:
+            return {"validated": self.validated, "trusted": self.trusted, "drift": self.drift}
@@ -64,34 +64,17 @@ async def main() -> None:
         await aussiebb.login()
         print("Pulling transactions...")
         transactions = await aussiebb.account_transactions()
-        for _transaction_date, transaction in transactions.items():
-            timestamp = datetime.strptime(transaction["time"], "%Y-%m-%d")
-            download_path = Path(
-                f"{transaction['time']}-{transaction['id']}-{transaction['type']}.pdf"
-            )
-            if download_path.exists():
-                print(f"Already have {download_path}, skipping")
-                continue
-            if timestamp < earliest_date:
-                print(f"Skipping {download_path} due to timestamp")
-                continue
-            if transaction["type"] == "receipt":
-                invoice = await aussiebb.billing_receipt(transaction["id"])
-            elif transaction["type"] == "invoice":
-                invoice = await aussiebb.billing_invoice(transaction["id"])
-            elif transaction["type"] == "credit":
-                invoice = await aussiebb.billing_download(
-                    transaction["type"], transaction["id"]
-                )
+        async for result in aussiebb.download_transactions(
+            Path("."),
+            transactions,
+            earliest=earliest_date.strftime("%Y-%m-%d"),
+        ):
+            if result.status == "skipped":
+                print(f"Already have {result.path}, skipping")
+            elif result.ok:
+                print(f"{result.path} Done!")
             else:
-                print(
-                    "Unhandled event type: %s for id=%s",
-                    transaction["type"],
-                    transaction["id"],
-                )
-                return
-            download_path.write_bytes(await invoice.content.read())
-            print(f"{download_path} Done!")
+                print(f"Failed to download {result.path}: {result.error}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""helpers for timing client calls against the mock API server"""
+
+from statistics import quantiles
+from time import perf_counter
+import tracemalloc
+from typing import Any, Awaitable, Callable, List, Optional
+
+from pydantic import BaseModel
+
+from .mockserver import MockAussieAPI
+
+
+class BenchmarkResult(BaseModel):
+    """timings from a benchmark run"""
+
+    name: str
+    iterations: int
+    requests: int
+    elapsed: float
+    latencies: List[float]
+    peak_bytes: int = 0
+
+    @property
+    def requests_per_second(self) -> float:
+        """HTTP requests the server saw, per second of wall time"""
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, pct: int) -> float:
+        """latency percentile for a single iteration, in seconds"""
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return quantiles(self.latencies, n=100, method="inclusive")[pct - 1]
+
+    def report(self) -> str:
+        """one-line summary"""
+        return (
+            f"{self.name:<40} iterations={self.iterations:<5} requests={self.requests:<6} "
+            f"req/s={self.requests_per_second:>9.1f} "
+            f"p50={self.percentile(50) * 1000:>9.3f}ms p99={self.percentile(99) * 1000:>9.3f}ms "
+            f"peak_alloc={self.peak_bytes / 1024:>8.1f}KiB"
+        )
+
+
+def _server_requests(server: Optional[MockAussieAPI]) -> int:
+    if server is None:
+        return 0
+    return sum(server.calls.values()) + server.logins
+
+
+def run_sync(
+    name: str,
+    server: Optional[MockAussieAPI],
+    func: Callable[[], Any],
+    iterations: int,
+    allocation_iterations: Optional[int] = None,
+) -> BenchmarkResult:
+    """times `func` for `iterations` runs, then measures peak allocation over a shorter run
+
+    `server` can be None when benchmarking something which doesn't make requests.
+    """
+    func()  # warm up connections and caches
+
+    start_requests = _server_requests(server)
+    latencies: List[float] = []
+    start = perf_counter()
+    for _ in range(iterations):
+        call_start = perf_counter()
+        func()
+        latencies.append(perf_counter() - call_start)
+    elapsed = perf_counter() - start
+    requests = _server_requests(server) - start_requests
+
+    tracemalloc.start()
+    try:
+        for _ in range(allocation_iterations or max(iterations // 10, 1)):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = BenchmarkResult(name=name, iterations=iterations, requests=requests, elapsed=elapsed, latencies=latencies, peak_bytes=peak)
+    print(result.report())
+    return result
+
+
+async def run_async(
+    name: str,
+    server: MockAussieAPI,
+    func: Callable[[], Awaitable[Any]],
+    iterations: int,
+    allocation_iterations: Optional[int] = None,
+) -> BenchmarkResult:
+    """async version of `run_sync`"""
+    await func()
+
+    start_requests = _server_requests(server)
+    latencies: List[float] = []
+    start = perf_counter()
+    for _ in range(iterations):
+        call_start = perf_counter()
+        await func()
+        latencies.append(perf_counter() - call_start)
+    elapsed = perf_counter() - start
+    requests = _server_requests(server) - start_requests
+
+    tracemalloc.start()
+    try:
+        for _ in range(allocation_iterations or max(iterations // 10, 1)):
+            await func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = BenchmarkResult(name=name, iterations=iterations, requests=requests, elapsed=elapsed, latencies=latencies, peak_bytes=peak)
+    print(result.report())
+    return result
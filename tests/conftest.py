@@ -0,0 +1,14 @@
+"""shared fixtures"""
+
+from typing import Generator
+
+import pytest
+
+from .mockserver import MockAussieAPI
+
+
+@pytest.fixture(name="server")
+def fixture_server(request: pytest.FixtureRequest) -> Generator[MockAussieAPI, None, None]:
+    """a mock API, built with the arguments in the test module's `MOCK_API` dict if it has one"""
+    with MockAussieAPI(**getattr(request.module, "MOCK_API", {})) as server:
+        yield server
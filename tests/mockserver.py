@@ -0,0 +1,438 @@
+"""in-process stand-in for the MyAussie API, used by the offline tests and benchmarks
+
+```
+with MockAussieAPI(services=25) as server:
+    client = AussieBB("user", "pass")
+    client.BASEURL = server.baseurl
+    client.get_services()
+```
+"""
+
+import asyncio
+from collections import Counter
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+import json
+import math
+import threading
+from time import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import uuid
+
+from aiohttp import web
+
+from aussiebb.const import API_ENDPOINTS, TEST_MOCKDATA
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+# endpoints which take a POST instead of a GET
+POST_ENDPOINTS = ["test_line_state", "mfa_send", "mfa_verify"]
+
+PDF_HEADER = b"%PDF-1.4\n% mock document\n"
+
+
+class MockAussieAPI:
+    """Serves the login endpoint and everything in `API_ENDPOINTS` from a background thread.
+
+    ```
+    @param services: int - how many services the account has
+    @param per_page: int - page size for paginated endpoints
+    @param orders: int - how many orders the account has
+    @param expires_in: int - login token lifetime in seconds
+    @param ratelimit: int - requests allowed per `ratelimit_window`, after which it returns 429s
+    @param ratelimit_window: int - seconds per rate limit window
+    @param latency: float - seconds to sleep before answering each request
+    @param document_size: int - size in bytes of billing documents
+    ```
+    """
+
+    def __init__(
+        self,
+        services: int = 10,
+        per_page: int = 10,
+        orders: int = 3,
+        expires_in: int = 3600,
+        ratelimit: int = 1_000_000,
+        ratelimit_window: int = 60,
+        latency: float = 0.0,
+        document_size: int = 64 * 1024,
+    ):
+        self.per_page = per_page
+        self.expires_in = expires_in
+        self.ratelimit = ratelimit
+        self.ratelimit_window = ratelimit_window
+        self.latency = latency
+        self.document_size = document_size
+
+        self.services = [self.make_service(index) for index in range(services)]
+        self.orders = [self.make_order(index) for index in range(orders)]
+
+        # what the server has seen
+        self.calls: Counter[str] = Counter()
+        self.logins = 0
+        self.tokens: Dict[str, float] = {}
+        # which account each cookie was issued to, and how many requests each account has made with one
+        self.token_users: Dict[str, str] = {}
+        self.user_calls: Counter[str] = Counter()
+        self.inflight = 0
+        self.max_inflight = 0
+        # statuses to answer the next requests with, see fail_next
+        self.failures: List[int] = []
+
+        self._window_start = time()
+        self._window_count = 0
+        self._port = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def make_service(index: int) -> Dict[str, Any]:
+        """builds a synthetic service, every fourth one is a VOIP service"""
+        if index % 4 == 3:
+            service = deepcopy(TEST_MOCKDATA["service_voip"])
+        else:
+            service = deepcopy(TEST_MOCKDATA["service_nbn_fttc"])
+        service["service_id"] = 100000 + index
+        return service
+
+    @staticmethod
+    def make_order(index: int) -> Dict[str, Any]:
+        """builds a synthetic order summary"""
+        return {
+            "id": 500000 + index,
+            "status": "Complete",
+            "type": "NBN",
+            "description": f"Mock order {index}",
+        }
+
+    @property
+    def url(self) -> str:
+        """base URL of the running server"""
+        return f"http://127.0.0.1:{self._port}"
+
+    @property
+    def baseurl(self) -> Dict[str, str]:
+        """drop-in replacement for `aussiebb.const.BASEURL`"""
+        return {
+            "api": self.url,
+            "login": f"{self.url}/login",
+        }
+
+    def reset_counters(self) -> None:
+        """zeroes the call counters"""
+        self.calls.clear()
+        self.user_calls.clear()
+        self.logins = 0
+        self.max_inflight = 0
+
+    def fail_next(self, *statuses: int) -> None:
+        """answers the next requests (other than logins) with these statuses, 429s come with `Retry-After: 0`"""
+        self.failures.extend(statuses)
+
+    def expire_tokens(self) -> None:
+        """invalidates every issued login cookie"""
+        self.tokens.clear()
+
+    def __enter__(self) -> "MockAussieAPI":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """starts the server in a background thread and waits until it's listening"""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout=10):
+            raise RuntimeError("Mock API server failed to start")
+
+    def stop(self) -> None:
+        """stops the server and its thread"""
+        if self._loop is None or self._thread is None:
+            return
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def _run(self, ready: threading.Event) -> None:
+        """thread target, runs the event loop"""
+        assert self._loop is not None
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._startup())
+        ready.set()
+        self._loop.run_forever()
+
+    async def _startup(self) -> None:
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self._port = self._runner.addresses[0][1]
+
+    def build_app(self) -> web.Application:
+        """builds the aiohttp application with a route for each API endpoint"""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/login", self.handle_login)
+        for name, endpoint in API_ENDPOINTS.items():
+            path = endpoint.split("?")[0]
+            handler = self._make_handler(name)
+            if name in POST_ENDPOINTS:
+                app.router.add_post(path, handler, name=name)
+            else:
+                app.router.add_get(path, handler, name=name)
+        return app
+
+    def _ratelimit_headers(self) -> Dict[str, str]:
+        """counts the request against the fixed window and returns the headers to send"""
+        now = time()
+        if now - self._window_start >= self.ratelimit_window:
+            self._window_start = now
+            self._window_count = 0
+        self._window_count += 1
+        reset = math.ceil(self._window_start + self.ratelimit_window)
+        return {
+            "X-RateLimit-Limit": str(self.ratelimit),
+            "X-RateLimit-Remaining": str(max(self.ratelimit - self._window_count, 0)),
+            "X-RateLimit-Reset": str(reset),
+        }
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        """applies latency, rate limiting and authentication to every request"""
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            return await self._handle(request, handler)
+        finally:
+            self.inflight -= 1
+
+    async def _handle(self, request: web.Request, handler: Handler) -> web.StreamResponse:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        headers = self._ratelimit_headers()
+        if self._window_count > self.ratelimit:
+            retry_after = max(int(headers["X-RateLimit-Reset"]) - int(time()), 1)
+            headers["Retry-After"] = str(retry_after)
+            return web.json_response(
+                {"errors": {"username": [f"Too many attempts. Please try again in {retry_after} seconds."]}},
+                status=429,
+                headers=headers,
+            )
+
+        if self.failures and request.path != "/login":
+            status = self.failures.pop(0)
+            if status == 429:
+                headers["Retry-After"] = "0"
+            return web.json_response({"message": "Mock failure"}, status=status, headers=headers)
+
+        if request.path != "/login":
+            token = request.cookies.get("myaussie_cookie", "")
+            if self.tokens.get(token, 0) < time():
+                return web.json_response({"message": "Unauthenticated."}, status=401, headers=headers)
+            self.user_calls[self.token_users.get(token, "")] += 1
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    async def handle_login(self, request: web.Request) -> web.StreamResponse:
+        """handles the login POST, sets the cookie"""
+        payload = await request.json()
+        self.logins += 1
+        if not payload.get("username") or not payload.get("password"):
+            return web.json_response({"errors": {"username": ["The username field is required."]}}, status=422)
+        token = uuid.uuid4().hex
+        self.tokens[token] = time() + self.expires_in
+        self.token_users[token] = payload["username"]
+        response = web.json_response({"expiresIn": self.expires_in})
+        response.set_cookie("myaussie_cookie", token)
+        return response
+
+    def _make_handler(self, name: str) -> Handler:
+        """wraps the payload builder for an endpoint"""
+
+        async def handler(request: web.Request) -> web.StreamResponse:
+            self.calls[name] += 1
+            custom = getattr(self, f"handle_{name}", None)
+            if custom is not None:
+                result: web.StreamResponse = await custom(request)
+                return result
+            return web.json_response(self.payload(name, request))
+
+        return handler
+
+    def _service(self, request: web.Request) -> Dict[str, Any]:
+        service_id = int(request.match_info["service_id"])
+        for service in self.services:
+            if service["service_id"] == service_id:
+                return service
+        raise web.HTTPNotFound(text=json.dumps({"message": "Not found"}), content_type="application/json")
+
+    def paginate(self, request: web.Request, items: List[Any], endpoint: str) -> Dict[str, Any]:
+        """builds a Laravel-style paginated response"""
+        page = int(request.query.get("page", 1))
+        last_page = max((len(items) + self.per_page - 1) // self.per_page, 1)
+        start = (page - 1) * self.per_page
+        data = items[start : start + self.per_page]
+        path = f"{self.url}{endpoint}"
+        return {
+            "data": data,
+            "links": {
+                "first": f"{path}?page=1",
+                "last": f"{path}?page={last_page}",
+                "prev": f"{path}?page={page - 1}" if page > 1 else None,
+                "next": f"{path}?page={page + 1}" if page < last_page else None,
+            },
+            "meta": {
+                "current_page": page,
+                "from": start + 1 if data else None,
+                "last_page": last_page,
+                "path": path,
+                "per_page": self.per_page,
+                "to": start + len(data) if data else None,
+                "total": len(items),
+            },
+        }
+
+    async def handle_get_services(self, request: web.Request) -> web.StreamResponse:
+        return web.json_response(self.paginate(request, self.services, "/services"))
+
+    async def handle_get_orders(self, request: web.Request) -> web.StreamResponse:
+        return web.json_response(self.paginate(request, self.orders, "/orders"))
+
+    async def handle_get_usage(self, request: web.Request) -> web.StreamResponse:
+        service = self._service(request)
+        used = (service["service_id"] % 97) * 1024
+        return web.json_response(
+            {
+                "usedMb": used,
+                "downloadedMb": used - used // 10,
+                "uploadedMb": used // 10,
+                "remainingMb": None,
+                "daysTotal": 31,
+                "daysRemaining": 12,
+                "lastUpdated": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+
+    async def handle_billing_invoice(self, request: web.Request) -> web.StreamResponse:
+        return self._document(request, f"invoice-{request.match_info['invoice_id']}")
+
+    async def handle_billing_receipt(self, request: web.Request) -> web.StreamResponse:
+        return self._document(request, f"receipt-{request.match_info['receipt_id']}")
+
+    def document_body(self, name: str) -> bytes:
+        """deterministic fake PDF content for a billing document"""
+        filler = (name.encode() + b"\n") * (self.document_size // (len(name) + 1) + 1)
+        return (PDF_HEADER + filler)[: self.document_size]
+
+    def _document(self, request: web.Request, name: str) -> web.StreamResponse:
+        """serves a document, honouring `Range: bytes=N-` so downloads can be resumed"""
+        body = self.document_body(name)
+        range_header = request.headers.get("Range", "")
+        if range_header.startswith("bytes=") and range_header.endswith("-"):
+            start = int(range_header[len("bytes=") : -1])
+            if start >= len(body):
+                return web.Response(status=416, headers={"Content-Range": f"bytes */{len(body)}"})
+            return web.Response(
+                status=206,
+                body=body[start:],
+                content_type="application/pdf",
+                headers={"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"},
+            )
+        return web.Response(body=body, content_type="application/pdf")
+
+    def payload(self, name: str, request: web.Request) -> Any:
+        """the canned response for the simpler endpoints"""
+        now = datetime.now(timezone.utc)
+        service_id = 0
+        if "service_id" in request.match_info:
+            # 404s for services which don't exist
+            service_id = self._service(request)["service_id"]
+        if name == "account_contacts":
+            return [
+                {
+                    "id": 1,
+                    "first_name": "Mock",
+                    "last_name": "User",
+                    "email": ["mock@example.com"],
+                    "dob": "1970-01-01",
+                    "primary_contact": True,
+                }
+            ]
+        if name == "account_paymentplans":
+            return {"paymentplans": []}
+        if name == "account_transactions":
+            return {
+                now.strftime("%B %Y"): [
+                    {
+                        "id": 9000 + index,
+                        "type": "invoice" if index % 2 == 0 else "receipt",
+                        "time": (now - timedelta(days=index)).strftime("%Y-%m-%d"),
+                        "description": f"Mock transaction {index}",
+                        "amountCents": 8400,
+                        "runningBalanceCents": 0,
+                    }
+                    for index in range(4)
+                ]
+            }
+        if name == "fetch_service":
+            return self._service(request)
+        if name == "get_appointment":
+            return {"ticketid": int(request.match_info["ticketid"])}
+        if name == "get_customer_details":
+            return {"customer_number": 123456, "billing_name": "Mock User"}
+        if name == "get_order":
+            return {
+                "id": int(request.match_info["order_id"]),
+                "status": "Complete",
+                "plan": "NBN 100/40Mbps",
+                "address": "123 DRURY LN, SUBURBTON",
+                "appointment": "",
+                "appointmentRescheduleCode": 0,
+                "statuses": ["Complete"],
+            }
+        if name == "get_service_tests":
+            return [
+                {
+                    "name": "Line State",
+                    "description": "Checks the line state",
+                    "link": f"{self.url}{API_ENDPOINTS['test_line_state'].format(service_id=service_id)}",
+                }
+            ]
+        if name == "get_test_history":
+            return {"data": []}
+        if name == "service_boltons":
+            return []
+        if name == "service_datablocks":
+            return {"current": [], "available": []}
+        if name == "service_outages":
+            return {
+                "networkEvents": [],
+                "aussieOutages": [],
+                "currentNbnOutages": [],
+                "scheduledNbnOutages": [],
+                "resolvedScheduledNbnOutages": [],
+                "resolvedNbnOutages": [],
+            }
+        if name == "service_plans":
+            return {"current": {}, "pending": None, "available": [], "filters": [], "typicalEveningSpeeds": {}}
+        if name == "support_tickets":
+            return []
+        if name == "telephony_usage":
+            return TEST_MOCKDATA["telephony_usage"]
+        if name == "test_line_state":
+            return {"id": 1, "status": "Completed", "result": "Pass"}
+        if name == "voip_devices":
+            return [{"username": "mock", "password": "mock", "registered": True}]
+        if name == "voip_service":
+            return TEST_MOCKDATA["service_voip"]["voipDetails"]
+        return {}
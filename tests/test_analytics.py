@@ -0,0 +1,93 @@
+"""tests the fleet usage analytics"""
+
+from datetime import date, timedelta
+import math
+import sys
+
+import pytest
+
+from aussiebb.usagestore import UsageStore
+
+
+def test_needs_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    """without numpy you get an ImportError saying how to install it"""
+    from aussiebb.analytics import FleetUsage
+
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    with pytest.raises(ImportError, match="pyaussiebb\\[numpy\\]"):
+        FleetUsage.from_usage({1: {"usedMb": 1}})
+
+
+def test_fleet_rates() -> None:
+    """burn rates, projections and quota runway come from daysTotal and daysRemaining"""
+    pytest.importorskip("numpy")
+    from aussiebb.analytics import FleetUsage
+
+    fleet = FleetUsage.from_usage(
+        {
+            2: {"usedMb": 1000, "remainingMb": 500, "daysTotal": 30, "daysRemaining": 20},
+            1: {"usedMb": 300, "remainingMb": None, "daysTotal": 30, "daysRemaining": 27},
+            3: {"usedMb": 0, "daysTotal": 30, "daysRemaining": 30},
+            4: {"national": {"calls": 10, "cost": 5.0}, "daysTotal": 31, "daysRemaining": 21},
+        }
+    )
+    assert fleet.service_ids.tolist() == [1, 2, 3, 4]
+    assert fleet.burn_rate()[:2].tolist() == [100.0, 100.0]
+    assert math.isnan(fleet.burn_rate()[2])
+    assert fleet.projected()[:2].tolist() == [3000.0, 3000.0]
+    runway = fleet.days_until_exhausted()
+    assert math.isnan(runway[0]) and runway[1] == 5.0
+    assert fleet.running_out().tolist() == [2]
+    assert fleet.burn_rate("national.cost")[3] == 0.5
+    assert all(math.isnan(value) for value in fleet.column("missing"))
+
+
+def test_history_from_store() -> None:
+    """daily usage handles billing period resets, and months roll up by usage, max and last value"""
+    pytest.importorskip("numpy")
+    from aussiebb.analytics import UsageHistory
+
+    start = date(2025, 1, 30)
+    with UsageStore() as store:
+        # service 1 uses 10MB a day and its period resets on the 1st, service 2 only has two readings
+        for offset in range(32):
+            day = start + timedelta(days=offset)
+            store.append(1, {"usedMb": day.day * 10}, day=day)
+        store.append(2, {"usedMb": 50}, day=date(2025, 1, 31))
+        store.append(2, {"usedMb": 70}, day=date(2025, 2, 15))
+        history = UsageHistory.from_store(store, "usedMb", start, date(2025, 3, 2))
+
+    assert history.service_ids.tolist() == [1, 2]
+    assert history.values.shape == (2, 32)
+    assert history.end == date(2025, 3, 2)
+    daily = history.daily_usage()
+    assert math.isnan(daily[0, 0])
+    assert daily[0, 1:].tolist() == [10.0] * 31
+    assert history.burn_rate()[0] == 10.0
+
+    months, usage = history.monthly()
+    assert months == [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)]
+    assert usage[0].tolist() == [10.0, 280.0, 20.0]
+    assert math.isnan(usage[1, 0]) and math.isnan(usage[1, 1])
+
+    _, last = history.monthly("last")
+    assert last[0].tolist() == [310.0, 280.0, 20.0]
+    assert last[1, :2].tolist() == [50.0, 70.0] and math.isnan(last[1, 2])
+    _, largest = history.monthly("max")
+    assert largest[0].tolist() == [310.0, 280.0, 20.0]
+
+    later, deltas = history.month_over_month("last")
+    assert later == months[1:]
+    assert deltas[0].tolist() == [-30.0, -260.0]
+    with pytest.raises(ValueError):
+        history.monthly("median")
+
+
+def test_history_from_points() -> None:
+    """points outside the range are dropped"""
+    pytest.importorskip("numpy")
+    from aussiebb.analytics import UsageHistory
+
+    history = UsageHistory.from_points([(5, date(2025, 1, 1), 1.0), (5, date(2025, 2, 1), 2.0)], date(2025, 1, 1), date(2025, 1, 10))
+    assert history.values.shape == (1, 10)
+    assert history.values[0, 0] == 1.0
@@ -0,0 +1,58 @@
+"""tests the asyncio bulk fan-out API against the mock server"""
+
+from typing import List
+
+import aiohttp
+import pytest
+
+from aussiebb.asyncio import AussieBB
+from aussiebb.types import BulkServiceResult
+
+from .mockserver import MockAussieAPI
+
+
+# an account with some latency, so calls overlap
+MOCK_API = {"services": 20, "per_page": 50, "latency": 0.02}
+
+
+async def test_bulk_service_calls(server: MockAussieAPI) -> None:
+    """every service/method pair comes back, and the concurrency limit is respected"""
+    service_ids = [service["service_id"] for service in server.services]
+    methods = ["get_usage", "service_outages", "service_boltons", "service_datablocks"]
+    async with aiohttp.ClientSession() as session:
+        client = AussieBB("mock", "mock", session=session)
+        client.BASEURL = server.baseurl
+        await client.login()
+        await client.get_services()
+        server.reset_counters()
+
+        results: List[BulkServiceResult] = [result async for result in client.bulk_service_calls(service_ids, methods, concurrency=5)]
+
+    assert len(results) == len(service_ids) * len(methods)
+    assert all(result.ok for result in results)
+    assert {(result.service_id, result.method) for result in results} == {(service_id, method) for service_id in service_ids for method in methods}
+    assert 1 < server.max_inflight <= 5
+
+
+async def test_bulk_service_calls_errors(server: MockAussieAPI) -> None:
+    """a failing call is reported without cancelling the rest of the batch"""
+    service_ids = [server.services[0]["service_id"], 999, server.services[1]["service_id"]]
+    async with aiohttp.ClientSession() as session:
+        client = AussieBB("mock", "mock", session=session)
+        client.BASEURL = server.baseurl
+        results = [result async for result in client.bulk_service_calls(service_ids, ["service_outages"])]
+
+    failed = [result for result in results if not result.ok]
+    assert len(results) == 3
+    assert len(failed) == 1
+    assert failed[0].service_id == 999
+    assert isinstance(failed[0].error, aiohttp.ClientResponseError)
+
+
+async def test_bulk_service_calls_bad_method() -> None:
+    """only per-service methods can be used"""
+    async with aiohttp.ClientSession() as session:
+        client = AussieBB("mock", "mock", session=session)
+        with pytest.raises(ValueError):
+            async for _ in client.bulk_service_calls([1], ["get_customer_details"]):
+                pass
@@ -0,0 +1,59 @@
+"""fleet analytics with numpy arrays, against the same sums in Python loops"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from .benchmark import run_sync
+
+pytestmark = pytest.mark.benchmark
+
+SERVICES = 2000
+DAYS = 365
+START = date(2025, 1, 1)
+
+
+def rows() -> List[Tuple[int, int, float]]:
+    """a year of usedMb, resetting every 31 days"""
+    return [(service_id, START.toordinal() + day, float((service_id % 50 + 1) * (day % 31 + 1) * 100)) for service_id in range(SERVICES) for day in range(DAYS)]
+
+
+def loop_month_over_month(history: Dict[int, List[float]]) -> Dict[int, List[float]]:
+    """month-over-month usage the slow way"""
+    month_of_day = [(START + timedelta(days=day)).month for day in range(DAYS)]
+    deltas = {}
+    for service_id, values in history.items():
+        monthly = [0.0] * 12
+        for day in range(1, DAYS):
+            used = values[day] - values[day - 1]
+            monthly[month_of_day[day] - 1] += values[day] if used < 0 else used
+        deltas[service_id] = [monthly[month] - monthly[month - 1] for month in range(1, 12)]
+    return deltas
+
+
+def test_analytics_vs_loops() -> None:
+    """month-over-month deltas and burn rates over a year for the fleet, vectorised and looped"""
+    np = pytest.importorskip("numpy")
+    from aussiebb.analytics import FleetUsage, UsageHistory
+
+    data = rows()
+    end = START + timedelta(days=DAYS - 1)
+    history = UsageHistory.from_ordinals(data, START, end)
+    by_service: Dict[int, List[float]] = {}
+    for service_id, _, value in data:
+        by_service.setdefault(service_id, []).append(value)
+
+    run_sync("analytics load year", None, lambda: UsageHistory.from_ordinals(data, START, end), 5)
+    vectorised = run_sync("analytics month_over_month", None, history.month_over_month, 20)
+    looped = run_sync("loops month_over_month", None, lambda: loop_month_over_month(by_service), 3, allocation_iterations=1)
+    _, deltas = history.month_over_month()
+    assert np.allclose(deltas[7], loop_month_over_month(by_service)[7])
+    assert vectorised.percentile(50) < looped.percentile(50)
+
+    usage: Dict[int, Dict[str, Any]] = {
+        service_id: {"usedMb": service_id * 10.0, "remainingMb": 100000.0, "daysTotal": 31, "daysRemaining": service_id % 31} for service_id in range(SERVICES * 5)
+    }
+    fleet = FleetUsage.from_usage(usage)
+    run_sync("analytics fleet load", None, lambda: FleetUsage.from_usage(usage), 5)
+    run_sync("analytics fleet running_out", None, fleet.running_out, 50)
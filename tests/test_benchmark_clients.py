@@ -0,0 +1,103 @@
+"""throughput, latency and allocation benchmarks for both clients, against the mock API server
+
+Run them on their own with `just benchmark`.
+"""
+
+import aiohttp
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.const import PHONE_TYPES
+
+from .benchmark import run_async, run_sync
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 50
+
+
+# an account with a few pages of services
+MOCK_API = {"services": 40, "per_page": 10}
+
+
+@pytest.fixture(name="client")
+def fixture_client(server: MockAussieAPI) -> AussieBB:
+    """sync client pointed at the mock server"""
+    client = AussieBB("benchmark", "benchmark")
+    client.BASEURL = server.baseurl
+    return client
+
+
+def sync_sweep(client: AussieBB) -> None:
+    """everything a poller would pull for an account"""
+    client.get_customer_details()
+    services = client.get_services() or []
+    for service in services:
+        service_id = service["service_id"]
+        client.get_usage(service_id)
+        if service["type"] not in PHONE_TYPES:
+            client.service_outages(service_id)
+            client.service_boltons(service_id)
+            client.service_datablocks(service_id)
+
+
+async def async_sweep(client: AsyncAussieBB) -> None:
+    """everything a poller would pull for an account"""
+    await client.get_customer_details()
+    for service in await client.get_services():
+        service_id = service["service_id"]
+        await client.get_usage(service_id)
+        if service["type"] not in PHONE_TYPES:
+            await client.service_outages(service_id)
+            await client.service_boltons(service_id)
+            await client.service_datablocks(service_id)
+
+
+def test_sync_get_services(server: MockAussieAPI, client: AussieBB) -> None:
+    """sync get_services, walking every page"""
+    result = run_sync("sync get_services", server, client.get_services, ITERATIONS)
+    assert result.requests == ITERATIONS * 4
+
+
+def test_sync_get_usage(server: MockAussieAPI, client: AussieBB) -> None:
+    """sync get_usage for a single NBN service"""
+    service_id = server.services[0]["service_id"]
+    result = run_sync("sync get_usage", server, lambda: client.get_usage(service_id), ITERATIONS)
+    assert result.requests == ITERATIONS
+
+
+def test_sync_account_sweep(server: MockAussieAPI, client: AussieBB) -> None:
+    """sync full account sweep"""
+    result = run_sync("sync account sweep", server, lambda: sync_sweep(client), 5)
+    assert result.requests > 0
+
+
+async def test_async_get_services(server: MockAussieAPI) -> None:
+    """async get_services, walking every page"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("benchmark", "benchmark", session=session)
+        client.BASEURL = server.baseurl
+        result = await run_async("async get_services", server, client.get_services, ITERATIONS)
+    assert result.requests == ITERATIONS * 4
+
+
+async def test_async_get_usage(server: MockAussieAPI) -> None:
+    """async get_usage for a single NBN service"""
+    service_id = server.services[0]["service_id"]
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("benchmark", "benchmark", session=session)
+        client.BASEURL = server.baseurl
+        await client.get_services()
+        result = await run_async("async get_usage", server, lambda: client.get_usage(service_id), ITERATIONS)
+    assert result.requests == ITERATIONS
+
+
+async def test_async_account_sweep(server: MockAussieAPI) -> None:
+    """async full account sweep"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("benchmark", "benchmark", session=session)
+        client.BASEURL = server.baseurl
+        result = await run_async("async account sweep", server, lambda: async_sweep(client), 5)
+    assert result.requests > 0
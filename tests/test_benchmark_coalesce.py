@@ -0,0 +1,53 @@
+"""many callers asking for the same thing at once, with and without coalescing"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+
+from .benchmark import run_async, run_sync
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 10
+CALLERS = 25
+
+
+# a little latency, so the callers overlap
+MOCK_API = {"latency": 0.01}
+
+
+async def test_async_coalescing(server: MockAussieAPI) -> None:
+    """CALLERS coroutines calling get_customer_details and service_outages at once"""
+    service_id = server.services[0]["service_id"]
+    results = {}
+    for coalesce in (False, True):
+        client = AsyncAussieBB("benchmark", "benchmark", coalesce=coalesce)
+        client.BASEURL = server.baseurl
+
+        async def fan_out(client: AsyncAussieBB = client) -> None:
+            await asyncio.gather(*[client.get_customer_details() for _ in range(CALLERS)], *[client.service_outages(service_id) for _ in range(CALLERS)])
+
+        results[coalesce] = await run_async(f"async fan out coalesce={coalesce}", server, fan_out, ITERATIONS)
+        await client.close()
+    assert results[True].requests == ITERATIONS * 2
+    assert results[True].requests < results[False].requests
+
+
+def test_sync_coalescing(server: MockAussieAPI) -> None:
+    """CALLERS threads calling get_customer_details at once"""
+    results = {}
+    for coalesce in (False, True):
+        client = AussieBB("benchmark", "benchmark", coalesce=coalesce)
+        client.BASEURL = server.baseurl
+        with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+
+            def fan_out(client: AussieBB = client) -> None:
+                list(executor.map(lambda _: client.get_customer_details(), range(CALLERS)))
+
+            results[coalesce] = run_sync(f"sync fan out coalesce={coalesce}", server, fan_out, ITERATIONS)
+    assert results[True].requests < results[False].requests
@@ -0,0 +1,100 @@
+"""compares parsing a body into a dict and then validating it, against validating the bytes directly"""
+
+from functools import partial
+import json
+from typing import Any, Callable, Dict, Type
+
+from pydantic import BaseModel
+import pytest
+
+from aussiebb.jsonbackend import JSON_BACKENDS, get_json_loads
+from aussiebb.types import AussieBBOutage, FetchService, OrderDetailResponseModel, VOIPDetails
+from aussiebb.validation import ValidationPolicy
+
+from .benchmark import run_sync
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 50
+
+
+def outage(index: int) -> Dict[str, Any]:
+    """an outage record, with a summary about as long as the real ones"""
+    return {
+        "reference": 66522 + index,
+        "title": "Network Maintenance",
+        "summary": "Please be aware of upcoming maintenance on the Aussie Broadband network.\r\n" * 20,
+        "start_time": "2022-02-13T17:00:00Z",
+        "end_time": "2022-02-13T18:00:00Z",
+        "restored_at": None,
+        "last_updated": "2022-02-13T18:30:00Z",
+    }
+
+
+PAYLOADS: Dict[str, Any] = {
+    "outages": (
+        AussieBBOutage,
+        {
+            "networkEvents": [outage(index) for index in range(50)],
+            "aussieOutages": [outage(index) for index in range(50)],
+            "currentNbnOutages": [],
+            "scheduledNbnOutages": [],
+            "resolvedScheduledNbnOutages": [],
+            "resolvedNbnOutages": [],
+        },
+    ),
+    "order": (
+        OrderDetailResponseModel,
+        {
+            "id": 500000,
+            "status": "Complete",
+            "plan": "NBN 100/40Mbps",
+            "address": "123 DRURY LN, SUBURBTON",
+            "appointment": "",
+            "appointmentRescheduleCode": 0,
+            "statuses": ["Complete"] * 20,
+        },
+    ),
+    "voip_service": (VOIPDetails, {"phoneNumber": "0912345678", "barInternational": True, "divertNumber": None, "supportsNumberDiversion": True}),
+    "fetch_service": (FetchService, MockAussieAPI.make_service(0)),
+}
+
+
+@pytest.mark.parametrize("name", list(PAYLOADS))
+def test_typed_decoding(name: str) -> None:
+    """json.loads + model_validate, against model_validate_json"""
+    model: Type[BaseModel] = PAYLOADS[name][0]
+    body = json.dumps(PAYLOADS[name][1]).encode("utf-8")
+    assert model.model_validate(json.loads(body)) == model.model_validate_json(body)
+
+    dict_path = run_sync(f"{name} loads+model_validate", None, lambda: model.model_validate(json.loads(body)), ITERATIONS)
+    bytes_path = run_sync(f"{name} model_validate_json", None, lambda: model.model_validate_json(body), ITERATIONS)
+    if name == "outages":
+        # big enough that skipping the intermediate dicts shows up clearly
+        assert bytes_path.percentile(50) < dict_path.percentile(50)
+
+
+def test_validation_policies() -> None:
+    """full validation against building the models without validating them"""
+    model, payload = PAYLOADS["outages"]
+    body = json.dumps(payload).encode("utf-8")
+    full = ValidationPolicy("full")
+    trusted = ValidationPolicy("trusted")
+    validated = run_sync("outages full validation", None, lambda: full.decode(body, model, json.loads), ITERATIONS)
+    constructed = run_sync("outages trusted", None, lambda: trusted.decode(body, model, json.loads), ITERATIONS)
+    print(f"trusted takes {constructed.percentile(50) / validated.percentile(50):.0%} of the time of full validation")
+
+
+def test_untyped_backends() -> None:
+    """each JSON backend on a big page of services"""
+    server = MockAussieAPI(services=500)
+    body = json.dumps({"data": server.services, "links": {"next": None}, "meta": {"current_page": 1}}).encode("utf-8")
+    expected = json.loads(body)
+    for backend in JSON_BACKENDS:
+        try:
+            loads: Callable[[bytes], Any] = get_json_loads(backend)
+        except ImportError:
+            continue
+        assert loads(body) == expected
+        run_sync(f"get_services page, {backend} backend", None, partial(loads, body), ITERATIONS)
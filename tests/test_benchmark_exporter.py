@@ -0,0 +1,51 @@
+"""scraping the exporter's snapshot, against calling the API on every scrape"""
+
+from typing import Dict
+
+import aiohttp
+import pytest
+
+from aussiebb.asyncio import AussieBB
+from aussiebb.asyncio.exporter import UsageExporter
+from aussiebb.openmetrics import render, usage_families
+
+from .benchmark import BenchmarkResult, run_async
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 20
+
+
+async def test_scrape_latency() -> None:
+    """scrapes of the snapshot stay quick as the number of services grows, live scrapes don't"""
+    results: Dict[str, BenchmarkResult] = {}
+    for services in (10, 200):
+        with MockAussieAPI(services=services, per_page=100, latency=0.005) as server:
+            client = AussieBB("benchmark", "benchmark")
+            client.BASEURL = server.baseurl
+            exporter = UsageExporter(client, concurrency=10)
+            await exporter.refresh()
+            runner = await exporter.serve(port=0)
+            url = f"http://127.0.0.1:{runner.addresses[0][1]}/metrics"
+
+            async with aiohttp.ClientSession() as session:
+
+                async def scrape(session: aiohttp.ClientSession = session, url: str = url) -> None:
+                    async with session.get(url) as response:
+                        await response.read()
+
+                results[f"snapshot {services}"] = await run_async(f"scrape snapshot services={services}", server, scrape, ITERATIONS)
+
+            async def live(client: AussieBB = client, server: MockAussieAPI = server) -> None:
+                usage = {}
+                async for result in client.bulk_service_calls([service["service_id"] for service in server.services], ["get_usage"], concurrency=10):
+                    usage[result.service_id] = result.result
+                render(usage_families({}, usage, {}))
+
+            results[f"live {services}"] = await run_async(f"scrape live services={services}", server, live, 3)
+            await exporter.stop()
+            await client.close()
+
+    assert results["snapshot 200"].requests == 0
+    assert results["snapshot 200"].percentile(50) < results["live 200"].percentile(50) / 10
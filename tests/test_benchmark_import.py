@@ -0,0 +1,53 @@
+"""times importing the package from cold, and keeps it under a budget
+
+Uses `python -X importtime` in a fresh interpreter for each run, only counting modules a bare interpreter doesn't import anyway.
+"""
+
+from statistics import median
+import subprocess
+import sys
+from typing import Dict, Set
+
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+RUNS = 5
+
+# milliseconds, well above what they take on a laptop so slow CI machines don't trip them -
+# they're here to catch something heavy being imported eagerly again
+BUDGETS = {
+    "import aussiebb": 25,
+    "import aussiebb.asyncio": 25,
+    "from aussiebb import AussieBB": 400,
+    "from aussiebb import AussieBB; AussieBB('user', 'password')": 700,
+    "from aussiebb.asyncio import AussieBB": 900,
+}
+
+
+def import_times(statement: str) -> Dict[str, int]:
+    """cumulative microseconds for each top level import while running `statement` in a fresh interpreter"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # nested imports are already in their parent's cumulative time
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def import_time(statement: str, startup: Set[str]) -> float:
+    """milliseconds spent importing modules for `statement`, leaving out the interpreter's own startup imports"""
+    return sum(cumulative for name, cumulative in import_times(statement).items() if name not in startup) / 1000
+
+
+@pytest.mark.parametrize("statement", list(BUDGETS))
+def test_import_budget(statement: str) -> None:
+    """cold import time is under budget"""
+    startup = set(import_times("pass"))
+    elapsed = median(import_time(statement, startup) for _ in range(RUNS))
+    print(f"{statement:<60} {elapsed:>8.1f}ms (budget {BUDGETS[statement]}ms)")
+    assert elapsed < BUDGETS[statement]
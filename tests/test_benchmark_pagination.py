@@ -0,0 +1,83 @@
+"""compares walking get_services pages one at a time against pulling them concurrently, and streaming them with prefetch"""
+
+import asyncio
+from time import sleep
+
+import aiohttp
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+
+from .benchmark import run_async, run_sync
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 5
+
+
+# twenty pages of services, with a little latency on each
+MOCK_API = {"services": 200, "per_page": 10, "latency": 0.01}
+
+
+def test_sync_pagination(server: MockAussieAPI) -> None:
+    """sync client, sequential vs thread pool"""
+    client = AussieBB("benchmark", "benchmark")
+    client.BASEURL = server.baseurl
+
+    sequential = run_sync("sync get_services sequential", server, lambda: client.get_services(page_concurrency=1), ITERATIONS)
+    expected = client.services
+    concurrent = run_sync("sync get_services page_concurrency=8", server, lambda: client.get_services(page_concurrency=8), ITERATIONS)
+
+    assert client.services == expected
+    assert [service["service_id"] for service in client.services] == [service["service_id"] for service in server.services]
+    assert concurrent.percentile(50) < sequential.percentile(50)
+
+
+async def test_async_pagination(server: MockAussieAPI) -> None:
+    """async client, sequential vs concurrent"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("benchmark", "benchmark", session=session)
+        client.BASEURL = server.baseurl
+
+        sequential = await run_async("async get_services sequential", server, lambda: client.get_services(page_concurrency=1), ITERATIONS)
+        expected = client.services
+        concurrent = await run_async("async get_services page_concurrency=8", server, lambda: client.get_services(page_concurrency=8), ITERATIONS)
+
+    assert client.services == expected
+    assert [service["service_id"] for service in client.services] == [service["service_id"] for service in server.services]
+    assert concurrent.percentile(50) < sequential.percentile(50)
+
+
+def test_sync_streaming_prefetch(server: MockAussieAPI) -> None:
+    """iter_services with some work per page, prefetching overlaps the next request with the work"""
+    client = AussieBB("benchmark", "benchmark")
+    client.BASEURL = server.baseurl
+
+    def consume(prefetch: bool) -> None:
+        for index, _ in enumerate(client.iter_services(prefetch=prefetch)):
+            if index % server.per_page == 0:
+                sleep(0.01)
+
+    plain = run_sync("sync iter_services", server, lambda: consume(False), ITERATIONS)
+    prefetched = run_sync("sync iter_services prefetch", server, lambda: consume(True), ITERATIONS)
+    assert prefetched.percentile(50) < plain.percentile(50)
+
+
+async def test_async_streaming_prefetch(server: MockAussieAPI) -> None:
+    """iter_services with some work per page, asyncio client"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("benchmark", "benchmark", session=session)
+        client.BASEURL = server.baseurl
+
+        async def consume(prefetch: bool) -> None:
+            index = 0
+            async for _ in client.iter_services(prefetch=prefetch):
+                if index % server.per_page == 0:
+                    await asyncio.sleep(0.01)
+                index += 1
+
+        plain = await run_async("async iter_services", server, lambda: consume(False), ITERATIONS)
+        prefetched = await run_async("async iter_services prefetch", server, lambda: consume(True), ITERATIONS)
+    assert prefetched.percentile(50) < plain.percentile(50)
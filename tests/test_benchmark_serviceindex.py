@@ -0,0 +1,81 @@
+"""compares scanning the services list against the service index, up to 50k services"""
+
+from typing import Any, Dict, List
+
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.const import USAGE_ENABLED_SERVICE_TYPES
+
+from .benchmark import BenchmarkResult, run_async, run_sync
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+SIZES = [1_000, 10_000, 50_000]
+LOOKUPS = 500
+
+
+def make_services(count: int) -> List[Dict[str, Any]]:
+    """synthetic services, shallow copies of the mock server's templates"""
+    templates = [MockAussieAPI.make_service(index) for index in range(4)]
+    return [dict(templates[index % 4], service_id=100000 + index) for index in range(count)]
+
+
+def scan(services: List[Dict[str, Any]], service_id: int) -> Dict[str, Any]:
+    """how get_usage used to find a service"""
+    for service in services:
+        if service_id == service["service_id"]:
+            return service
+    raise KeyError(service_id)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_service_lookup_scaling(size: int) -> None:
+    """index lookups stay flat as the account grows, scanning doesn't"""
+    client = AussieBB("benchmark", "benchmark")
+    services = make_services(size)
+    # spread the lookups over the list, so the scan's average case is half of it
+    service_ids = [services[(index * 7919) % size]["service_id"] for index in range(LOOKUPS)]
+
+    results: Dict[str, BenchmarkResult] = {}
+    results["build"] = run_sync(f"index update, nothing changed n={size}", None, lambda: setattr(client, "services", list(services)), 5)
+    results["scan"] = run_sync(f"scan lookups n={size}", None, lambda: [scan(services, service_id) for service_id in service_ids], 5)
+    results["index"] = run_sync(f"index lookups n={size}", None, lambda: [client.service_index.get(service_id) for service_id in service_ids], 5)
+    results["filter"] = run_sync(f"filter_services n={size}", None, lambda: client.filter_services(USAGE_ENABLED_SERVICE_TYPES, drop_unknown_types=True), 5)
+
+    # a refresh which changes 1% of the services
+    refreshed = list(services)
+    for index in range(0, size, 100):
+        refreshed[index] = dict(refreshed[index], type="Opticomm")
+
+    def refresh() -> None:
+        client.services = refreshed
+        client.services = services
+
+    results["refresh"] = run_sync(f"refresh 1% changed n={size}", None, refresh, 5)
+
+    assert len(client.filter_services(["NBN"])) == size - size // 4
+    assert results["index"].percentile(50) * 20 < results["scan"].percentile(50)
+
+
+@pytest.mark.parametrize("size", [1_000, 50_000])
+async def test_async_get_usage_scaling(size: int) -> None:
+    """get_usage with cached services costs the same however many services the account has"""
+    with MockAussieAPI(services=size, per_page=5_000) as server:
+        client = AsyncAussieBB("benchmark", "benchmark", page_concurrency=4)
+        client.BASEURL = server.baseurl
+        await client.get_services()
+        # services from the start of the list, the mock server finds them with a scan and we're timing the client
+        service_ids = [service["service_id"] for service in server.services[:200] if service["type"] != "VOIP"][::4]
+
+        async def poll() -> None:
+            for service_id in service_ids:
+                await client.get_usage(service_id)
+
+        result = await run_async(f"async get_usage cached n={size}", server, poll, 5)
+        await client.close()
+    # one request per call, the services aren't pulled again
+    assert result.requests == len(service_ids) * 5
+    assert result.percentile(50) / len(service_ids) < 0.002
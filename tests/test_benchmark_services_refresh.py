@@ -0,0 +1,49 @@
+"""get_services(use_cached=True) once the cache has expired, waiting for the refresh against serving stale data"""
+
+from time import perf_counter
+from typing import List
+
+import pytest
+
+from aussiebb import AussieBB
+
+from .benchmark import BenchmarkResult
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+ITERATIONS = 10
+
+
+# five pages of services, with a little latency on each
+MOCK_API = {"services": 50, "per_page": 10, "latency": 0.01}
+
+
+def test_expired_services(server: MockAussieAPI) -> None:
+    """the caller after the cache expires, with and without services_stale_time"""
+    results = {}
+    for stale_time in (0, 3600):
+        client = AussieBB("benchmark", "benchmark", services_cache_time=60, services_stale_time=stale_time)
+        client.BASEURL = server.baseurl
+        client.get_services()
+
+        latencies: List[float] = []
+        start = perf_counter()
+        for _ in range(ITERATIONS):
+            client.services_last_update -= 120
+            call_start = perf_counter()
+            client.get_services(use_cached=True)
+            latencies.append(perf_counter() - call_start)
+            # only the caller's wait is timed, not the background refresh
+            if client.services_refresh is not None:
+                client.services_refresh.join()
+        result = BenchmarkResult(
+            name=f"expired get_services stale_time={stale_time}",
+            iterations=ITERATIONS,
+            requests=0,
+            elapsed=perf_counter() - start,
+            latencies=latencies,
+        )
+        print(result.report())
+        results[stale_time] = result
+    assert results[3600].percentile(50) < results[0].percentile(50) / 10
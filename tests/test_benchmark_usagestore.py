@@ -0,0 +1,58 @@
+"""ingesting a year of daily usage for a large fleet, and querying it back"""
+
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict
+
+import pytest
+
+from aussiebb.usagestore import UsageStore
+
+from .benchmark import run_sync
+
+pytestmark = pytest.mark.benchmark
+
+SERVICES = 1000
+DAYS = 365
+START = date(2025, 1, 1)
+END = START + timedelta(days=DAYS - 1)
+
+
+def usage(service_id: int, day: int) -> Dict[str, Any]:
+    """a get_usage response partway through a 31 day billing period"""
+    into_period = day % 31
+    return {
+        "usedMb": (service_id % 50 + 1) * into_period * 100,
+        "downloadedMb": (service_id % 50 + 1) * into_period * 90,
+        "uploadedMb": (service_id % 50 + 1) * into_period * 10,
+        "remainingMb": None,
+        "daysTotal": 31,
+        "daysRemaining": 31 - into_period,
+        "lastUpdated": f"{START + timedelta(days=day)} 00:00:00",
+    }
+
+
+def test_usagestore_year(tmp_path: Path) -> None:
+    """ingest rate for a year of daily snapshots, then single service, fleet and downsampled query latency"""
+    with UsageStore(tmp_path / "usage.db") as store:
+        started = perf_counter()
+        written = 0
+        for day in range(DAYS):
+            written += store.append_many((service_id, usage(service_id, day)) for service_id in range(SERVICES))
+        elapsed = perf_counter() - started
+        print(f"ingest {SERVICES} services x {DAYS} days: {written} values in {elapsed:.2f}s, {written / elapsed:.0f} values/s")
+        assert written == SERVICES * DAYS * 5
+        assert written / elapsed > 20000
+
+        one = run_sync("usagestore one service, one year", None, lambda: store.query("usedMb", START, END, service_ids=[SERVICES // 2]), 200)
+        fleet = run_sync("usagestore fleet, one day", None, lambda: store.query("usedMb", END, END), 50)
+        month = run_sync("usagestore fleet, 30 days", None, lambda: store.query("usedMb", END - timedelta(days=29), END), 10)
+        weekly = run_sync("usagestore fleet, one year weekly max", None, lambda: store.downsample("usedMb", START, END, bucket_days=7), 5)
+
+        assert len(store.query("usedMb", START, END, service_ids=[1])) == DAYS
+        assert len(store.downsample("usedMb", START, END, bucket_days=7)) == SERVICES * 53
+        assert one.percentile(50) < 0.01
+        assert fleet.percentile(50) < 0.05
+        assert month.percentile(50) < 0.5
+        assert weekly.percentile(50) < 5
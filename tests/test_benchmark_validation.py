@@ -0,0 +1,158 @@
+"""validation throughput for every model in aussiebb.types, and list adapters against validating a model at a time"""
+
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from pydantic import BaseModel, TypeAdapter
+import pytest
+
+from aussiebb import types
+from aussiebb.const import TEST_MOCKDATA
+
+from .benchmark import run_sync
+from .mockserver import MockAussieAPI
+
+pytestmark = pytest.mark.benchmark
+
+# how many of each model are validated per iteration
+BATCH = 200
+ITERATIONS = 20
+
+LINKS = {"first": "https://example.com/?page=1", "last": "https://example.com/?page=1", "prev": None, "next": None}
+META = {"current_page": 1, "from": 1, "last_page": 1, "path": "https://example.com/", "per_page": 10, "to": 10, "total": 10}
+OUTAGE = {
+    "reference": 66522,
+    "title": "Network Maintenance",
+    "summary": "Please be aware of upcoming maintenance on the Aussie Broadband network.",
+    "start_time": "2022-02-13T17:00:00Z",
+    "end_time": "2022-02-13T18:00:00Z",
+    "restored_at": None,
+    "last_updated": None,
+}
+SCHEDULED_OUTAGE = {"start_date": "2021-08-17T14:00:00Z", "end_date": "2021-08-17T20:00:00Z", "duration": "6.0"}
+ORDER = {"id": 500000, "status": "Complete", "type": "NBN", "description": "Mock order"}
+ORDER_DETAIL = {
+    "id": 500000,
+    "status": "Complete",
+    "plan": "NBN 100/40Mbps",
+    "address": "123 DRURY LN, SUBURBTON",
+    "appointment": "",
+    "appointmentRescheduleCode": 0,
+    "statuses": ["Complete"],
+}
+CONTACT = {"id": 1, "first_name": "Mock", "last_name": "User", "email": ["mock@example.com"], "dob": "1970-01-01", "primary_contact": True}
+SUBSCRIPTION = {"name": "Kids", "description": "Kids channels", "costCents": 600, "startDate": "2021-01-01T00:00:00Z", "endDate": None}
+NBN_SERVICE: Dict[str, Any] = TEST_MOCKDATA["service_nbn_fttc"]
+VOIP_SERVICE: Dict[str, Any] = TEST_MOCKDATA["service_voip"]
+
+# a representative payload for each model
+SAMPLES: Dict[str, Any] = {
+    "AccountTransaction": {"id": 1, "type": "invoice", "time": "2021-08-01", "description": "Invoice", "amountCents": 8400, "runningBalanceCents": 0},
+    "ServiceTest": {"name": "Line State", "description": "Checks the line state", "link": "https://example.com/tests/1/linestate"},
+    "APIResponseLinks": LINKS,
+    "APIResponseMeta": META,
+    "ServiceRecord": NBN_SERVICE,
+    "PaginatedResponse": {"data": [ORDER] * 3, "links": LINKS, "meta": META},
+    "GetServicesResponse": {"data": [MockAussieAPI.make_service(index) for index in range(10)], "links": LINKS, "meta": META},
+    "ConfigUser": {"username": "mock", "password": "hunter2"},
+    "AussieBBConfigFile": {"users": [{"username": "mock", "password": "hunter2"}]},
+    "OutageRecord": OUTAGE,
+    "ScheduledOutageRecord": SCHEDULED_OUTAGE,
+    "AussieBBOutage": {
+        "networkEvents": [OUTAGE],
+        "aussieOutages": [OUTAGE],
+        "currentNbnOutages": [],
+        "scheduledNbnOutages": [SCHEDULED_OUTAGE],
+        "resolvedScheduledNbnOutages": [SCHEDULED_OUTAGE],
+        "resolvedNbnOutages": [],
+    },
+    "OrderData": ORDER,
+    "OrderDetailResponseModel": ORDER_DETAIL,
+    "OrderDetailResponse": {**ORDER_DETAIL, "appointment_reschedule_code": 0},
+    "OrderResponse": {"data": [ORDER] * 3, "links": LINKS, "meta": META},
+    "VOIPDevice": {"username": "mock", "password": "mock", "registered": True},
+    "AccountContact": CONTACT,
+    "Address": NBN_SERVICE["address"],
+    "BaseService": NBN_SERVICE,
+    "FetchSubscription": SUBSCRIPTION,
+    "FetchSubscriptionDict": {"Premium Channels": [SUBSCRIPTION]},
+    "FetchService": NBN_SERVICE,
+    "FetchDetails": {
+        "id": 1,
+        "maxOutstandingCents": 10000,
+        "currentAvailableSpendCents": 10000,
+        "transactions": [],
+        "subscriptions": {"Premium Channels": [SUBSCRIPTION]},
+    },
+    "VOIPDetails": VOIP_SERVICE["voipDetails"],
+    # the mock VOIP service has no address, which BaseService requires
+    "VOIPService": {**VOIP_SERVICE, "address": NBN_SERVICE["address"]},
+    "NBNDetails": NBN_SERVICE["nbnDetails"],
+    "NBNService": NBN_SERVICE,
+    "MFAMethod": {"method": "sms"},
+    "BulkServiceResult": {"service_id": 1, "method": "get_usage", "result": {}},
+    "DownloadResult": {"item_id": 1, "download_type": "invoice", "path": Path("invoice.pdf"), "status": "downloaded", "size": 1024},
+    "AccountResult": {"username": "mock", "result": {}},
+}
+
+LIST_ADAPTERS: Dict[str, Tuple[TypeAdapter[List[Any]], Any]] = {
+    "SERVICE_TEST_LIST": (types.SERVICE_TEST_LIST, types.ServiceTest),
+    "VOIP_DEVICE_LIST": (types.VOIP_DEVICE_LIST, types.VOIPDevice),
+    "ACCOUNT_CONTACT_LIST": (types.ACCOUNT_CONTACT_LIST, types.AccountContact),
+    "SERVICE_LIST": (types.SERVICE_LIST, types.ServiceRecord),
+}
+
+
+def model_names() -> List[str]:
+    """the pydantic models and TypedDicts defined in aussiebb.types, pydantic adds parametrised generics to the module too"""
+    names = []
+    for name, value in vars(types).items():
+        if not inspect.isclass(value) or value.__module__ != types.__name__ or name.startswith("_") or "[" in name:
+            continue
+        if issubclass(value, BaseModel) or hasattr(value, "__total__"):
+            names.append(name)
+    return names
+
+
+def test_every_model_has_a_sample() -> None:
+    """new models need a sample here so they're benchmarked too"""
+    assert sorted(model_names()) == sorted(SAMPLES)
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+def test_model_throughput(name: str) -> None:
+    """validates a batch of each model through a list adapter, reporting models per second"""
+    adapter: TypeAdapter[List[Any]] = TypeAdapter(List[getattr(types, name)])  # type: ignore[arg-type,misc]
+    batch = [SAMPLES[name]] * BATCH
+    assert len(adapter.validate_python(batch)) == BATCH
+
+    result = run_sync(f"validate {name}", None, lambda: adapter.validate_python(batch), ITERATIONS)
+    print(f"{name:<40} {BATCH / result.percentile(50):>12,.0f} models/s")
+
+
+@pytest.mark.parametrize("name", list(LIST_ADAPTERS))
+def test_list_adapters(name: str) -> None:
+    """one TypeAdapter call on the body, against json.loads and a model_validate per item"""
+    adapter, model = LIST_ADAPTERS[name]
+    sample = SAMPLES[model.__name__]
+    body = json.dumps([sample] * BATCH).encode("utf-8")
+
+    if issubclass(model, BaseModel):
+
+        def per_item() -> List[Any]:
+            return [model.model_validate(item) for item in json.loads(body)]
+
+    else:
+        item_adapter: TypeAdapter[Any] = TypeAdapter(model)
+
+        def per_item() -> List[Any]:
+            return [item_adapter.validate_python(item) for item in json.loads(body)]
+
+    assert per_item() == adapter.validate_json(body)
+    loop = run_sync(f"{name} per item", None, per_item, ITERATIONS)
+    batched = run_sync(f"{name} adapter", None, lambda: adapter.validate_json(body), ITERATIONS)
+    if name != "SERVICE_LIST":
+        # services are mostly untyped extra fields, so there's little between the two
+        assert batched.percentile(50) < loop.percentile(50)
@@ -0,0 +1,141 @@
+"""tests the response caches"""
+
+from pathlib import Path
+from typing import List, Optional
+
+import aiohttp
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.cache import DiskCache, MemoryCache, ResponseCache
+
+from .mockserver import MockAussieAPI
+
+
+# a small account
+MOCK_API = {"services": 4}
+
+
+@pytest.fixture(name="cache", params=["memory", "disk"])
+def fixture_cache(request: pytest.FixtureRequest, tmp_path: Path) -> ResponseCache:
+    """one of each kind of cache"""
+    if request.param == "memory":
+        return MemoryCache(max_entries=2)
+    return DiskCache(tmp_path, max_entries=2)
+
+
+def test_cache_lru(cache: ResponseCache) -> None:
+    """the least recently used entries go first"""
+    cache.set("get_orders", "one", b"1")
+    cache.set("get_orders", "two", b"2")
+    assert cache.get("get_orders", "one") == b"1"
+    cache.set("get_orders", "three", b"3")
+    assert cache.get("get_orders", "two") is None
+    assert cache.get("get_orders", "one") == b"1"
+    assert cache.get("get_orders", "three") == b"3"
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1, "entries": 2}
+
+
+def test_cache_ttl(cache: ResponseCache) -> None:
+    """expired and uncached endpoints come back as misses"""
+    cache.ttls["get_orders"] = -1
+    cache.set("get_orders", "one", b"1")
+    assert cache.get("get_orders", "one") is None
+    cache.set("get_usage", "one", b"1")
+    assert cache.get("get_usage", "one") is None
+    cache.ttls["get_orders"] = 0.000001
+    cache.set("get_orders", "one", b"1")
+    assert cache.get("get_orders", "one") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_invalidate(cache: ResponseCache) -> None:
+    """invalidating an endpoint leaves the others alone"""
+    cache.set("get_orders", "one", b"1")
+    cache.set("account_contacts", "one", b"1")
+    cache.invalidate("get_orders")
+    assert cache.get("get_orders", "one") is None
+    assert cache.get("account_contacts", "one") == b"1"
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
+
+
+def test_response_cache_is_abstract() -> None:
+    """the base class can't be used without storage"""
+    with pytest.raises(TypeError, match="abstract"):
+        ResponseCache()  # type: ignore[abstract]  # pylint: disable=abstract-class-instantiated
+
+
+def test_disk_cache_lists_directory_only_when_full(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """the entry count's kept in memory, the directory's listed once it's over the limit and eviction leaves headroom"""
+    DiskCache(tmp_path, max_entries=20).set("get_orders", "existing", b"0")
+    cache = DiskCache(tmp_path, max_entries=20)
+    assert cache.stats()["entries"] == 1
+
+    listings: List[Optional[str]] = []
+    files = cache._files  # pylint: disable=protected-access
+
+    def listing(endpoint: Optional[str] = None) -> List[Path]:
+        listings.append(endpoint)
+        return files(endpoint)
+
+    monkeypatch.setattr(cache, "_files", listing)
+    for index in range(19):
+        cache.set("get_orders", str(index), b"1")
+    cache.set("get_orders", "1", b"replaced")
+    assert not listings
+    assert cache.stats()["entries"] == 20
+
+    cache.set("get_orders", "19", b"1")
+    assert listings == [None]
+    assert cache.stats()["evictions"] == 3
+    assert cache.stats()["entries"] == 18
+    assert cache.get("get_orders", "existing") is None
+    assert cache.get("get_orders", "0") is None
+    assert cache.get("get_orders", "1") == b"replaced"
+    cache.invalidate()
+    assert cache.stats()["entries"] == 0
+
+
+def test_endpoint_name() -> None:
+    """URLs map back to their endpoint names"""
+    assert AussieBB.endpoint_name("https://myaussie-api.aussiebroadband.com.au/customer?v=2") == "get_customer_details"
+    assert AussieBB.endpoint_name("https://myaussie-api.aussiebroadband.com.au/tests/12345/available") == "get_service_tests"
+    assert AussieBB.endpoint_name("https://myaussie-api.aussiebroadband.com.au/planchange/12345") == "service_plans"
+    assert AussieBB.endpoint_name("https://myaussie-api.aussiebroadband.com.au/nothing/here") is None
+
+
+def test_sync_client_cache(server: MockAussieAPI) -> None:
+    """repeat calls to cached endpoints don't hit the API, usage isn't cached"""
+    client = AussieBB("mock", "mock", cache=MemoryCache())
+    client.BASEURL = server.baseurl
+    service_id = server.services[0]["service_id"]
+    for _ in range(3):
+        assert client.get_customer_details()["customer_number"]
+        client.account_contacts()
+        client.get_usage(service_id, use_cached=False)
+    assert server.calls["get_customer_details"] == 1
+    assert server.calls["account_contacts"] == 1
+    assert server.calls["get_usage"] == 3
+
+    client.invalidate_cache("get_customer_details")
+    client.get_customer_details()
+    assert server.calls["get_customer_details"] == 2
+
+
+async def test_async_client_cache(server: MockAussieAPI, tmp_path: Path) -> None:
+    """the async client shares a disk cache with a later client"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("mock", "mock", session=session, cache=DiskCache(tmp_path))
+        client.BASEURL = server.baseurl
+        await client.get_customer_details()
+        await client.account_contacts()
+
+        second = AsyncAussieBB("mock", "mock", session=session, cache=DiskCache(tmp_path))
+        second.BASEURL = server.baseurl
+        await second.get_customer_details()
+        await second.account_contacts()
+
+    assert server.calls["get_customer_details"] == 1
+    assert server.calls["account_contacts"] == 1
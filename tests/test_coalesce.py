@@ -0,0 +1,127 @@
+"""tests sharing in-flight GETs between concurrent callers"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.coalesce import Coalescer
+from aussiebb.deadline import deadline
+from aussiebb.exceptions import DeadlineExceeded
+
+from .mockserver import MockAussieAPI
+
+CALLERS = 20
+
+
+# a mock API which takes a moment to answer, so callers overlap
+MOCK_API = {"latency": 0.1}
+
+
+async def test_async_coalesces(server: MockAussieAPI) -> None:
+    """concurrent identical GETs send one request, different params send their own"""
+    client = AsyncAussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    await client.login()
+    results = await asyncio.gather(*[client.get_customer_details() for _ in range(CALLERS)])
+    assert all(result == results[0] for result in results)
+    assert server.calls["get_customer_details"] == 1
+    assert client.coalescer is not None
+    assert client.coalescer.stats() == {"requests": CALLERS, "coalesced": CALLERS - 1, "inflight": 0}
+
+    url = client.get_url("get_customer_details")
+    await asyncio.gather(client.request_get_json(url, params={"v": "1"}), client.request_get_json(url, params={"v": "2"}))
+    assert server.calls["get_customer_details"] == 3
+    await client.close()
+
+
+def test_sync_coalesces(server: MockAussieAPI) -> None:
+    """threads sharing a client share its in-flight requests"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    client.login()
+    barrier = threading.Barrier(CALLERS)
+
+    def call(_: int) -> object:
+        barrier.wait()
+        return client.get_customer_details()
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+        results = list(executor.map(call, range(CALLERS)))
+    assert all(result == results[0] for result in results)
+    assert server.calls["get_customer_details"] < CALLERS
+    assert client.coalescer is not None
+    assert client.coalescer.stats()["coalesced"] == CALLERS - server.calls["get_customer_details"]
+
+
+async def test_accounts_dont_share(server: MockAussieAPI) -> None:
+    """clients sharing a coalescer only share requests within an account"""
+    coalescer = Coalescer()
+    clients = [AsyncAussieBB(f"mock{index}", "mock", coalesce=coalescer) for index in range(2)]
+    for client in clients:
+        client.BASEURL = server.baseurl
+        await client.login()
+    await asyncio.gather(*[clients[index % 2].get_customer_details() for index in range(10)])
+    assert server.calls["get_customer_details"] == 2
+    assert coalescer.stats()["coalesced"] == 8
+    for client in clients:
+        await client.close()
+
+
+async def test_disabled(server: MockAussieAPI) -> None:
+    """coalesce=False sends every request"""
+    client = AsyncAussieBB("mock", "mock", coalesce=False)
+    client.BASEURL = server.baseurl
+    await client.login()
+    await asyncio.gather(*[client.get_customer_details() for _ in range(5)])
+    assert server.calls["get_customer_details"] == 5
+    assert client.coalescer is None
+    await client.close()
+
+
+async def test_cancelling_the_leader(server: MockAussieAPI) -> None:
+    """cancelling the caller which started the request doesn't cancel it for the others"""
+    client = AsyncAussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    await client.login()
+    leader = asyncio.ensure_future(client.get_customer_details())
+    await asyncio.sleep(0.01)
+    follower = asyncio.ensure_future(client.get_customer_details())
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert (await follower)["customer_number"]
+    assert leader.cancelled()
+    assert server.calls["get_customer_details"] == 1
+    await client.close()
+
+
+async def test_errors_and_deadlines() -> None:
+    """everyone waiting gets the error, and a follower stops waiting at its own deadline"""
+    coalescer = Coalescer()
+    started = asyncio.Event()
+
+    async def fail() -> bytes:
+        started.set()
+        await asyncio.sleep(0.05)
+        raise ValueError("broken")
+
+    first = asyncio.ensure_future(coalescer.run_async("key", fail))
+    await started.wait()
+    with pytest.raises(ValueError):
+        await coalescer.run_async("key", fail)
+    with pytest.raises(ValueError):
+        await first
+
+    async def slow() -> bytes:
+        await asyncio.sleep(0.3)
+        return b"done"
+
+    first = asyncio.ensure_future(coalescer.run_async("slow", slow))
+    await asyncio.sleep(0)
+    with pytest.raises(DeadlineExceeded), deadline(0.05):
+        await coalescer.run_async("slow", slow)
+    assert await first == b"done"
+    assert coalescer.stats() == {"requests": 4, "coalesced": 2, "inflight": 0}
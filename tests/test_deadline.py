@@ -0,0 +1,132 @@
+"""tests deadlines and timeouts across both clients"""
+
+import asyncio
+from time import monotonic
+
+import pytest
+import requests
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.deadline import current_deadline, deadline, socket_timeouts
+from aussiebb.exceptions import DeadlineExceeded
+from aussiebb.ratelimit import RateLimiter
+from aussiebb.retry import RetryPolicy
+from aussiebb.transport import TransportConfig
+
+from .mockserver import MockAussieAPI
+
+
+def test_nested_deadlines_only_shorten() -> None:
+    """an inner deadline can't outlast the outer one, and the timeouts come back afterwards"""
+    assert current_deadline() is None
+    with deadline(1):
+        outer = current_deadline()
+        assert outer is not None
+        with deadline(60, read=5):
+            assert current_deadline() == outer
+            connect, read = socket_timeouts(TransportConfig(), current_deadline())
+            assert connect is not None and read is not None
+            assert read <= 1 and connect <= 1
+        with deadline(0.5):
+            inner = current_deadline()
+            assert inner is not None and inner < outer
+    assert current_deadline() is None
+    assert socket_timeouts(TransportConfig(connect_timeout=3, read_timeout=7), None) == (3, 7)
+    with deadline(read=30):
+        assert socket_timeouts(TransportConfig(connect_timeout=3, read_timeout=7), None) == (3, 30)
+
+
+def test_rate_limiter_wait_past_deadline() -> None:
+    """the limiter won't hold a request past its deadline"""
+    limiter = RateLimiter()
+    limiter.block_for(5)
+    with pytest.raises(DeadlineExceeded):
+        limiter.acquire(max_wait=0.1)
+
+
+def test_sync_deadline() -> None:
+    """a slow response is abandoned at the deadline"""
+    with MockAussieAPI(latency=0.5) as server:
+        client = AussieBB("mock", "mock")
+        client.BASEURL = server.baseurl
+        client.login()
+        start = monotonic()
+        with pytest.raises(DeadlineExceeded), deadline(0.1):
+            client.get_customer_details()
+        assert monotonic() - start < 0.4
+
+
+def test_sync_read_timeout() -> None:
+    """the client's read timeout applies to every request, and can be raised for a block"""
+    with MockAussieAPI(latency=0.3) as server:
+        client = AussieBB("mock", "mock", transport=TransportConfig(read_timeout=0.1), retry=RetryPolicy(max_attempts=1))
+        client.BASEURL = server.baseurl
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            client.login()
+        with deadline(read=2):
+            client.login()
+            assert client.get_customer_details()["customer_number"]
+
+
+def test_sync_deadline_across_pages() -> None:
+    """a deadline around get_services covers every page, including ones fetched by other threads"""
+    with MockAussieAPI(services=60, per_page=10, latency=0.05) as server:
+        client = AussieBB("mock", "mock")
+        client.BASEURL = server.baseurl
+        client.login()
+        with pytest.raises(DeadlineExceeded), deadline(0.18):
+            client.get_services()
+        assert server.calls["get_services"] < 6
+
+        server.reset_counters()
+        with pytest.raises(DeadlineExceeded), deadline(0.18):
+            list(client.iter_services(prefetch=True))
+        assert server.calls["get_services"] < 6
+
+        with pytest.raises(DeadlineExceeded), deadline(0.08):
+            client.get_services(page_concurrency=3)
+
+
+async def test_async_deadline() -> None:
+    """a slow response is cancelled at the deadline, and the client carries on working afterwards"""
+    with MockAussieAPI(latency=0.3) as server:
+        client = AsyncAussieBB("mock", "mock")
+        client.BASEURL = server.baseurl
+        await client.login()
+        start = monotonic()
+        with pytest.raises(DeadlineExceeded):
+            with deadline(0.1):
+                await client.get_customer_details()
+        assert monotonic() - start < 0.25
+        assert (await client.get_customer_details())["customer_number"]
+        await client.close()
+
+
+async def test_async_cancellation() -> None:
+    """cancelling a call part way through leaves nothing behind"""
+    with MockAussieAPI(latency=0.2) as server:
+        client = AsyncAussieBB("mock", "mock")
+        client.BASEURL = server.baseurl
+        await client.login()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.get_customer_details(), 0.05)
+        assert (await client.get_customer_details())["customer_number"]
+        stats = client.transport_stats()
+        assert stats["waiting"] == 0
+        await client.close()
+
+
+async def test_async_deadline_across_fan_out() -> None:
+    """a deadline around bulk_service_calls covers every call in it"""
+    with MockAussieAPI(services=20, latency=0.1) as server:
+        client = AsyncAussieBB("mock", "mock")
+        client.BASEURL = server.baseurl
+        await client.login()
+        service_ids = [service["service_id"] for service in server.services]
+        with deadline(0.15):
+            results = [result async for result in client.bulk_service_calls(service_ids, ["service_boltons"], concurrency=5)]
+        assert len(results) == 20
+        assert any(isinstance(result.error, DeadlineExceeded) for result in results)
+        assert any(result.error is None for result in results)
+        await client.close()
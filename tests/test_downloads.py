@@ -0,0 +1,143 @@
+"""tests streaming billing documents to disk"""
+
+import io
+from pathlib import Path
+from typing import List
+
+import aiohttp
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.exceptions import RateLimitException
+from aussiebb.types import DownloadResult
+
+from .mockserver import MockAussieAPI
+
+DOCUMENT_SIZE = 4 * 1024 * 1024
+
+
+# documents big enough that buffering them would show up
+MOCK_API = {"document_size": DOCUMENT_SIZE}
+
+
+class RecordingFile(io.BytesIO):
+    """remembers the biggest single write"""
+
+    largest_write = 0
+
+    def write(self, data: "bytes | bytearray | memoryview", /) -> int:  # type: ignore[override]
+        self.largest_write = max(self.largest_write, len(data))
+        return super().write(data)
+
+
+def test_sync_download_streams(server: MockAussieAPI, tmp_path: Path) -> None:
+    """the document ends up on disk, and goes through a chunk at a time"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    path = tmp_path / "invoice.pdf"
+
+    result = client.download_billing_document("invoice", 9000, path)
+    assert result.status == "downloaded" and result.size == DOCUMENT_SIZE
+    assert path.read_bytes() == server.document_body("invoice-9000")
+    assert not client.download_part_path(path).exists()
+
+    buffer = RecordingFile()
+    result = client.download_billing_document("invoice", 9000, buffer, chunk_size=1024)
+    assert buffer.getvalue() == server.document_body("invoice-9000")
+    assert buffer.largest_write <= 1024
+
+
+def test_sync_download_resumes(server: MockAussieAPI, tmp_path: Path) -> None:
+    """a partial file only has the rest fetched, a complete one fetches nothing"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    expected = server.document_body("receipt-9001")
+    path = tmp_path / "receipt.pdf"
+
+    client.download_part_path(path).write_bytes(expected[:1000])
+    result = client.download_billing_document("receipt", 9001, path)
+    assert result.status == "resumed" and result.size == len(expected) - 1000
+    assert path.read_bytes() == expected
+
+    client.download_part_path(path).write_bytes(expected)
+    result = client.download_billing_document("receipt", 9001, path)
+    assert result.status == "resumed" and result.size == 0
+    assert path.read_bytes() == expected
+
+
+def test_sync_download_transactions(server: MockAussieAPI, tmp_path: Path) -> None:
+    """bulk downloads skip what's already there"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    results = list(client.download_transactions(tmp_path))
+    assert sorted(result.status for result in results) == ["downloaded"] * 4
+    for result in results:
+        assert result.path.read_bytes() == server.document_body(f"{result.download_type}-{result.item_id}")
+
+    results = list(client.download_transactions(tmp_path))
+    assert sorted(result.status for result in results) == ["skipped"] * 4
+    assert server.calls["billing_invoice"] + server.calls["billing_receipt"] == 4
+
+
+def test_sync_download_failure_with_module_exception(server: MockAussieAPI, tmp_path: Path) -> None:
+    """one download raising one of the module's exceptions is reported as failed, and the rest carry on"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    transactions = client.account_transactions()
+    failing = client.flatten_transactions(transactions)[0]
+    download_billing_document = client.download_billing_document
+
+    def download(download_type: str, item_id: int, destination: Path, resume: bool = True) -> DownloadResult:
+        if item_id == failing["id"]:
+            raise RateLimitException("slow down")
+        return download_billing_document(download_type, item_id, destination, resume=resume)
+
+    client.download_billing_document = download  # type: ignore[method-assign,assignment]
+    statuses = {result.item_id: result for result in client.download_transactions(tmp_path, transactions)}
+    assert statuses[failing["id"]].status == "failed"
+    assert isinstance(statuses[failing["id"]].error, RateLimitException)
+    assert sorted(result.status for result in statuses.values()) == ["downloaded", "downloaded", "downloaded", "failed"]
+
+
+async def test_async_download_transactions(server: MockAussieAPI, tmp_path: Path) -> None:
+    """the async client resumes partial files and skips complete ones"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("mock", "mock", session=session)
+        client.BASEURL = server.baseurl
+        transactions = await client.account_transactions()
+        first, second = client.flatten_transactions(transactions)[:2]
+
+        (tmp_path / client.transaction_filename(first)).write_bytes(b"already here")
+        partial = tmp_path / client.transaction_filename(second)
+        client.download_part_path(partial).write_bytes(server.document_body(f"{second['type']}-{second['id']}")[:5000])
+
+        results: List[DownloadResult] = []
+        async for result in client.download_transactions(tmp_path, transactions, concurrency=2):
+            results.append(result)
+
+    statuses = {result.item_id: result.status for result in results}
+    assert statuses[first["id"]] == "skipped"
+    assert statuses[second["id"]] == "resumed"
+    assert sorted(statuses.values()) == ["downloaded", "downloaded", "resumed", "skipped"]
+    for result in results:
+        assert result.ok
+        if result.status != "skipped":
+            assert result.path.read_bytes() == server.document_body(f"{result.download_type}-{result.item_id}")
+
+
+async def test_async_download_failure(server: MockAussieAPI, tmp_path: Path) -> None:
+    """a failed download is reported rather than raised, and unknown types are left alone"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("mock", "mock", session=session)
+        client.BASEURL = server.baseurl
+        transactions = {
+            "January 2024": [
+                {"id": 1, "type": "credit", "time": "2024-01-01", "description": "", "amountCents": 0, "runningBalanceCents": 0},
+                {"id": 2, "type": "adjustment", "time": "2024-01-02", "description": "", "amountCents": 0, "runningBalanceCents": 0},
+            ]
+        }
+        results = [result async for result in client.download_transactions(tmp_path, transactions)]
+    assert len(results) == 1
+    assert results[0].status == "failed"
+    assert isinstance(results[0].error, aiohttp.ClientResponseError)
+    assert not results[0].path.exists()
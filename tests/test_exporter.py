@@ -0,0 +1,155 @@
+"""tests the OpenMetrics exporter and its rendering"""
+
+import asyncio
+from typing import Any, Dict
+
+import aiohttp
+import pytest
+
+from aussiebb.asyncio import AussieBB
+from aussiebb.asyncio.exporter import UsageExporter
+from aussiebb.const import TEST_MOCKDATA
+from aussiebb.exceptions import RateLimitException
+from aussiebb.openmetrics import MetricFamily, escape_label, render, usage_families
+from aussiebb.retry import RetryPolicy
+
+from .mockserver import MockAussieAPI
+
+
+# six NBN services and two VOIP ones
+MOCK_API = {"services": 8}
+
+
+def test_render() -> None:
+    """families render with their metadata, counters get _total and the text ends with # EOF"""
+    counter = MetricFamily("things", "counter", "Things.")
+    counter.add(3)
+    gauge = MetricFamily("size_bytes", "gauge", "Size.", "bytes")
+    gauge.add(1.5, name='a "quoted"\nname')
+    gauge.add(2.0, name="b")
+    assert render([counter, gauge]).splitlines() == [
+        "# TYPE things counter",
+        "# HELP things Things.",
+        "things_total 3",
+        "# TYPE size_bytes gauge",
+        "# UNIT size_bytes bytes",
+        "# HELP size_bytes Size.",
+        'size_bytes{name="a \\"quoted\\"\\nname"} 1.5',
+        'size_bytes{name="b"} 2',
+        "# EOF",
+    ]
+    assert escape_label("back\\slash") == "back\\\\slash"
+
+
+def test_usage_families() -> None:
+    """broadband and telephony payloads turn into their own metrics, nulls are skipped"""
+    services = {1: {"type": "NBN"}, 2: {"type": "VOIP"}}
+    usage: Dict[int, Dict[str, Any]] = {
+        1: {"usedMb": 2048, "downloadedMb": 2000, "uploadedMb": 48, "remainingMb": None, "daysTotal": 31, "daysRemaining": 12},
+        2: TEST_MOCKDATA["telephony_usage"],
+    }
+    outages: Dict[int, Dict[str, Any]] = {1: {"networkEvents": [{}], "aussieOutages": []}}
+    text = render(usage_families(services, usage, outages))
+    assert 'aussiebb_usage_used_megabytes{service_id="1",service_type="NBN"} 2048' in text
+    assert "aussiebb_usage_remaining_megabytes{" not in text
+    assert 'aussiebb_telephony_calls{category="sms",service_id="2",service_type="VOIP"} 0' in text
+    assert 'aussiebb_telephony_internet_kilobytes{service_id="2",service_type="VOIP"} 0' in text
+    assert 'aussiebb_billing_period_days_remaining{service_id="2",service_type="VOIP"} 2' in text
+    assert 'aussiebb_outages{kind="networkEvents",service_id="1",service_type="NBN"} 1' in text
+
+
+async def test_scrapes_dont_call_the_api(server: MockAussieAPI) -> None:
+    """the exporter refreshes in the background, and scrapes are served from the last refresh"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    exporter = UsageExporter(client, usage_interval=3600)
+    await exporter.refresh()
+    assert exporter.stats()["services"] == 8
+    assert server.calls["get_usage"] == 6
+    assert server.calls["telephony_usage"] == 2
+    assert server.calls["service_outages"] == 8
+
+    runner = await exporter.serve(port=0)
+    port = runner.addresses[0][1]
+    server.reset_counters()
+    async with aiohttp.ClientSession() as session:
+        for _ in range(5):
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+                body = await response.text()
+    assert body.endswith("# EOF\n")
+    assert body.count("aussiebb_usage_used_megabytes{") == 6
+    assert "aussiebb_exporter_refreshes_total 1" in body
+    assert sum(server.calls.values()) == 0
+    await exporter.stop()
+    await client.close()
+
+
+async def test_failed_calls_keep_last_values(server: MockAussieAPI) -> None:
+    """a service whose call fails keeps its last value, and the failure's counted"""
+    client = AussieBB("mock", "mock", retry=RetryPolicy(max_attempts=1))
+    client.BASEURL = server.baseurl
+    exporter = UsageExporter(client, concurrency=1)
+    await exporter.refresh(outages=False)
+    server.fail_next(500)
+    await exporter.refresh(outages=False)
+    assert exporter.failed_calls == 1
+    assert len(exporter.usage) == 8
+    assert b"aussiebb_exporter_failed_calls 1" in exporter.body
+    await client.close()
+
+
+async def test_refreshes_fit_the_rate_limit() -> None:
+    """once the limit's known, refreshes are spaced so they use at most budget_share of it"""
+    with MockAussieAPI(services=8, ratelimit=100) as limited:
+        client = AussieBB("mock", "mock")
+        client.BASEURL = limited.baseurl
+        exporter = UsageExporter(client, usage_interval=1, outages_interval=1, budget_share=0.5)
+        await exporter.refresh()
+    limiter = client.rate_limiter
+    assert limiter.limit == 100
+    # 8 services, two calls each, in half of the budget
+    assert exporter.next_refresh_in() == pytest.approx(16 * limiter.window / 50)
+    client.rate_limiter.block_for(600)
+    assert exporter.next_refresh_in() > 500
+    await client.close()
+
+
+async def test_background_refresh(server: MockAussieAPI) -> None:
+    """start() refreshes straight away, stop() cancels the task"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    async with UsageExporter(client) as exporter:
+        refresher = exporter.refresher
+        assert refresher is not None
+        while exporter.refreshes == 0:
+            await asyncio.sleep(0.01)
+    assert refresher.cancelled()
+    await client.close()
+
+
+async def test_background_refresh_survives_rate_limits(server: MockAussieAPI) -> None:
+    """a refresh that's rate limited is counted as failed and the next one still runs"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    get_services = client.get_services
+    attempts = 0
+
+    async def limited(*args: Any, **kwargs: Any) -> Any:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RateLimitException("slow down")
+        return await get_services(*args, **kwargs)
+
+    client.get_services = limited  # type: ignore[method-assign]
+    async with UsageExporter(client, usage_interval=0.01) as exporter:
+
+        async def refreshed() -> None:
+            while exporter.refreshes == 0:
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(refreshed(), 5)
+        assert exporter.failed_refreshes == 1
+        assert exporter.refresher is not None and not exporter.refresher.done()
+    await client.close()
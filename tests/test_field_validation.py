@@ -1,9 +1,17 @@
 """ pyaussiebb tests """
-from pydantic import SecretStr
+import asyncio
+import json
+
+from pydantic import SecretStr, ValidationError
 import pytest
 
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
 from aussiebb.baseclass import BaseClass
 from aussiebb.exceptions import UnrecognisedServiceType
+from aussiebb.types import SERVICE_LIST, AccountContact, AussieBBOutage, ScheduledOutageRecord, ServiceTest, VOIPDevice
+
+from .mockserver import MockAussieAPI
 
 
 def test_validate_service_type() -> None:
@@ -21,3 +29,76 @@ def test_validate_service_type() -> None:
     )
     with pytest.raises(UnrecognisedServiceType):
         test.validate_service_type({"type": "Cheese", "name": "testservice"})
+    # not every service has a name, which shouldn't hide the real problem
+    with pytest.raises(UnrecognisedServiceType):
+        test.validate_service_type({"type": "Cheese"})
+
+
+def test_scheduled_outages() -> None:
+    """scheduled outage records are validated, not just allowed through"""
+    outages = AussieBBOutage.model_validate(
+        {
+            "networkEvents": [],
+            "aussieOutages": [],
+            "currentNbnOutages": [],
+            "scheduledNbnOutages": [],
+            "resolvedScheduledNbnOutages": [{"start_date": "2021-08-17T14:00:00Z", "end_date": "2021-08-17T20:00:00Z", "duration": "6.0"}],
+            "resolvedNbnOutages": [],
+        }
+    )
+    assert isinstance(outages.resolvedScheduledNbnOutages[0], ScheduledOutageRecord)
+    assert outages.resolvedScheduledNbnOutages[0].duration == 6.0
+
+
+def test_service_list() -> None:
+    """services keep their type-specific fields, but need the common ones"""
+    service = MockAussieAPI.make_service(3)
+    services = SERVICE_LIST.validate_json(json.dumps([service]))
+    assert services == [service]
+
+    # hardware and some VOIP services don't have these
+    for field in ("name", "plan", "description"):
+        del service[field]
+    assert SERVICE_LIST.validate_python([service]) == [service]
+
+    del service["type"]
+    with pytest.raises(ValidationError):
+        SERVICE_LIST.validate_python([service])
+
+
+@pytest.mark.parametrize("mode", ["full", "sampled", "trusted"])
+def test_services_without_optional_fields(mode: str) -> None:
+    """services missing their name, plan or description work whatever the validation mode"""
+    with MockAussieAPI(services=4) as server:
+        for service in server.services[2:]:
+            for field in ("name", "plan", "description"):
+                del service[field]
+        client = AussieBB("mock", "mock", validation=mode)
+        client.BASEURL = server.baseurl
+        assert len(client.get_services() or []) == 4
+        assert "usedMb" in client.get_usage(server.services[2]["service_id"])
+        assert "national" in client.get_usage(server.services[3]["service_id"])
+
+
+def test_list_endpoints() -> None:
+    """list endpoints come back as models from both clients"""
+    with MockAussieAPI(services=4) as server:
+        client = AussieBB("mock", "mock")
+        client.BASEURL = server.baseurl
+        nbn, voip = server.services[0]["service_id"], server.services[3]["service_id"]
+        assert [contact.contact_id for contact in client.account_contacts()] == [1]
+        assert isinstance(client.get_voip_devices(voip)[0], VOIPDevice)
+        assert client.get_service_tests(nbn)[0].name == "Line State"
+
+        async def check_async() -> None:
+            async_client = AsyncAussieBB("mock", "mock")
+            async_client.BASEURL = server.baseurl
+            try:
+                assert isinstance((await async_client.account_contacts())[0], AccountContact)
+                assert (await async_client.get_voip_devices(voip))[0].registered
+                assert isinstance((await async_client.get_service_tests(nbn))[0], ServiceTest)
+                assert len(await async_client.get_services(page_concurrency=2)) == 4
+            finally:
+                await async_client.close()
+
+        asyncio.run(check_async())
@@ -0,0 +1,61 @@
+"""checks what importing the package pulls in, each check runs in a fresh interpreter"""
+
+import subprocess
+import sys
+from typing import List
+
+import pytest
+
+
+def loaded_modules(statement: str, modules: List[str]) -> List[str]:
+    """which of `modules` are imported after running `statement` in a fresh interpreter"""
+    check = f"import sys; {statement}; print(','.join(module for module in {modules!r} if module in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    return [module for module in result.stdout.strip().split(",") if module]
+
+
+@pytest.mark.parametrize("statement", ["import aussiebb", "import aussiebb.asyncio", "import aussiebb.const, aussiebb.exceptions"])
+def test_package_import_is_cheap(statement: str) -> None:
+    """importing the packages doesn't load the HTTP libraries or pydantic"""
+    assert loaded_modules(statement, ["requests", "aiohttp", "pydantic", "aussiebb.client", "aussiebb.types"]) == []
+
+
+def test_clients_only_load_their_own_transport() -> None:
+    """the sync client doesn't load aiohttp or asyncio, the asyncio client doesn't load requests"""
+    assert loaded_modules("from aussiebb import AussieBB", ["requests", "aiohttp", "asyncio"]) == []
+    assert loaded_modules("from aussiebb import AussieBB; AussieBB('user', 'password')", ["requests", "aiohttp"]) == ["requests"]
+    assert loaded_modules("from aussiebb.asyncio import AussieBB", ["requests", "aiohttp"]) == ["aiohttp"]
+
+
+def test_lazy_attributes() -> None:
+    """the client and submodules can still be reached from the package"""
+    import aussiebb  # pylint: disable=import-outside-toplevel
+    from aussiebb.client import AussieBB  # pylint: disable=import-outside-toplevel
+
+    assert aussiebb.AussieBB is AussieBB
+    assert aussiebb.types.VOIPDetails.__name__ == "VOIPDetails"
+    assert "AussieBB" in dir(aussiebb)
+    with pytest.raises(AttributeError):
+        getattr(aussiebb, "NotAThing")
+
+
+@pytest.mark.parametrize("package", ["aussiebb", "aussiebb.asyncio"])
+def test_lazy_submodules(package: str) -> None:
+    """every submodule can be reached as an attribute of its package, in a fresh interpreter so none are imported already"""
+    check = (
+        f"import importlib, pkgutil, types; package = importlib.import_module({package!r})\n"
+        "for module in pkgutil.iter_modules(package.__path__):\n"
+        "    value = getattr(package, module.name)\n"
+        "    assert isinstance(value, types.ModuleType) and value.__name__ == f'{package.__name__}.{module.name}', (module.name, value)\n"
+        "print(len(package.SUBMODULES))"
+    )
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=False)
+    assert result.returncode == 0, result.stderr
+    assert int(result.stdout) > 3
+
+
+def test_missing_aiohttp() -> None:
+    """the asyncio client raises ImportError without aiohttp, rather than exiting"""
+    check = "import sys; sys.modules['aiohttp'] = None\ntry:\n    from aussiebb.asyncio import AussieBB\nexcept ImportError as error:\n    print(error)"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, check=True)
+    assert "needs aiohttp" in result.stdout
@@ -0,0 +1,94 @@
+"""tests the request hooks and their phase timings"""
+
+from typing import List
+
+import pytest
+import requests
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.instrument import RequestEvent, current_trace
+
+from .mockserver import MockAussieAPI
+
+
+def test_sync_events(server: MockAussieAPI) -> None:
+    """a call gets one event with its phases, and the login it needed gets its own"""
+    events: List[RequestEvent] = []
+    client = AussieBB("mock", "mock", hooks=[events.append])
+    client.BASEURL = server.baseurl
+    client.get_customer_details()
+
+    assert [event["endpoint"] for event in events] == ["login", "get_customer_details"]
+    event = events[1]
+    assert event["method"] == "GET"
+    assert event["status"] == 200
+    assert event["bytes"] > 0
+    assert event["retries"] == 0
+    assert event["error"] is None
+    assert {"login", "ratelimit", "ttfb", "body", "decode"} <= set(event["phases"])
+    assert event["phases"]["login"] >= events[0]["duration"] * 0.5
+    assert sum(event["phases"].values()) <= event["duration"] * 1.01
+
+    client.account_contacts()
+    assert "validate" in events[-1]["phases"]
+    assert current_trace() is None
+
+
+def test_sync_retries_and_errors(server: MockAussieAPI) -> None:
+    """retries are counted, and a call that fails still gets an event"""
+    events: List[RequestEvent] = []
+    client = AussieBB("mock", "mock", hooks=[events.append])
+    client.BASEURL = server.baseurl
+    client.login()
+    server.fail_next(503)
+    client.get_customer_details()
+    assert events[-1]["retries"] == 1
+    assert "retry" in events[-1]["phases"]
+
+    with pytest.raises(requests.HTTPError, match="404 Client Error"):
+        client.get_usage(999999)
+    assert events[-1]["status"] == 404
+    assert events[-1]["error"] is not None
+
+
+def test_broken_hook(server: MockAussieAPI) -> None:
+    """a hook that raises doesn't break the request, or stop the other hooks"""
+    events: List[RequestEvent] = []
+
+    def broken(event: RequestEvent) -> None:
+        raise ValueError("broken")
+
+    client = AussieBB("mock", "mock", hooks=[broken, events.append])
+    client.BASEURL = server.baseurl
+    assert client.get_customer_details()["customer_number"]
+    assert len(events) == 2
+
+
+async def test_async_events(server: MockAussieAPI) -> None:
+    """the asyncio client times connecting through its trace config, including for coalesced requests"""
+    events: List[RequestEvent] = []
+    client = AsyncAussieBB("mock", "mock", hooks=[events.append])
+    client.BASEURL = server.baseurl
+    await client.get_customer_details()
+
+    assert [event["endpoint"] for event in events] == ["login", "get_customer_details"]
+    assert "connect" in events[0]["phases"]
+    event = events[1]
+    assert event["status"] == 200
+    assert event["bytes"] > 0
+    assert {"login", "ratelimit", "ttfb", "body", "decode"} <= set(event["phases"])
+
+    await client.account_contacts()
+    assert "validate" in events[-1]["phases"]
+    await client.close()
+
+
+async def test_async_without_hooks(server: MockAussieAPI) -> None:
+    """without hooks the session doesn't get the phase tracer"""
+    client = AsyncAussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    await client.get_customer_details()
+    assert client.session is not None
+    assert len(client.session.trace_configs) == 1
+    await client.close()
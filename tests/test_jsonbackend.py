@@ -0,0 +1,66 @@
+"""tests the JSON backends and decoding straight into models"""
+
+import aiohttp
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.jsonbackend import JSON_BACKENDS, get_json_loads
+from aussiebb.types import FetchService, VOIPDetails
+
+from .mockserver import MockAussieAPI
+
+
+# a small account with a VOIP service
+MOCK_API = {"services": 4}
+
+
+@pytest.mark.parametrize("backend", JSON_BACKENDS)
+def test_backends(backend: str) -> None:
+    """every backend parses bytes the same way"""
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    loads = get_json_loads(backend)
+    assert loads(b'{"a": [1, 2.5, "three", null, true]}') == {"a": [1, 2.5, "three", None, True]}
+
+
+def test_backend_choices() -> None:
+    """functions are passed through, unknown names are rejected"""
+    assert get_json_loads(len) is len
+    with pytest.raises(ValueError):
+        get_json_loads("simplejson")
+
+
+def test_sync_client_backend(server: MockAussieAPI) -> None:
+    """untyped results are the same whichever backend's used, typed ones come straight from the bytes"""
+    expected = None
+    for backend in ["json", "pydantic"]:
+        client = AussieBB("mock", "mock", json_backend=backend)
+        client.BASEURL = server.baseurl
+        details = client.get_customer_details()
+        assert expected is None or details == expected
+        expected = details
+
+    voip = server.services[3]["service_id"]
+    assert isinstance(client.get_voip_service(voip), VOIPDetails)
+    assert isinstance(client.get_fetch_service(server.services[0]["service_id"]), FetchService)
+    assert client.get_order(500000)["id"] == 500000
+    assert set(client.service_outages(voip)) == {
+        "networkEvents",
+        "aussieOutages",
+        "currentNbnOutages",
+        "scheduledNbnOutages",
+        "resolvedScheduledNbnOutages",
+        "resolvedNbnOutages",
+    }
+
+
+async def test_async_request_get_model(server: MockAussieAPI) -> None:
+    """the async client decodes typed responses from the bytes too"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("mock", "mock", session=session, json_backend="pydantic")
+        client.BASEURL = server.baseurl
+        voip = await client.get_voip_service(server.services[3]["service_id"])
+        assert voip.phone_number == "0912345678"
+        assert (await client.get_order(500001))["id"] == 500001
+        assert (await client.get_customer_details())["customer_number"] == 123456
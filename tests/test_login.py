@@ -0,0 +1,74 @@
+"""tests that concurrent callers share one login"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+
+from .mockserver import MockAussieAPI
+
+CALLERS = 50
+
+
+# slow enough that the callers overlap
+MOCK_API = {"services": 4, "latency": 0.02}
+
+
+async def test_async_single_flight_login(server: MockAussieAPI) -> None:
+    """one login for the first requests, one when the token expires, one when it's revoked"""
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("mock", "mock", session=session, coalesce=False)
+        client.BASEURL = server.baseurl
+
+        async def fan_out() -> None:
+            await asyncio.gather(*[client.get_customer_details() for _ in range(CALLERS)])
+
+        await fan_out()
+        assert server.logins == 1
+
+        client.token_expires = 0
+        await fan_out()
+        assert server.logins == 2
+
+        server.expire_tokens()
+        await fan_out()
+        assert server.logins == 3
+    # the 401s never reach the handler, so each round counts once
+    assert server.calls["get_customer_details"] == CALLERS * 3
+
+
+def test_sync_single_flight_login(server: MockAussieAPI) -> None:
+    """threads sharing a client share its logins too"""
+    client = AussieBB("mock", "mock", coalesce=False)
+    client.BASEURL = server.baseurl
+
+    def fan_out() -> None:
+        with ThreadPoolExecutor(max_workers=CALLERS) as executor:
+            list(executor.map(lambda _: client.get_customer_details(), range(CALLERS)))
+
+    fan_out()
+    assert server.logins == 1
+
+    client.token_expires = 0
+    fan_out()
+    assert server.logins == 2
+
+    server.expire_tokens()
+    fan_out()
+    assert server.logins == 3
+
+
+def test_async_client_built_outside_the_loop(server: MockAussieAPI) -> None:
+    """the login lock is made inside the running loop, so a client built before asyncio.run works in it"""
+    client = AsyncAussieBB("mock", "mock", coalesce=False)
+    client.BASEURL = server.baseurl
+
+    async def login_concurrently() -> None:
+        await asyncio.gather(*[client.get_customer_details() for _ in range(CALLERS)])
+        await client.close()
+
+    asyncio.run(login_concurrently())
+    assert server.logins == 1
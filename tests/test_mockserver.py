@@ -0,0 +1,46 @@
+"""tests the mock API server behaves enough like the real thing"""
+
+import requests
+
+from aussiebb import AussieBB
+
+from .mockserver import MockAussieAPI
+
+
+# a small mock account
+MOCK_API = {"services": 25, "per_page": 10, "ratelimit": 10}
+
+
+def test_requires_login(server: MockAussieAPI) -> None:
+    """API calls without a cookie get a 401"""
+    response = requests.get(f"{server.url}/customer", timeout=5)
+    assert response.status_code == 401
+
+
+def test_login_and_paginate(server: MockAussieAPI) -> None:
+    """the sync client can log in and walk every page of services"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    services = client.get_services()
+    assert services is not None
+    assert len(services) == 25
+    assert server.logins == 1
+    assert server.calls["get_services"] == 3
+
+
+def test_ratelimit(server: MockAussieAPI) -> None:
+    """the rate limit headers count down and then it starts returning 429s"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    client.login()
+    url = client.get_url("get_customer_details")
+    remaining = []
+    for _ in range(9):
+        response = client.session.get(url, timeout=5)
+        remaining.append(int(response.headers["X-RateLimit-Remaining"]))
+    assert remaining == list(range(8, -1, -1))
+
+    response = client.session.get(url, timeout=5)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert "Please try again in" in response.text
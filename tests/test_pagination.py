@@ -0,0 +1,74 @@
+"""tests walking paginated endpoints"""
+
+import asyncio
+from time import sleep
+
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+
+from .mockserver import MockAussieAPI
+
+
+# three pages of services and orders
+MOCK_API = {"services": 25, "orders": 25, "per_page": 10}
+
+
+def wait_for_calls(server: MockAussieAPI, endpoint: str, calls: int) -> None:
+    """gives a prefetch a moment to land"""
+    for _ in range(100):
+        if server.calls[endpoint] >= calls:
+            return
+        sleep(0.01)
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_sync_iterators(server: MockAussieAPI, prefetch: bool) -> None:
+    """every item comes back in order, a page at a time"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+
+    services = client.iter_services(prefetch=prefetch)
+    next(services)
+    wait_for_calls(server, "get_services", 2)
+    # the page being read, and with prefetch the one after it
+    assert server.calls["get_services"] == (2 if prefetch else 1)
+    services.close()
+
+    assert [service["service_id"] for service in client.iter_services(prefetch=prefetch)] == [service["service_id"] for service in server.services]
+    assert [order["id"] for order in client.iter_orders(prefetch=prefetch)] == [order["id"] for order in server.orders]
+    assert client.services == []
+
+
+def test_get_orders_follows_pages(server: MockAussieAPI) -> None:
+    """orders past the first page aren't lost"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    orders = client.get_orders()
+    assert len(orders["data"]) == 25
+    assert orders["meta"]["current_page"] == 3
+    assert len(client.get_services() or []) == 25
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_async_iterators(server: MockAussieAPI, prefetch: bool) -> None:
+    """the asyncio client yields the same, and stopping early cancels the prefetch"""
+
+    async def check() -> None:
+        client = AsyncAussieBB("mock", "mock")
+        client.BASEURL = server.baseurl
+        try:
+            services = client.iter_services(prefetch=prefetch)
+            await services.__anext__()
+            await services.aclose()
+
+            assert [service["service_id"] async for service in client.iter_services(prefetch=prefetch)] == [service["service_id"] for service in server.services]
+            assert [order["id"] async for order in client.iter_orders(prefetch=prefetch)] == [order["id"] for order in server.orders]
+            orders = await client.get_orders()
+            assert [order["id"] for order in orders["data"]] == [order["id"] for order in server.orders]
+            assert len(await client.get_services()) == 25
+        finally:
+            await client.close()
+
+    asyncio.run(check())
@@ -0,0 +1,116 @@
+"""tests running many accounts through one pool"""
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from pydantic import SecretStr
+
+from aussiebb import AussieBB
+from aussiebb.asyncio.pool import AussieBBPool as AsyncAussieBBPool
+from aussiebb.exceptions import AuthenticationException, UnrecognisedServiceType
+from aussiebb.pool import AussieBBPool
+from aussiebb.types import AccountResult, AussieBBConfigFile, ConfigUser
+
+from .mockserver import MockAussieAPI
+
+ACCOUNTS = 5
+
+
+# a few services per account
+MOCK_API = {"services": 6, "latency": 0.005}
+
+
+def make_users() -> List[ConfigUser]:
+    """a handful of accounts"""
+    return [ConfigUser(username=f"user{index}", password=SecretStr("hunter2")) for index in range(ACCOUNTS)]
+
+
+def test_sync_pool(server: MockAussieAPI) -> None:
+    """each account logs in once, uses its own cookie and the pool is shared"""
+    with AussieBBPool.from_config(AussieBBConfigFile(users=make_users()), concurrency=4) as pool:
+        for client in pool.clients.values():
+            client.BASEURL = server.baseurl
+        results = pool.run("get_customer_details")
+        assert sorted(results) == [user.username for user in make_users()]
+        assert all(result.ok for result in results.values())
+
+        service_results = pool.run_service_calls(["get_usage", "service_plans"])
+        stats = pool.transport_stats()
+
+    assert server.logins == ACCOUNTS
+    for username, result in service_results.items():
+        assert result.ok
+        assert len(result.result) == len(server.services) * 2
+        assert all(item.ok for item in result.result)
+        # customer details, services, and the per-service calls
+        assert server.user_calls[username] == 1 + 1 + len(server.services) * 2
+    assert stats["connections_reused"] > stats["connections_opened"]
+
+
+def test_sync_pool_records_module_exceptions(server: MockAussieAPI) -> None:
+    """one account raising one of the module's exceptions fails on its own, without stopping the others"""
+
+    def get_usage(client: AussieBB, service_id: int) -> Any:
+        if client.username == "user0":
+            raise UnrecognisedServiceType("nope")
+        return client.get_usage(service_id)
+
+    def rejected(*args: Any, **kwargs: Any) -> Any:
+        raise AuthenticationException("bad password")
+
+    with AussieBBPool(make_users(), concurrency=4) as pool:
+        for client in pool.clients.values():
+            client.BASEURL = server.baseurl
+        pool.clients["user1"].get_services = rejected  # type: ignore[method-assign]
+        results = pool.run(lambda client: [get_usage(client, service["service_id"]) for service in client.get_services(use_cached=True) or []])
+
+    assert isinstance(results["user0"].error, UnrecognisedServiceType)
+    assert isinstance(results["user1"].error, AuthenticationException)
+    assert all(results[f"user{index}"].ok for index in range(2, ACCOUNTS))
+
+
+def test_async_pool_built_outside_the_loop(server: MockAussieAPI) -> None:
+    """the pool's semaphores are made inside the running loop, so a pool built before asyncio.run works in it"""
+    pool = AsyncAussieBBPool(make_users(), concurrency=2, per_account_concurrency=1)
+    for client in pool.clients.values():
+        client.BASEURL = server.baseurl
+
+    async def run() -> Dict[str, AccountResult]:
+        async with pool:
+            return await pool.run("get_customer_details")
+
+    assert all(result.ok for result in asyncio.run(run()).values())
+
+
+def test_pool_rejects_duplicates() -> None:
+    """an account can only be in the pool once"""
+    with pytest.raises(ValueError):
+        AussieBBPool(make_users() + make_users()[:1])
+
+
+async def test_async_pool(server: MockAussieAPI) -> None:
+    """calls are interleaved across accounts and limited per account"""
+    async with AsyncAussieBBPool(make_users(), concurrency=6, per_account_concurrency=2) as pool:
+        for client in pool.clients.values():
+            client.BASEURL = server.baseurl
+        results = await pool.run(lambda client: client.get_customer_details())
+        assert all(result.ok for result in results.values())
+
+        service_results = await pool.run_service_calls(["get_usage"], usernames=["user0", "user1"])
+        stats = pool.transport_stats()
+        connector = pool.connector
+        assert connector is not None
+    assert connector.closed
+    assert all(client.session is None for client in pool.clients.values())
+
+    assert sorted(service_results) == ["user0", "user1"]
+    for username in ["user0", "user1"]:
+        assert [item.service_id for item in service_results[username].result] == [service["service_id"] for service in server.services]
+        assert server.user_calls[username] == 1 + 1 + len(server.services)
+    assert server.user_calls["user2"] == 1
+    assert server.logins == ACCOUNTS
+    assert server.max_inflight <= 6
+    assert stats["connections_opened"] <= 6
+    with pytest.raises(ValueError):
+        await pool.run("get_customer_details", usernames=["nobody"])
@@ -0,0 +1,67 @@
+"""tests the adaptive rate limiter"""
+
+import asyncio
+
+import aiohttp
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.ratelimit import RateLimiter
+
+from .mockserver import MockAussieAPI
+
+
+# five requests a second
+MOCK_API = {"ratelimit": 5, "ratelimit_window": 1}
+
+
+def test_learns_from_headers() -> None:
+    """the limit and remaining budget come from the headers"""
+    limiter = RateLimiter(window=6)
+    assert limiter.acquire() == 0
+    limiter.update({"X-RateLimit-Limit": "60", "X-RateLimit-Remaining": "2"})
+    assert limiter.limit == 60
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    # out of budget, so the next one has to wait for the bucket to refill
+    assert limiter.acquire() > 0
+    stats = limiter.stats()
+    assert stats["remaining"] == 2
+    assert stats["throttled_requests"] == 1
+    assert 0 < stats["throttled_seconds"] < 1
+
+
+def test_429_blocks_everyone() -> None:
+    """a 429 with Retry-After pauses every caller"""
+    limiter = RateLimiter()
+    limiter.update({"Retry-After": "1"}, status=429)
+    assert 0.5 < limiter.acquire() <= 1
+    assert limiter.acquire() == 0
+    assert limiter.stats()["rate_limited_responses"] == 1
+
+
+def test_sync_client_paces_requests(server: MockAussieAPI) -> None:
+    """the sync client waits for the window to reset instead of hitting a 429"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    for _ in range(12):
+        client.get_customer_details()
+    stats = client.rate_limiter.stats()
+    assert stats["rate_limited_responses"] == 0
+    assert stats["throttled_seconds"] > 0
+    assert stats["limit"] == 5
+
+
+async def test_shared_limiter_async(server: MockAussieAPI) -> None:
+    """two async clients sharing a limiter stay inside the budget between them"""
+    limiter = RateLimiter()
+    async with aiohttp.ClientSession() as session:
+        clients = [AsyncAussieBB(f"mock{index}", "mock", session=session, rate_limiter=limiter, coalesce=False) for index in range(2)]
+        for client in clients:
+            client.BASEURL = server.baseurl
+            await client.login()
+        await asyncio.gather(*[clients[index % 2].get_customer_details() for index in range(10)])
+    stats = limiter.stats()
+    assert stats["rate_limited_responses"] == 0
+    assert stats["requests"] == 12
+    assert stats["throttled_seconds"] > 0
@@ -0,0 +1,144 @@
+"""tests the retry policy and both clients retrying through it"""
+
+import random
+import socket
+
+import aiohttp
+import pytest
+import requests
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.exceptions import RateLimitException
+from aussiebb.retry import RetryPolicy
+
+from .mockserver import MockAussieAPI
+
+
+def quick_policy(max_attempts: int = 4) -> RetryPolicy:
+    """retries without waiting long"""
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0.001, max_delay=0.01, rng=random.Random(1))
+
+
+def closed_port() -> int:
+    """a local port nothing's listening on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+    return port
+
+
+def test_decorrelated_jitter() -> None:
+    """each wait is between the base delay and three times the last one, and never over the cap"""
+    policy = RetryPolicy(base_delay=1, max_delay=20, rng=random.Random(42))
+    previous = 1.0
+    for _ in range(50):
+        delay = policy.jitter(previous)
+        assert 1 <= delay <= min(previous * 3, 20)
+        previous = delay
+
+
+def test_classification() -> None:
+    """429s and listed 5xx statuses are worth retrying, POSTs only after failures the server didn't act on"""
+    policy = RetryPolicy()
+    assert policy.status_reason(429) == "rate_limit"
+    assert policy.status_reason(503) == "server"
+    assert policy.status_reason(404) is None
+    assert policy.status_reason(501) is None
+    assert policy.retryable("POST", "rate_limit")
+    assert policy.retryable("POST", "connect")
+    assert not policy.retryable("POST", "server")
+    assert not policy.retryable("POST", "connection")
+    assert policy.retryable("get", "connection")
+
+
+def test_attempts_and_budget() -> None:
+    """stops after max_attempts, or when the next wait would run past the budget"""
+    policy = quick_policy(max_attempts=3)
+    state = policy.start("GET")
+    assert state.next_delay("server") is not None
+    assert state.next_delay("server") is not None
+    assert state.next_delay("server") is None
+    assert state.next_delay(None) is None
+
+    state = RetryPolicy(budget=5).start("GET")
+    assert state.next_delay("rate_limit", minimum=10) is None
+    assert policy.stats()["retries"] == 2
+
+
+def test_sync_retries_5xx_and_429(server: MockAussieAPI) -> None:
+    """the sync client rides out a few failures instead of raising"""
+    client = AussieBB("mock", "mock", retry=quick_policy())
+    client.BASEURL = server.baseurl
+    client.login()
+    server.fail_next(503, 429, 502)
+    assert client.get_customer_details()["customer_number"]
+    stats = client.retry.stats()
+    assert stats["retries"] == 3
+    assert stats["server"] == 2
+    assert stats["rate_limit"] == 1
+
+
+def test_sync_gives_up(server: MockAussieAPI) -> None:
+    """once it's out of attempts, the last response is raised as usual"""
+    client = AussieBB("mock", "mock", retry=quick_policy(max_attempts=2))
+    client.BASEURL = server.baseurl
+    client.login()
+    server.fail_next(503, 503, 503)
+    with pytest.raises(requests.HTTPError):
+        client.get_customer_details()
+    assert client.retry.stats()["gave_up"] == 1
+
+
+def test_sync_post_not_retried_on_5xx(server: MockAussieAPI) -> None:
+    """a POST which got a 500 might have done something, so it's not sent again"""
+    client = AussieBB("mock", "mock", retry=quick_policy())
+    client.BASEURL = server.baseurl
+    client.login()
+    server.fail_next(500)
+    with pytest.raises(requests.HTTPError):
+        client.request_post(url=client.get_url("test_line_state", {"service_id": 1}))
+    assert client.retry.stats()["retries"] == 0
+
+
+def test_sync_retries_connection_errors() -> None:
+    """a refused connection is retried, then raised"""
+    client = AussieBB("mock", "mock", retry=quick_policy(max_attempts=3))
+    client.BASEURL = {"api": f"http://127.0.0.1:{closed_port()}", "login": f"http://127.0.0.1:{closed_port()}/login"}
+    with pytest.raises(requests.ConnectionError):
+        client.login()
+    assert client.retry.stats()["connect"] == 2
+
+
+async def test_async_retries_5xx_and_429(server: MockAussieAPI) -> None:
+    """the asyncio client retries through the same policy"""
+    client = AsyncAussieBB("mock", "mock", retry=quick_policy())
+    client.BASEURL = server.baseurl
+    await client.login()
+    server.fail_next(500, 429)
+    assert (await client.get_customer_details())["customer_number"]
+    assert client.retry.stats()["retries"] == 2
+    await client.close()
+
+
+async def test_async_429_gives_up() -> None:
+    """a 429 that outlasts the policy raises RateLimitException instead of recursing forever"""
+    with MockAussieAPI() as server:
+        client = AsyncAussieBB("mock", "mock", retry=quick_policy(max_attempts=2))
+        client.BASEURL = server.baseurl
+        await client.login()
+        server.fail_next(*[429] * 5)
+        with pytest.raises(RateLimitException):
+            await client.get_customer_details()
+        assert server.failures == [429] * 3
+        await client.close()
+
+
+async def test_async_retries_connection_errors() -> None:
+    """a refused connection is retried, then raised"""
+    client = AsyncAussieBB("mock", "mock", retry=quick_policy(max_attempts=3))
+    client.BASEURL = {"api": f"http://127.0.0.1:{closed_port()}", "login": f"http://127.0.0.1:{closed_port()}/login"}
+    with pytest.raises(aiohttp.ClientConnectorError):
+        await client.login()
+    assert client.retry.stats()["connect"] == 2
+    await client.close()
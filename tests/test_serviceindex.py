@@ -0,0 +1,94 @@
+"""tests the service index"""
+
+from typing import Any, Dict, List
+
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.serviceindex import ServiceIndex
+
+from .mockserver import MockAussieAPI
+
+
+def make_services() -> List[Dict[str, Any]]:
+    """a mix of types, in an order which interleaves them"""
+    return [
+        {"service_id": 1, "type": "NBN"},
+        {"service_id": 2, "type": "VOIP"},
+        {"service_id": 3, "type": "Hardware"},
+        {"service_id": 4, "type": "Opticomm"},
+        {"service_id": 5, "type": "FETCHTV"},
+        {"service_id": 6, "type": "PhoneMobile"},
+    ]
+
+
+def test_lookups() -> None:
+    """by id, type and family, in the original order"""
+    index = ServiceIndex(make_services())
+    assert len(index) == 6
+    assert 4 in index and 7 not in index
+    assert index.get(2) == {"service_id": 2, "type": "VOIP"}
+    assert index.get(7) is None
+    assert [service["service_id"] for service in index.by_type("VOIP", "NBN")] == [1, 2]
+    assert [service["service_id"] for service in index.by_family("nbn")] == [1, 4]
+    assert [service["service_id"] for service in index.by_family("phone", "fetch")] == [2, 5, 6]
+    assert index.by_type("Satellite") == []
+
+
+def test_incremental_update() -> None:
+    """changed, added and removed services end up in the right buckets"""
+    services = make_services()
+    index = ServiceIndex(services)
+    updated = services[1:] + [{"service_id": 7, "type": "NBN"}]
+    updated[0] = {"service_id": 2, "type": "NBN"}
+    index.update(updated)
+
+    assert 1 not in index
+    assert [service["service_id"] for service in index.by_type("NBN")] == [2, 7]
+    assert index.by_type("VOIP") == []
+    assert "VOIP" not in index.types()
+    assert [service["service_id"] for service in index.by_family("nbn")] == [2, 4, 7]
+
+
+def test_client_services_property() -> None:
+    """setting the services keeps the index in step, and filtering uses it"""
+    client = AussieBB("testuser", "testpassword")
+    client.services = make_services()
+    assert client.service_index.get(6) == {"service_id": 6, "type": "PhoneMobile"}
+    assert [service["service_id"] for service in client.filter_services(["NBN", "VOIP"])] == [1, 2]
+    assert [service["service_id"] for service in client.filter_services(drop_types=["Hardware"], drop_unknown_types=True)] == [1, 2, 4, 5, 6]
+    assert len(client.filter_services()) == 6
+
+    client.services = [{"service_id": 1}]
+    with pytest.raises(ValueError):
+        client.filter_services()
+
+
+def test_updated_leaves_the_original() -> None:
+    """`updated` applies a change to a copy, so anyone holding the old index still sees the old services"""
+    services = make_services()
+    index = ServiceIndex(services)
+    copy = index.updated(services[1:] + [{"service_id": 7, "type": "NBN"}])
+    assert 1 in index and 7 not in index
+    assert 1 not in copy and 7 in copy
+    assert [service["service_id"] for service in index.by_type("NBN")] == [1]
+
+
+@pytest.mark.parametrize("use_cached", [True, False])
+async def test_fresh_client_usage_of_phone_service(server: MockAussieAPI, use_cached: bool) -> None:
+    """a client that hasn't pulled its services yet still sends phone services to the telephony endpoint"""
+    voip = server.services[3]["service_id"]
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    assert "national" in client.get_usage(voip, use_cached=use_cached)
+    assert len(client.services) == len(server.services)
+
+    async_client = AsyncAussieBB("mock", "mock")
+    async_client.BASEURL = server.baseurl
+    try:
+        assert "national" in await async_client.get_usage(voip, use_cached=use_cached)
+    finally:
+        await async_client.close()
+    assert server.calls["telephony_usage"] == 2
+    assert server.calls["get_usage"] == 0
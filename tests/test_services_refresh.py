@@ -0,0 +1,151 @@
+"""tests serving stale services while they're refreshed in the background"""
+
+import asyncio
+from typing import Any, Dict, List
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.exceptions import AuthenticationException, RateLimitException
+from aussiebb.retry import RetryPolicy
+
+from .mockserver import MockAussieAPI
+
+
+# a mock API with a little latency
+MOCK_API = {"services": 10, "latency": 0.05}
+
+
+def test_sync_stale_while_revalidate(server: MockAussieAPI) -> None:
+    """stale services come back straight away, and the refreshed ones are swapped in by a background thread"""
+    client = AussieBB("mock", "mock", services_cache_time=60, services_stale_time=600)
+    client.BASEURL = server.baseurl
+    client.get_services()
+    server.services.append(MockAussieAPI.make_service(10))
+    server.reset_counters()
+
+    client.services_last_update -= 120
+    assert len(client.get_services(use_cached=True) or []) == 10
+    refresh = client.services_refresh
+    assert refresh is not None
+    # a second caller while it's refreshing doesn't start another refresh
+    client.get_services(use_cached=True)
+    assert client.services_refresh is refresh
+    refresh.join()
+
+    assert len(client.services) == 11
+    assert client.service_index.get(100010) is not None
+    # one refresh, which is two pages now
+    assert server.calls["get_services"] == 2
+    assert client.get_services(use_cached=True) == client.services
+    assert server.calls["get_services"] == 2
+
+
+def test_sync_too_stale(server: MockAussieAPI) -> None:
+    """past services_stale_time, callers wait for the refresh"""
+    client = AussieBB("mock", "mock", services_cache_time=60, services_stale_time=600)
+    client.BASEURL = server.baseurl
+    client.get_services()
+    server.services.append(MockAussieAPI.make_service(10))
+    client.services_last_update -= 1000
+    assert len(client.get_services(use_cached=True) or []) == 11
+    assert client.services_refresh is None
+
+
+def test_sync_failed_refresh(server: MockAussieAPI) -> None:
+    """if the refresh fails the cached services are kept, and the next caller tries again"""
+    client = AussieBB("mock", "mock", services_cache_time=60, services_stale_time=600, retry=RetryPolicy(max_attempts=1))
+    client.BASEURL = server.baseurl
+    client.get_services()
+    client.services_last_update -= 120
+    last_update = client.services_last_update
+    server.fail_next(500)
+    client.get_services(use_cached=True)
+    assert client.services_refresh is not None
+    client.services_refresh.join()
+    assert len(client.services) == 10
+    assert client.services_last_update == last_update
+
+    client.get_services(use_cached=True)
+    client.services_refresh.join()
+    assert client.services_last_update > last_update
+
+
+def test_sync_cached_read_doesnt_write_back(server: MockAussieAPI) -> None:
+    """filtering the cached services returns a filtered list without replacing the cached ones"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    client.get_services()
+    snapshot = client._services_snapshot  # pylint: disable=protected-access
+    phones = client.get_services(use_cached=True, servicetypes=["VOIP"]) or []
+    assert phones and all(service["type"] == "VOIP" for service in phones)
+    assert client._services_snapshot is snapshot  # pylint: disable=protected-access
+    assert len(client.services) == 10
+
+
+def test_sync_refresh_survives_module_exceptions(server: MockAussieAPI) -> None:
+    """an AuthenticationException in the background refresh is logged, and the cached services are kept"""
+    client = AussieBB("mock", "mock", services_cache_time=60, services_stale_time=600)
+    client.BASEURL = server.baseurl
+    client.get_services()
+
+    def rejected(page: int, page_concurrency: int) -> List[Dict[str, Any]]:
+        raise AuthenticationException("bad password")
+
+    client._fetch_services = rejected  # type: ignore[method-assign]  # pylint: disable=protected-access
+    client.services_last_update -= 120
+    client.get_services(use_cached=True)
+    assert client.services_refresh is not None
+    client.services_refresh.join()
+    assert len(client.services) == 10
+
+
+async def test_async_refresh_survives_module_exceptions(server: MockAussieAPI) -> None:
+    """a RateLimitException in the background task is logged, and the cached services are kept"""
+    client = AsyncAussieBB("mock", "mock", services_cache_time=60, services_stale_time=600)
+    client.BASEURL = server.baseurl
+    await client.get_services()
+
+    async def limited(page: int, page_concurrency: int) -> List[Dict[str, Any]]:
+        raise RateLimitException("slow down")
+
+    client._fetch_services = limited  # type: ignore[method-assign]  # pylint: disable=protected-access
+    client.services_last_update -= 120
+    await client.get_services(use_cached=True)
+    assert client.services_refresh is not None
+    await client.services_refresh
+    assert len(client.services) == 10
+    await client.close()
+
+
+async def test_async_stale_while_revalidate(server: MockAussieAPI) -> None:
+    """the asyncio client refreshes in a task"""
+    client = AsyncAussieBB("mock", "mock", services_cache_time=60, services_stale_time=600)
+    client.BASEURL = server.baseurl
+    await client.get_services()
+    server.services.append(MockAussieAPI.make_service(10))
+
+    client.services_last_update -= 120
+    assert len(await client.get_services(use_cached=True)) == 10
+    refresh = client.services_refresh
+    assert refresh is not None
+    await client.get_services(use_cached=True)
+    assert client.services_refresh is refresh
+    await refresh
+    assert len(client.services) == 11
+    assert client.service_index.get(100010) is not None
+    await client.close()
+
+
+async def test_async_close_cancels_refresh(server: MockAussieAPI) -> None:
+    """closing the client stops a refresh that's still running"""
+    client = AsyncAussieBB("mock", "mock", services_cache_time=60, services_stale_time=600)
+    client.BASEURL = server.baseurl
+    await client.get_services()
+    client.services_last_update -= 120
+    await client.get_services(use_cached=True)
+    refresh = client.services_refresh
+    assert refresh is not None
+    await asyncio.sleep(0)
+    await client.close()
+    assert refresh.cancelled()
+    assert len(client.services) == 10
@@ -0,0 +1,141 @@
+"""tests logging in again in the background before the cookie expires"""
+
+import asyncio
+from time import sleep, time
+from typing import Any
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.exceptions import UnrecognisedServiceType
+from aussiebb.tokenrefresh import refresh_due
+
+from .mockserver import MockAussieAPI
+
+# the client expires cookies 50 seconds early, so these last two seconds and are refreshed after one
+EXPIRES_IN = 52
+
+
+# a mock API handing out short-lived cookies
+MOCK_API = {"expires_in": EXPIRES_IN}
+
+
+def test_refresh_due() -> None:
+    """the margin before expiry, but never before halfway through the cookie's life"""
+    assert refresh_due(0, 3600, 300) == 3300
+    assert refresh_due(0, 100, 300) == 50
+
+
+def test_sync_refresh(server: MockAussieAPI) -> None:
+    """requests keep going across several cookie lifetimes without logging in themselves"""
+    client = AussieBB("mock", "mock", token_refresh_margin=1)
+    client.BASEURL = server.baseurl
+    client.get_customer_details()
+    assert client.token_refresher is not None and client.token_refresher.is_alive()
+
+    for _ in range(30):
+        sleep(0.1)
+        client.get_customer_details()
+    client.stop_token_refresh()
+    assert not client.token_refresher.is_alive()
+
+    stats = client.token_refresh.stats()
+    assert stats["inline_logins"] == 1
+    assert stats["refreshes"] >= 2
+    assert stats["failures"] == 0
+    assert stats["last_duration"] is not None
+    assert server.logins == stats["refreshes"] + 1
+
+
+def test_sync_failed_refresh(server: MockAussieAPI) -> None:
+    """a failed refresh keeps the current cookie, and the refresher tries again"""
+    # four seconds, so there's time to retry after a second's backoff
+    server.expires_in = EXPIRES_IN + 2
+    client = AussieBB("mock", "mock", token_refresh_margin=2)
+    client.BASEURL = server.baseurl
+    client.login()
+    cookie = client._cookie_value()  # pylint: disable=protected-access
+    client.BASEURL = {**server.baseurl, "login": f"{server.url}/missing"}
+    client.get_customer_details()
+    sleep(2.3)
+    assert client.token_refresh.stats()["failures"] >= 1
+    assert client._cookie_value() == cookie  # pylint: disable=protected-access
+    client.get_customer_details()
+
+    client.BASEURL = server.baseurl
+    sleep(1.2)
+    client.stop_token_refresh()
+    stats = client.token_refresh.stats()
+    assert stats["refreshes"] >= 1
+    assert stats["consecutive_failures"] == 0
+    assert stats["inline_logins"] == 0
+
+
+def test_sync_refresh_records_module_exceptions(server: MockAussieAPI) -> None:
+    """any of the module's exceptions out of login is recorded as a failure, rather than ending the refresher"""
+    client = AussieBB("mock", "mock", token_refresh_margin=10)
+    client.BASEURL = server.baseurl
+    client.login()
+    cookie = client._cookie_value()  # pylint: disable=protected-access
+    # the margin's longer than the cookie has left, and it was issued long enough ago that the refresh is due
+    client.token_issued = time() - 100
+
+    def login(*args: Any, **kwargs: Any) -> bool:
+        raise UnrecognisedServiceType("Cheese")
+
+    client.login = login  # type: ignore[method-assign]
+    client._refresh_token()  # pylint: disable=protected-access
+    stats = client.token_refresh.stats()
+    assert stats["failures"] == 1
+    assert stats["last_error"] == "UnrecognisedServiceType: Cheese"
+    assert client._cookie_value() == cookie  # pylint: disable=protected-access
+
+
+async def test_async_refresh_records_module_exceptions(server: MockAussieAPI) -> None:
+    """the asyncio refresher records the module's exceptions too"""
+    client = AsyncAussieBB("mock", "mock", token_refresh_margin=10)
+    client.BASEURL = server.baseurl
+    try:
+        await client.login()
+        client.token_issued = time() - 100
+
+        async def login(*args: Any, **kwargs: Any) -> bool:
+            raise UnrecognisedServiceType("Cheese")
+
+        client.login = login  # type: ignore[method-assign]
+        await client._refresh_token()  # pylint: disable=protected-access
+    finally:
+        await client.close()
+    stats = client.token_refresh.stats()
+    assert stats["failures"] == 1
+    assert stats["last_error"] == "UnrecognisedServiceType: Cheese"
+
+
+def test_disabled(server: MockAussieAPI) -> None:
+    """without a margin, there's no refresher and requests log in when the cookie expires"""
+    client = AussieBB("mock", "mock")
+    client.BASEURL = server.baseurl
+    client.get_customer_details()
+    assert client.token_refresher is None
+    client.token_expires = 0
+    client.get_customer_details()
+    assert client.token_refresh.stats()["inline_logins"] == 2
+
+
+async def test_async_refresh(server: MockAussieAPI) -> None:
+    """the asyncio client refreshes in a task, which close() cancels"""
+    client = AsyncAussieBB("mock", "mock", token_refresh_margin=1)
+    client.BASEURL = server.baseurl
+    await client.get_customer_details()
+    refresher = client.token_refresher
+    assert refresher is not None
+
+    for _ in range(30):
+        await asyncio.sleep(0.1)
+        await client.get_customer_details()
+    await client.close()
+    assert refresher.cancelled()
+
+    stats = client.token_refresh.stats()
+    assert stats["inline_logins"] == 1
+    assert stats["refreshes"] >= 2
+    assert server.logins == stats["refreshes"] + 1
@@ -0,0 +1,91 @@
+"""tests keeping login cookies between clients"""
+
+from pathlib import Path
+import stat
+from time import time
+
+import aiohttp
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.tokenstore import FileTokenStore, MemoryTokenStore, TokenStore
+
+from .mockserver import MockAussieAPI
+
+
+# a small account
+MOCK_API = {"services": 4}
+
+
+def test_token_store_is_abstract() -> None:
+    """the base class can't be used without somewhere to keep the tokens"""
+    with pytest.raises(TypeError, match="abstract"):
+        TokenStore()  # type: ignore[abstract]  # pylint: disable=abstract-class-instantiated
+
+
+def test_file_token_store(tmp_path: Path) -> None:
+    """tokens round trip through the file, expired ones are ignored"""
+    store = FileTokenStore(tmp_path / "tokens.json")
+    assert store.load("user") is None
+    store.save("user", {"cookie": "abc123", "expires": time() + 60})
+    store.save("other", {"cookie": "def456", "expires": time() - 1})
+    token = store.load("user")
+    assert token is not None and token["cookie"] == "abc123"
+    assert store.load("other") is None
+    assert stat.S_IMODE((tmp_path / "tokens.json").stat().st_mode) == 0o600
+    store.clear("user")
+    assert FileTokenStore(tmp_path / "tokens.json").load("user") is None
+
+
+def test_memory_token_store() -> None:
+    """the in-process store behaves the same way"""
+    store = MemoryTokenStore()
+    store.save("user", {"cookie": "abc123", "expires": time() + 60})
+    token = store.load("user")
+    assert token is not None and token["cookie"] == "abc123"
+    store.clear("user")
+    assert store.load("user") is None
+
+
+def test_sync_client_token_store(server: MockAussieAPI, tmp_path: Path) -> None:
+    """a second client with the same store doesn't log in, and a revoked cookie gets replaced"""
+    store = FileTokenStore(tmp_path / "tokens.json")
+    first = AussieBB("mock", "mock", token_store=store)
+    first.BASEURL = server.baseurl
+    first.get_customer_details()
+    assert server.logins == 1
+
+    second = AussieBB("mock", "mock", token_store=store)
+    second.BASEURL = server.baseurl
+    assert not second._has_token_expired()
+    second.get_customer_details()
+    second.account_contacts()
+    assert server.logins == 1
+
+    server.expire_tokens()
+    third = AussieBB("mock", "mock", token_store=store)
+    third.BASEURL = server.baseurl
+    third.get_customer_details()
+    assert server.logins == 2
+    token = store.load("mock")
+    assert token is not None and token["cookie"] == third._cookie_value()
+
+
+async def test_async_client_token_store(server: MockAussieAPI, tmp_path: Path) -> None:
+    """the async client picks up a cookie the sync client stored"""
+    store = FileTokenStore(tmp_path / "tokens.json")
+    sync_client = AussieBB("mock", "mock", token_store=store)
+    sync_client.BASEURL = server.baseurl
+    sync_client.login()
+    assert server.logins == 1
+
+    async with aiohttp.ClientSession() as session:
+        client = AsyncAussieBB("mock", "mock", session=session, token_store=store)
+        client.BASEURL = server.baseurl
+        await client.get_customer_details()
+        assert server.logins == 1
+
+        server.expire_tokens()
+        await client.get_customer_details()
+        assert server.logins == 2
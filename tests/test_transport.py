@@ -0,0 +1,48 @@
+"""tests the connection pool settings and stats"""
+
+import asyncio
+
+from requests.adapters import HTTPAdapter
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.transport import TransportConfig
+
+from .mockserver import MockAussieAPI
+
+
+# slow enough that concurrent requests queue for connections
+MOCK_API = {"services": 4, "latency": 0.01}
+
+
+def test_sync_transport(server: MockAussieAPI) -> None:
+    """the adapters are sized from the config, and connections get reused"""
+    client = AussieBB("mock", "mock", transport=TransportConfig(pool_maxsize=4))
+    client.BASEURL = server.baseurl
+    adapter = client.session.get_adapter(server.url)
+    assert isinstance(adapter, HTTPAdapter)
+    assert adapter._pool_maxsize == 4  # type: ignore[attr-defined]
+
+    for _ in range(10):
+        client.get_customer_details()
+    stats = client.transport_stats()
+    assert stats["requests"] == 11
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 10
+
+
+async def test_async_transport(server: MockAussieAPI) -> None:
+    """the client builds its own session, and callers queue once the pool's full"""
+    client = AsyncAussieBB("mock", "mock", transport=TransportConfig(limit=2, limit_per_host=2), coalesce=False)
+    client.BASEURL = server.baseurl
+    try:
+        await asyncio.gather(*[client.get_customer_details() for _ in range(10)])
+        stats = client.transport_stats()
+    finally:
+        await client.close()
+    assert client.session is None
+    assert stats["requests"] == 11
+    assert stats["connections_opened"] <= 2
+    assert stats["connections_reused"] > 0
+    assert stats["waited"] > 0
+    assert stats["waiting"] == 0
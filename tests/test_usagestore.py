@@ -0,0 +1,138 @@
+"""tests the usage history store"""
+
+from datetime import date
+from pathlib import Path
+import sqlite3
+import sys
+from typing import Any, Dict, Iterator, Tuple
+
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.usagestore import UsageStore, flatten_usage, usage_day
+
+from .mockserver import MockAussieAPI
+
+
+def test_flatten_usage() -> None:
+    """numbers are kept, nested ones get dotted names, everything else is dropped"""
+    usage = {
+        "usedMb": 100,
+        "remainingMb": None,
+        "lastUpdated": "2025-03-04 05:06:07",
+        "national": {"calls": 3, "cost": 1.5},
+        "historical": [{"date": "2025-03-01", "usedMb": 1}],
+        "flag": True,
+    }
+    assert flatten_usage(usage) == {"usedMb": 100.0, "national.calls": 3.0, "national.cost": 1.5}
+    assert usage_day(usage) == date(2025, 3, 4)
+    assert usage_day({"month": "2025-02"}) == date(2025, 2, 1)
+    assert usage_day({"date": "yesterday"}) is None
+
+
+def test_append_dedupes_per_day() -> None:
+    """appending the same service and day again replaces that day's values"""
+    with UsageStore() as store:
+        store.append(1, {"usedMb": 10}, day=date(2025, 1, 1))
+        store.append(1, {"usedMb": 20}, day=date(2025, 1, 1))
+        store.append(1, {"usedMb": 30}, day=date(2025, 1, 2))
+        store.append(2, {"usedMb": 5}, day=date(2025, 1, 2))
+        assert store.query("usedMb", date(2025, 1, 1), date(2025, 1, 31)) == [
+            (1, date(2025, 1, 1), 20.0),
+            (1, date(2025, 1, 2), 30.0),
+            (2, date(2025, 1, 2), 5.0),
+        ]
+        assert store.query("usedMb", date(2025, 1, 2), date(2025, 1, 2), service_ids=[2]) == [(2, date(2025, 1, 2), 5.0)]
+        assert store.query("nothing", date(2025, 1, 1), date(2025, 1, 31)) == []
+        assert store.services() == [1, 2]
+
+
+def test_historical_entries() -> None:
+    """telephony history is stored against each entry's own day, entries without one are skipped"""
+    with UsageStore() as store:
+        written = store.append(
+            7,
+            {
+                "national": {"calls": 4, "cost": 2.0},
+                "historical": [{"date": "2025-01-01", "national": {"calls": 1}}, {"national": {"calls": 99}}],
+            },
+            day=date(2025, 1, 5),
+        )
+        assert written == 3
+        assert store.metrics() == ["national.calls", "national.cost"]
+        assert store.query("national.calls", date(2025, 1, 1), date(2025, 1, 31)) == [(7, date(2025, 1, 1), 1.0), (7, date(2025, 1, 5), 4.0)]
+
+
+def test_downsample() -> None:
+    """buckets are labelled with their first day and aggregated per service"""
+    with UsageStore() as store:
+        for day in range(1, 15):
+            store.append(1, {"usedMb": day * 10}, day=date(2025, 1, day))
+        start, end = date(2025, 1, 1), date(2025, 1, 14)
+        assert store.downsample("usedMb", start, end, bucket_days=7) == [(1, date(2025, 1, 1), 70.0), (1, date(2025, 1, 8), 140.0)]
+        assert store.downsample("usedMb", start, end, bucket_days=7, aggregate="min") == [(1, date(2025, 1, 1), 10.0), (1, date(2025, 1, 8), 80.0)]
+        assert store.downsample("usedMb", start, end, bucket_days=7, aggregate="sum")[0] == (1, date(2025, 1, 1), 280.0)
+        assert store.downsample("usedMb", start, end, bucket_days=14, aggregate="avg") == [(1, date(2025, 1, 1), 75.0)]
+        assert store.downsample("usedMb", start, date(2025, 1, 10), bucket_days=7, aggregate="last")[1] == (1, date(2025, 1, 8), 100.0)
+        with pytest.raises(ValueError):
+            store.downsample("usedMb", start, end, aggregate="median")
+
+
+def test_persists(tmp_path: Path) -> None:
+    """a file store keeps its history, and its metric names, between opens"""
+    path = tmp_path / "usage.db"
+    with UsageStore(path) as store:
+        store.append(1, {"usedMb": 10}, day=date(2025, 1, 1))
+    with UsageStore(path) as store:
+        store.append(1, {"downloadedMb": 5}, day=date(2025, 1, 1))
+        assert store.metrics() == ["downloadedMb", "usedMb"]
+        assert store.query("usedMb", date(2025, 1, 1), date(2025, 1, 1)) == [(1, date(2025, 1, 1), 10.0)]
+
+
+def test_failed_append_forgets_new_metrics(tmp_path: Path) -> None:
+    """metrics added by a transaction that rolls back aren't remembered, so they're added again next time"""
+    path = tmp_path / "usage.db"
+
+    def snapshots() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        yield 1, {"usedMb": 10}
+        raise RuntimeError("lost the API")
+
+    with UsageStore(path) as store:
+        with pytest.raises(RuntimeError, match="lost the API"):
+            store.append_many(snapshots(), day=date(2025, 1, 1))
+        assert store.metrics() == []
+        store.append(1, {"usedMb": 10}, day=date(2025, 1, 1))
+    with UsageStore(path) as store:
+        assert store.metrics() == ["usedMb"]
+        assert store.query("usedMb", date(2025, 1, 1), date(2025, 1, 1)) == [(1, date(2025, 1, 1), 10.0)]
+
+
+@pytest.mark.parametrize("days", [1, 4000])
+def test_query_many_services(days: int) -> None:
+    """selecting more services than SQLite allows parameters in a statement"""
+    service_ids = list(range(40_000))
+    with UsageStore() as store:
+        if sys.version_info >= (3, 11):
+            # the limit on older SQLite builds, newer ones allow more
+            store._connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)  # pylint: disable=protected-access
+        store.append_many([(service_id, {"usedMb": service_id}) for service_id in service_ids[::2]], day=date(2025, 1, 1))
+        start = date(2025, 1, 1)
+        end = date.fromordinal(start.toordinal() + days - 1)
+        assert len(store.query("usedMb", start, end, service_ids=service_ids)) == 20_000
+        assert store.query_ordinals("usedMb", start, end, service_ids=[3, 4]) == [(4, start.toordinal(), 4.0)]
+        assert store.downsample("usedMb", start, end, service_ids=service_ids[-4:]) == [(39_996, start, 39_996.0), (39_998, start, 39_998.0)]
+
+
+def test_from_client() -> None:
+    """get_usage responses go straight in, dated by their lastUpdated"""
+    with MockAussieAPI(services=3) as server:
+        client = AussieBB("testuser", "testpass")
+        client.BASEURL = server.baseurl
+        service_ids = [service["service_id"] for service in client.get_services(use_cached=True) or [] if service["type"] != "VOIP"]
+        with UsageStore() as store:
+            snapshots = [(service_id, client.get_usage(service_id)) for service_id in service_ids]
+            store.append_many(snapshots)
+            day = usage_day(snapshots[0][1])
+            assert day is not None
+            assert [row[0] for row in store.query("usedMb", day, day)] == sorted(service_ids)
+            assert "daysRemaining" in store.metrics()
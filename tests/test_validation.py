@@ -0,0 +1,93 @@
+"""tests the validation policies"""
+
+import asyncio
+import json
+import logging
+
+from pydantic import ValidationError
+import pytest
+
+from aussiebb import AussieBB
+from aussiebb.asyncio import AussieBB as AsyncAussieBB
+from aussiebb.types import Address, FetchService, VOIPDetails, VOIPDevice
+from aussiebb.validation import ValidationPolicy, construct_model
+
+from .mockserver import MockAussieAPI
+
+VOIP = {"phoneNumber": "0912345678", "barInternational": True, "divertNumber": None, "supportsNumberDiversion": True}
+
+
+def test_construct_model() -> None:
+    """nested models are built too, but values aren't converted"""
+    service = construct_model(FetchService, MockAussieAPI.make_service(0))
+    assert isinstance(service.address, Address)
+    assert service.address.postcode == MockAussieAPI.make_service(0)["address"]["postcode"]
+    assert isinstance(service.next_bill_date, str)
+
+
+def test_policy_choices() -> None:
+    """unknown modes and silly sample rates are rejected"""
+    with pytest.raises(ValueError):
+        ValidationPolicy("sometimes")
+    with pytest.raises(ValueError):
+        ValidationPolicy("sampled", sample_rate=0)
+    policy = ValidationPolicy("trusted")
+    assert ValidationPolicy.from_setting(policy) is policy
+    assert ValidationPolicy.from_setting("sampled").mode == "sampled"
+
+
+def test_full_and_trusted() -> None:
+    """full raises on bad responses, trusted doesn't look"""
+    bad = json.dumps({**VOIP, "barInternational": "maybe"}).encode("utf-8")
+    with pytest.raises(ValidationError):
+        ValidationPolicy("full").decode(bad, VOIPDetails, json.loads)
+
+    policy = ValidationPolicy("trusted")
+    assert policy.decode(bad, VOIPDetails, json.loads).model_dump(warnings=False)["bar_international"] == "maybe"
+    assert policy.stats() == {"validated": 0, "trusted": 1, "drift": 0}
+
+
+def test_sampled(caplog: pytest.LogCaptureFixture) -> None:
+    """the first response and every Nth after it are validated, drift is logged rather than raised"""
+    policy = ValidationPolicy("sampled", sample_rate=3)
+    good = json.dumps(VOIP).encode("utf-8")
+    bad = json.dumps({**VOIP, "barInternational": "maybe"}).encode("utf-8")
+
+    for _ in range(6):
+        assert policy.decode(good, VOIPDetails, json.loads).phone_number == "0912345678"
+    assert policy.stats() == {"validated": 2, "trusted": 4, "drift": 0}
+
+    # each model is sampled separately
+    devices = policy.decode_list(b'[{"username": "mock", "password": "mock", "registered": true}]', VOIPDevice, json.loads)
+    assert devices[0].password.get_secret_value() == "mock"
+
+    with caplog.at_level(logging.WARNING):
+        assert policy.decode(bad, VOIPDetails, json.loads).model_dump(warnings=False)["bar_international"] == "maybe"
+    assert policy.drift == 1
+    assert "Schema drift" in caplog.text
+
+
+def test_client_policies() -> None:
+    """both clients take a policy, and trusted responses still come back as models"""
+    policy = ValidationPolicy("trusted")
+    with MockAussieAPI(services=4) as server:
+        client = AussieBB("mock", "mock", validation=policy)
+        client.BASEURL = server.baseurl
+        voip = server.services[3]["service_id"]
+        assert isinstance(client.get_voip_service(voip), VOIPDetails)
+        assert client.get_order(500000)["appointment_reschedule_code"] == 0
+        assert len(client.get_services() or []) == 4
+        assert client.account_contacts()[0].contact_id == 1
+
+        async def check_async() -> None:
+            async_client = AsyncAussieBB("mock", "mock", validation=policy)
+            async_client.BASEURL = server.baseurl
+            try:
+                assert (await async_client.get_voip_devices(voip))[0].registered
+                assert (await async_client.get_fetch_service(voip)).service_id == voip
+            finally:
+                await async_client.close()
+
+        asyncio.run(check_async())
+    assert policy.validated == 0
+    assert policy.trusted == 6